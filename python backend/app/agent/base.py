@@ -1,6 +1,21 @@
-from typing import List, Optional, Dict, Any
-import openai
-from openai import OpenAI
+import time
+from types import SimpleNamespace
+from typing import List, Optional, Dict, Any, AsyncIterator
+from openai import AsyncOpenAI
+
+from app.agents.tool_executor import tool_executor
+from app.config import settings
+from app.utils.metrics import LLM_REQUEST_SECONDS, LLM_TTFT_SECONDS, observe_llm_usage
+from app.utils.tracing import end_span, set_usage_attributes, tracer
+from .client_pool import openai_client_pool
+from .context import ContextBuilder
+
+def _add_usage(totals: Dict[str, int], usage: Any):
+    if usage is None:
+        return
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        totals[key] = totals.get(key, 0) + (getattr(usage, key, 0) or 0)
+
 
 class Agent:
     def __init__(
@@ -9,41 +24,179 @@ class Agent:
         api_key: str = None,
         system_prompt: str = "You are a helpful assistant.",
         tools: List[str] = None,
+        hosted_tools: Optional[Dict[str, Any]] = None,
+        client: Optional[AsyncOpenAI] = None,
+        max_tool_rounds: int = None,
+        max_output_tokens: int = None,
     ):
         self.model = model
         self.system_prompt = system_prompt
         self.tools = tools or []
-        self.client = OpenAI(api_key=api_key)
+        # Executable hosted tools bound to this agent's config (e.g. file_search)
+        self.hosted_tools = hosted_tools or {}
+        # Borrow a pooled client so connections survive across requests
+        self.client = client or openai_client_pool.get(api_key)
+        # Function tools the model may call (names without a schema are ignored)
+        self.chat_tools = tool_executor.chat_tools_for(self.tools, self.hosted_tools)
+        self.max_tool_rounds = settings.AGENT_MAX_TOOL_ROUNDS if max_tool_rounds is None else max_tool_rounds
+        # Prompt and tool token counts are taken once here; agents are cached per version
+        self.context = ContextBuilder(
+            model, system_prompt, self.chat_tools,
+            max_output_tokens or settings.AGENT_MAX_OUTPUT_TOKENS,
+        )
+
+    def _build_messages(self, input_text: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        # History is trimmed to what fits the model's window next to the reply
+        history, _ = self.context.fit_history(input_text, history)
+        return [
+            {"role": "system", "content": self.system_prompt},
+            *history,
+            {"role": "user", "content": input_text}
+        ]
 
-    def run(self, input_text: str) -> Dict[str, Any]:
+    def _tool_kwargs(self, round_no: int) -> Dict[str, Any]:
+        if not self.chat_tools:
+            return {}
+        # On the last round the model has to answer with what it has.
+        return {
+            "tools": self.chat_tools,
+            "tool_choice": "auto" if round_no < self.max_tool_rounds else "none",
+        }
+
+    async def run(self, input_text: str, history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """
-        Run the agent with the given input text.
+        Run the agent with the given input text, after any prior `history`
+        messages of a conversation.
+        Tool calls requested by the model are executed concurrently and fed
+        back until it produces a final answer.
         Returns a dictionary containing the response and any additional data.
         """
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
         try:
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": input_text}
-            ]
+            messages = self._build_messages(input_text, history)
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000,
-            )
+            for round_no in range(self.max_tool_rounds + 1):
+                started = time.perf_counter()
+                with tracer.start_as_current_span(
+                    "llm chat", attributes={"llm.model": self.model, "llm.round": round_no}
+                ) as span:
+                    try:
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            temperature=0.7,
+                            max_tokens=self.context.max_tokens(messages),
+                            **self._tool_kwargs(round_no),
+                        )
+                    except Exception:
+                        LLM_REQUEST_SECONDS.labels(self.model, "chat", "error").observe(time.perf_counter() - started)
+                        raise
+                    LLM_REQUEST_SECONDS.labels(self.model, "chat", "ok").observe(time.perf_counter() - started)
+                    observe_llm_usage(self.model, response.usage)
+                    set_usage_attributes(span, response.usage)
+                _add_usage(usage, response.usage)
+                message = response.choices[0].message
+                if not message.tool_calls:
+                    break
+                messages.append(message.model_dump(exclude_none=True))
+                messages.extend(await tool_executor.execute_all(message.tool_calls, self.hosted_tools))
 
             # Extract the assistant's message
-            assistant_message = response.choices[0].message.content
+            assistant_message = message.content
 
             return {
                 "final_output": assistant_message,
                 "raw_response": response.model_dump(),
+                "usage": usage,
                 "status": "success"
             }
         except Exception as e:
             return {
                 "final_output": f"Error: {str(e)}",
+                "usage": usage,
                 "status": "error",
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
+
+    async def stream(self, input_text: str, usage: Optional[Dict[str, int]] = None,
+                     history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        """
+        Run the agent and yield content deltas as the model produces them.
+        Tool-call rounds are executed between streamed turns.
+        Errors are raised to the caller so the transport can report them.
+        If `usage` is given, token counts for every round are added to it.
+        """
+        messages = self._build_messages(input_text, history)
+        requested_at = time.perf_counter()
+        first_token_at = None
+
+        for round_no in range(self.max_tool_rounds + 1):
+            started = time.perf_counter()
+            status, error = "error", None
+            # Not made current: the context may differ between iterations
+            span = tracer.start_span("llm chat_stream", attributes={"llm.model": self.model, "llm.round": round_no})
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=self.context.max_tokens(messages),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **self._tool_kwargs(round_no),
+                )
+            except Exception as exc:
+                end_span(span, exc)
+                raise
+            calls: Dict[int, Dict[str, str]] = {}
+            try:
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        observe_llm_usage(self.model, chunk.usage)
+                        set_usage_attributes(span, chunk.usage)
+                        if usage is not None:
+                            _add_usage(usage, chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                            LLM_TTFT_SECONDS.labels(self.model).observe(first_token_at - requested_at)
+                            span.add_event("first_token")
+                        yield delta.content
+                    # Tool calls arrive as fragments keyed by index
+                    for fragment in delta.tool_calls or []:
+                        call = calls.setdefault(fragment.index, {"id": "", "name": "", "arguments": ""})
+                        if fragment.id:
+                            call["id"] = fragment.id
+                        if fragment.function:
+                            call["name"] += fragment.function.name or ""
+                            call["arguments"] += fragment.function.arguments or ""
+                status = "ok"
+            except Exception as exc:
+                error = exc
+                raise
+            finally:
+                LLM_REQUEST_SECONDS.labels(self.model, "chat_stream", status).observe(time.perf_counter() - started)
+                end_span(span, error)
+                # Closing the response drops the upstream request, which stops
+                # generation when the downstream client has gone away.
+                await stream.close()
+
+            if not calls:
+                return
+
+            tool_calls = [
+                SimpleNamespace(id=c["id"], function=SimpleNamespace(name=c["name"], arguments=c["arguments"]))
+                for _, c in sorted(calls.items())
+            ]
+            messages.append({
+                "role": "assistant",
+                "tool_calls": [
+                    {"id": c.id, "type": "function",
+                     "function": {"name": c.function.name, "arguments": c.function.arguments}}
+                    for c in tool_calls
+                ],
+            })
+            messages.extend(await tool_executor.execute_all(tool_calls, self.hosted_tools))
@@ -0,0 +1,53 @@
+import logging
+from typing import Dict
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIClientPool:
+    """
+    Long-lived AsyncOpenAI clients keyed by API key.
+
+    Each client owns an httpx connection pool, so keep-alive connections (and
+    their TLS sessions) are reused across chat turns instead of being opened
+    and torn down per request.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, AsyncOpenAI] = {}
+
+    def _build_client(self, api_key: str) -> AsyncOpenAI:
+        http_client = httpx.AsyncClient(
+            http2=settings.OPENAI_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=settings.OPENAI_POOL_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=10.0),
+        )
+        return AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+    def get(self, api_key: str) -> AsyncOpenAI:
+        client = self._clients.get(api_key)
+        if client is None:
+            logger.debug("Creating pooled OpenAI client")
+            client = self._build_client(api_key)
+            self._clients[api_key] = client
+        return client
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.close()
+            except Exception as exc:
+                logger.warning(f"Error closing OpenAI client: {exc}")
+
+
+openai_client_pool = OpenAIClientPool()
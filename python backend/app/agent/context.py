@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Context window (tokens) per model family. Longest matching prefix wins.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o-mini": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4-turbo": 128_000,
+    "gpt-4-32k": 32_768,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o4-mini": 200_000,
+    "o3": 200_000,
+    "o1": 200_000,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# Chat format overhead per message and for priming the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_counts = TTLCache(maxsize=settings.TOKEN_COUNT_CACHE_SIZE, ttl=3600.0)
+
+
+class ContextOverflowError(ValueError):
+    """The system prompt, tools and input alone do not fit the model's window."""
+
+
+def context_window(model: str) -> int:
+    model = (model or "").lower()
+    match = max((name for name in MODEL_CONTEXT_WINDOWS if model.startswith(name)), key=len, default=None)
+    return MODEL_CONTEXT_WINDOWS[match] if match else DEFAULT_CONTEXT_WINDOW
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for `model` (loaded once per model), or None if unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed; token counts are estimated")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Unmapped model name; the fallback's BPE file may need a download too
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        # e.g. the BPE file cannot be downloaded on an offline host
+        logger.warning(f"No tokenizer for {model} ({exc}); token counts are estimated")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count of `text` for `model`. Repeated texts are served from a cache."""
+    if not text:
+        return 0
+    model = model or settings.TOKENIZER_DEFAULT_MODEL
+    key = (model, hashlib.sha1(text.encode("utf-8")).digest())
+    count = _counts.get(key)
+    if count is None:
+        encoding = _encoding(model)
+        # disallowed_special=() so user text containing e.g. "<|endoftext|>" is counted, not rejected
+        count = len(encoding.encode(text, disallowed_special=())) if encoding else len(text) // 4 + 1
+        _counts.set(key, count)
+    return count
+
+
+def count_message(message: Dict[str, Any], model: Optional[str] = None) -> int:
+    tokens = TOKENS_PER_MESSAGE
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_tokens(content, model)
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"], default=str), model)
+    return tokens
+
+
+def count_messages(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    return sum(count_message(m, model) for m in messages) + TOKENS_PER_REPLY
+
+
+class ContextBuilder:
+    """
+    Fits a request into the model's context window.
+
+    The system prompt and tool definitions are counted once per agent
+    version (the agent is cached per version, so this happens at build
+    time). Per request only the input and history are counted; history is
+    trimmed oldest-first — keeping a leading conversation summary as long as
+    possible — until system + tools + history + input leave room for the
+    reply. `max_tokens` is then the smaller of the configured output limit
+    and what is actually left in the window.
+    """
+
+    def __init__(self, model: str, system_prompt: str, chat_tools: List[dict], max_output_tokens: int):
+        self.model = model
+        self.window = context_window(model)
+        self.max_output_tokens = max_output_tokens
+        self.system_tokens = count_message({"role": "system", "content": system_prompt}, model)
+        self.tool_tokens = count_tokens(json.dumps(chat_tools), model) if chat_tools else 0
+        self.fixed_tokens = self.system_tokens + self.tool_tokens + TOKENS_PER_REPLY
+
+    def _reply_floor(self) -> int:
+        return min(self.max_output_tokens, settings.AGENT_MIN_OUTPUT_TOKENS)
+
+    def fit_history(self, input_text: str, history: Optional[List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Return (history that fits, prompt tokens used including it)."""
+        used = self.fixed_tokens + count_message({"role": "user", "content": input_text}, self.model)
+        if used + self._reply_floor() > self.window:
+            raise ContextOverflowError(
+                f"Input is too long for {self.model}: {used} prompt tokens, {self.window} token context window"
+            )
+        history = list(history or [])
+        if not history:
+            return history, used
+
+        budget = self.window - used - self.max_output_tokens
+        summary = history[0] if history[0].get("role") == "system" else None
+        turns = history[1:] if summary else history
+        costs = [count_message(m, self.model) for m in turns]
+        summary_cost = count_message(summary, self.model) if summary else 0
+
+        # Newest turns first, always dropping whole user/assistant pairs from the front
+        kept = len(turns)
+        total = summary_cost + sum(costs)
+        while kept and total > budget:
+            drop = 2 if kept >= 2 and turns[len(turns) - kept].get("role") == "user" else 1
+            for _ in range(drop):
+                total -= costs[len(turns) - kept]
+                kept -= 1
+        if summary and total > budget:
+            summary, total = None, total - summary_cost
+        trimmed = len(turns) - kept
+        if trimmed:
+            logger.debug(f"Trimmed {trimmed} history messages to fit {self.model}'s context window")
+        fitted = ([summary] if summary else []) + turns[len(turns) - kept:]
+        return fitted, used + total
+
+    def max_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        """Output budget for `messages` (system prompt first), re-checked every tool round."""
+        prompt = self.fixed_tokens + sum(count_message(m, self.model) for m in messages[1:])
+        remaining = self.window - prompt
+        if remaining < self._reply_floor():
+            raise ContextOverflowError(
+                f"Conversation no longer fits {self.model}'s {self.window} token context window"
+            )
+        return min(self.max_output_tokens, remaining)
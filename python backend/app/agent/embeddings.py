@@ -0,0 +1,31 @@
+import time
+from typing import List
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.utils.metrics import LLM_REQUEST_SECONDS, observe_llm_usage
+from app.utils.tracing import set_usage_attributes, tracer
+
+
+async def embed_texts(client: AsyncOpenAI, texts: List[str], model: str = None) -> np.ndarray:
+    """
+    Embed `texts` and return a float32 matrix of L2-normalised rows, so
+    cosine similarity is a plain dot product.
+    """
+    model = model or settings.EMBEDDING_MODEL
+    started = time.perf_counter()
+    with tracer.start_as_current_span("llm embedding", attributes={"llm.model": model, "llm.inputs": len(texts)}) as span:
+        try:
+            response = await client.embeddings.create(model=model, input=texts)
+        except Exception:
+            LLM_REQUEST_SECONDS.labels(model, "embedding", "error").observe(time.perf_counter() - started)
+            raise
+        LLM_REQUEST_SECONDS.labels(model, "embedding", "ok").observe(time.perf_counter() - started)
+        observe_llm_usage(model, response.usage)
+        set_usage_attributes(span, response.usage)
+    vectors = np.asarray([item.embedding for item in response.data], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
@@ -1,20 +1,38 @@
-from typing import Any, Union, Dict
+from typing import Any, Union, Dict, AsyncIterator, Optional, List
 from .base import Agent
 
 class Runner:
     @staticmethod
-    def run(agent: Agent, input: str) -> Union[str, Dict[str, Any]]:
+    async def run(agent: Agent, input: str, history: Optional[List[Dict[str, str]]] = None) -> Union[str, Dict[str, Any]]:
         """
         Run the agent with the given input.
         
         Args:
             agent: The agent instance to run
             input: The user input to process
+            history: Optional prior conversation messages
             
         Returns:
             Either a string response or a dictionary containing the response
         """
         try:
-            return agent.process(input)
+            return await agent.run(input, history=history)
         except Exception as e:
-            raise RuntimeError(f"Error running agent: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"Error running agent: {str(e)}")
+
+    @staticmethod
+    def run_streamed(agent: Agent, input: str, usage: Optional[Dict[str, int]] = None,
+                     history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        """
+        Run the agent with the given input, yielding output chunks.
+
+        Args:
+            agent: The agent instance to run
+            input: The user input to process
+            usage: Optional dict that receives token counts as the run proceeds
+            history: Optional prior conversation messages
+
+        Returns:
+            An async iterator over the text deltas produced by the model
+        """
+        return agent.stream(input, usage=usage, history=history)
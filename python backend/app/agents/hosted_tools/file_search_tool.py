@@ -3,7 +3,7 @@ from typing import List, Optional
 
 @dataclass
 class FileSearchTool:
-    """A hosted tool that lets the LLM search through a vector store. Currently only supported with OpenAI models, using the Responses API."""
+    """A hosted tool that lets the LLM search through a vector store. Backed by the local vector stores in `app.vector`."""
 
     vector_store_ids: List[str]
     """The IDs of the vector stores to search."""
@@ -24,12 +24,35 @@ class FileSearchTool:
     def name(self):
         return "file_search"
 
-    def execute(self, query: str) -> dict:
+    @property
+    def schema(self) -> dict:
+        """Function schema the model calls this tool through (see ToolExecutor)."""
+        return {
+            "name": self.name,
+            "description": "Search the agent's knowledge base and return the most relevant passages.",
+            "parameters": {
+                "type": "object",
+                "properties": {"query": {"type": "string", "description": "What to look for"}},
+                "required": ["query"],
+            },
+        }
+
+    async def execute(self, query: str) -> dict:
         """Execute a search query against the vector stores."""
-        # Placeholder implementation (replace with actual vector store logic)
+        # Imported lazily: the service pulls in Mongo and the OpenAI pool
+        from app.services.vector_store_service import vector_store_service
+
+        search = await vector_store_service.search(
+            self.vector_store_ids,
+            query,
+            max_num_results=self.max_num_results,
+            ranking_options=self.ranking_options,
+            filters=self.filters,
+        )
         return {
             "tool": "file_search",
             "query": query,
             "vector_store_ids": self.vector_store_ids,
-            "results": f"Mock search results for {query}"
-        }
\ No newline at end of file
+            "results": search["results"],
+            "took_ms": search["took_ms"],
+        }
@@ -2,7 +2,7 @@
 
 import inspect
 from agents import Agent    # your actual Agent class
-from app.database.mongo import agents_collection
+from app.database.async_mongo import agents_collection
 
 
 class Runner:
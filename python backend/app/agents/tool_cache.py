@@ -0,0 +1,105 @@
+# app/agents/tool_cache.py
+
+import hashlib
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
+
+from pymongo.errors import PyMongoError
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISS = object()
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and ("error" in result or result.get("status") == "error")
+
+
+class ToolResultCache:
+    """
+    Memoizes deterministic function tools by name + canonicalized arguments.
+
+    Tier 1 is an in-process LRU; tier 2 (optional) is the `tool_cache`
+    collection, shared by all workers and expired by a TTL index. Only tools
+    with an entry in `ttls` are cached, and error results never are.
+    """
+
+    def __init__(self, ttls: Dict[str, float], maxsize: int, collection=None):
+        self.ttls = ttls
+        self.collection = collection
+        self._memory = TTLCache(maxsize=maxsize, ttl=max(ttls.values(), default=300))
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.mongo_hits = 0
+
+    @staticmethod
+    def make_key(name: str, kwargs: Dict[str, Any]) -> str:
+        canonical = json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{name}:{canonical}".encode()).hexdigest()
+
+    def is_cacheable(self, name: str) -> bool:
+        return name in self.ttls
+
+    async def get(self, name: str, kwargs: Dict[str, Any]) -> Tuple[bool, Any]:
+        key = self.make_key(name, kwargs)
+        value = self._memory.get(key, _MISS)
+        if value is not _MISS:
+            self.hits[name] += 1
+            return True, value
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except PyMongoError as exc:
+                logger.warning(f"Tool cache lookup failed: {exc}")
+                doc = None
+            if doc:
+                value = json.loads(doc["result"])
+                remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                self._memory.set(key, value, ttl=max(remaining, 1))
+                self.hits[name] += 1
+                self.mongo_hits += 1
+                return True, value
+
+        self.misses[name] += 1
+        return False, None
+
+    async def set(self, name: str, kwargs: Dict[str, Any], result: Any):
+        if _is_error(result):
+            return
+        ttl = self.ttls[name]
+        key = self.make_key(name, kwargs)
+        self._memory.set(key, result, ttl=ttl)
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one(
+                    {"_id": key},
+                    {
+                        "tool": name,
+                        "result": json.dumps(result, default=str),
+                        "expires_at": datetime.utcnow() + timedelta(seconds=ttl),
+                    },
+                    upsert=True,
+                )
+            except PyMongoError as exc:
+                logger.warning(f"Tool cache write failed: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "mongo_hits": self.mongo_hits,
+            "memory": self._memory.stats(),
+            "tools": {
+                name: {"ttl": ttl, "hits": self.hits[name], "misses": self.misses[name]}
+                for name, ttl in self.ttls.items()
+            },
+        }
+
@@ -0,0 +1,145 @@
+# app/agents/tool_executor.py
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from opentelemetry import trace
+
+from app.agents.tool_cache import ToolResultCache
+from app.agents.tool_schemas_definitions import TOOL_SCHEMAS
+from app.agents.tools import AVAILABLE_FUNCTIONS, TOOL_CACHE_TTLS
+from app.config import settings
+from app.database.async_mongo import mongo_db
+from app.utils.metrics import TOOL_SECONDS
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+def to_chat_tool(schema: dict) -> dict:
+    """Convert a flat (Responses API) tool schema into the Chat Completions shape."""
+    return {
+        "type": "function",
+        "function": {
+            "name": schema["name"],
+            "description": schema.get("description", ""),
+            "parameters": schema.get("parameters", {"type": "object", "properties": {}}),
+        },
+    }
+
+
+class ToolExecutor:
+    """
+    Dispatches the function tool calls returned by the model. All calls from
+    one assistant turn run concurrently (bounded by `max_concurrency`), each
+    with its own timeout, and results come back in call order.
+
+    Besides the shared function tools, an agent may carry executable hosted
+    tools (e.g. FileSearchTool bound to its vector stores); those are passed
+    per call as `hosted` ({name: tool with `schema` and `execute`}).
+    """
+
+    def __init__(
+        self,
+        functions: Dict[str, Callable[..., Any]],
+        schemas: Dict[str, dict],
+        max_concurrency: int,
+        timeout: float,
+        cache: Optional[ToolResultCache] = None,
+    ):
+        self.functions = functions
+        self.schemas = schemas
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache = cache
+
+    def chat_tools_for(self, names: List[str], hosted: Optional[Dict[str, Any]] = None) -> List[dict]:
+        """Chat Completions tool definitions for the agent's tools that we can execute."""
+        return [
+            to_chat_tool(self.schemas[name])
+            for name in dict.fromkeys(names or [])
+            if name in self.functions and name in self.schemas
+        ] + [to_chat_tool(tool.schema) for tool in (hosted or {}).values()]
+
+    def _resolve(self, name: str, hosted: Optional[Dict[str, Any]]) -> Optional[Callable[..., Any]]:
+        if hosted and name in hosted:
+            return hosted[name].execute
+        return self.functions.get(name)
+
+    async def invoke(self, name: str, kwargs: Dict[str, Any], hosted: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a function tool, consulting the result cache first. Raises on failure."""
+        func = self._resolve(name, hosted)
+        if func is None:
+            raise ValueError(f"Unknown tool: {name}")
+        with tracer.start_as_current_span(f"tool {name}", attributes={"tool.name": name}):
+            return await self._invoke(name, func, kwargs)
+
+    async def _invoke(self, name: str, func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        cacheable = self.cache is not None and self.cache.is_cacheable(name)
+        if cacheable:
+            hit, value = await self.cache.get(name, kwargs)
+            if hit:
+                trace.get_current_span().set_attribute("tool.cache_hit", True)
+                TOOL_SECONDS.labels(name, "cached").observe(time.perf_counter() - started)
+                return value
+
+        status = "error"
+        try:
+            result = await asyncio.wait_for(func(**kwargs), timeout=self.timeout)
+            status = "ok"
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            TOOL_SECONDS.labels(name, status).observe(time.perf_counter() - started)
+        if cacheable:
+            await self.cache.set(name, kwargs, result)
+        return result
+
+    async def _call(self, name: str, arguments: str, hosted: Optional[Dict[str, Any]] = None) -> Any:
+        if self._resolve(name, hosted) is None:
+            return {"error": f"Unknown tool: {name}"}
+        try:
+            kwargs = json.loads(arguments or "{}")
+        except json.JSONDecodeError as exc:
+            return {"error": f"Invalid JSON arguments: {exc}"}
+        try:
+            return await self.invoke(name, kwargs, hosted)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool '{name}' timed out after {self.timeout}s")
+            return {"error": f"Tool '{name}' timed out"}
+        except Exception as exc:
+            logger.error(f"Tool '{name}' failed: {exc}", exc_info=True)
+            return {"error": f"Tool '{name}' failed: {exc}"}
+
+    async def execute_all(self, tool_calls: List[Any], hosted: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """Run one turn's tool calls and return the `tool` messages to send back."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(call) -> Dict[str, str]:
+            async with semaphore:
+                result = await self._call(call.function.name, call.function.arguments, hosted)
+            return {
+                "role": "tool",
+                "tool_call_id": call.id,
+                "content": result if isinstance(result, str) else json.dumps(result, default=str),
+            }
+
+        return list(await asyncio.gather(*(run(call) for call in tool_calls)))
+
+
+tool_executor = ToolExecutor(
+    functions=AVAILABLE_FUNCTIONS,
+    schemas=TOOL_SCHEMAS,
+    max_concurrency=settings.TOOL_MAX_CONCURRENCY,
+    timeout=settings.TOOL_TIMEOUT_SECONDS,
+    cache=ToolResultCache(
+        ttls=TOOL_CACHE_TTLS,
+        maxsize=settings.TOOL_CACHE_MAX_SIZE,
+        collection=mongo_db["tool_cache"] if settings.TOOL_CACHE_MONGO else None,
+    ),
+)
@@ -7,15 +7,30 @@ assess_competition_schema = {
     "parameters": {
         "type": "object",
         "properties": {
-            "competitor_names": {
-                "type": "array",
-                "items": {
-                    "type": "string"
+            "query": {
+                "type": "object",
+                "properties": {
+                    "competitors": {
+                        "type": "array",
+                        "items": {
+                            "type": "string"
+                        },
+                        "description": "List of competitor names or domains to analyze."
+                    },
+                    "options": {
+                        "type": "object",
+                        "properties": {
+                            "num_insights": {"type": "integer"},
+                            "include_funding": {"type": "boolean"},
+                            "include_traffic": {"type": "boolean"}
+                        },
+                        "description": "Optional analysis settings."
+                    }
                 },
-                "description": "List of competitor names or domains to analyze."
+                "required": ["competitors"]
             }
         },
-        "required": ["competitor_names"],
+        "required": ["query"],
         "additionalProperties": False
     }
 }
@@ -56,12 +71,12 @@ estimate_revenue_schema = {
                 "type": "number",
                 "description": "Expected percentage of market share to capture (0-100)."
             },
-            "average_price": {
+            "price_per_unit": {
                 "type": "number",
                 "description": "Average price per unit or service sold."
             }
         },
-        "required": ["market_size", "market_share", "average_price"],
+        "required": ["market_size", "market_share", "price_per_unit"],
         "additionalProperties": False
     }
 }
@@ -128,3 +143,64 @@ search_industry_trends_schema = {
         "additionalProperties": False
     }
 }
+
+calculate_break_even_point_schema = {
+    "type": "function",
+    "name": "calculate_break_even_point",
+    "description": "Calculates the break-even units and revenue from fixed costs, variable cost per unit and selling price.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "fixed_costs": {
+                "type": "number",
+                "description": "Total fixed costs for the period."
+            },
+            "variable_cost_per_unit": {
+                "type": "number",
+                "description": "Variable cost to produce one unit."
+            },
+            "selling_price_per_unit": {
+                "type": "number",
+                "description": "Selling price of one unit."
+            }
+        },
+        "required": ["fixed_costs", "variable_cost_per_unit", "selling_price_per_unit"],
+        "additionalProperties": False
+    }
+}
+
+analyze_competitor_schema = {
+    "type": "function",
+    "name": "analyze_competitor",
+    "description": "Produces a short analysis of a single competitor.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "competitor": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "Competitor name."},
+                    "website": {"type": "string", "description": "Competitor website, if known."}
+                },
+                "required": ["name"]
+            }
+        },
+        "required": ["competitor"],
+        "additionalProperties": False
+    }
+}
+
+# Lookup by function name (keys match AVAILABLE_FUNCTIONS in tools.py)
+TOOL_SCHEMAS = {
+    schema["name"]: schema
+    for schema in (
+        assess_competition_schema,
+        estimate_market_size_schema,
+        estimate_revenue_schema,
+        check_trademark_availability_schema,
+        validate_idea_feasibility_schema,
+        search_industry_trends_schema,
+        calculate_break_even_point_schema,
+        analyze_competitor_schema,
+    )
+}
@@ -113,6 +113,16 @@ AVAILABLE_FUNCTIONS = {
     "search_industry_trends": search_industry_trends,
 }
 
+# ⏱️ Result cache TTLs (seconds) for tools that are pure functions of their
+# arguments. Tools not listed here are never cached.
+TOOL_CACHE_TTLS = {
+    "calculate_break_even_point": 86400,
+    "estimate_market_size": 3600,
+    "estimate_revenue": 3600,
+    "check_trademark_availability": 600,
+    "validate_idea_feasibility": 3600,
+}
+
 # 🔧 Hosted tool registry
 HOSTED_TOOL_REGISTRY = {
     "file_search": FileSearchTool,
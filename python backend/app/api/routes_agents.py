@@ -1,45 +1,61 @@
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Request, Response, Depends
 from app.schemas.agent import AgentCreate, AgentUpdate, AgentOut
-from app.database.mongo import agents_collection
+from app.database.async_mongo import agents_collection
 from bson import ObjectId, errors as bson_errors
 from typing import List
 from datetime import datetime
 
 from app.services.agent_runner import AgentRunner
+from app.services.agent_cache import agent_cache
+from app.services.agent_search import agent_search
+from app.services.job_handlers import AGENT_RUN
+from app.services.job_queue import job_queue
+from app.services.response_cache import response_cache
+from app.utils.streaming import agent_stream_response, STREAM_FORMATS
+from app.utils.pagination import PageParams, paginate
+from app.api.routes_jobs import job_accepted
 
 router = APIRouter()
 agent_runner = AgentRunner()
 
 
+AGENT_LIST_PROJECTION = {
+    "_id": 1,
+    "name": 1,
+    "description": 1,
+    "instructions": 1,
+    "version": 1,
+    "status": 1,
+    "type": 1,
+    "handoffs": 1,
+    "flow_ids": 1,
+    "tools": 1,
+    "guardrails": 1,
+    "created_at": 1
+}
+
+
+def _agent_out(agent: dict) -> dict:
+    agent["id"] = str(agent["_id"])
+    del agent["_id"]
+    agent.setdefault("handoffs", [])
+    agent.setdefault("flow_ids", [])
+    agent.setdefault("tools", [])
+    agent.setdefault("guardrails", [])
+    return agent
+
+
 @router.get("/", response_model=List[AgentOut])
-def get_all_agents():
-    agents = list(agents_collection.find({}, {
-        "_id": 1,
-        "name": 1,
-        "description": 1,
-        "instructions": 1,
-        "version": 1,
-        "status": 1,
-        "type": 1,
-        "handoffs": 1,
-        "flow_ids": 1,
-        "tools": 1,
-        "guardrails": 1,
-        "created_at": 1
-    }))
-    for agent in agents:
-        agent["id"] = str(agent["_id"])
-        del agent["_id"]
-        agent.setdefault("handoffs", [])
-        agent.setdefault("flow_ids", [])
-        agent.setdefault("tools", [])
-        agent.setdefault("guardrails", [])
-    return agents
+async def get_all_agents(request: Request, response: Response, page: PageParams = Depends()):
+    return await paginate(
+        agents_collection, request, response, page,
+        projection=AGENT_LIST_PROJECTION, transform=_agent_out, model=AgentOut,
+    )
 
 
 @router.post("/", response_model=AgentOut)
-def create_agent(agent_data: AgentCreate):
-    if agents_collection.find_one({"name": agent_data.name}):
+async def create_agent(agent_data: AgentCreate):
+    if await agents_collection.find_one({"name": agent_data.name}):
         raise HTTPException(status_code=400, detail="Agent with this name already exists")
 
     now = datetime.utcnow()
@@ -52,8 +68,9 @@ def create_agent(agent_data: AgentCreate):
         "created_at": now,
     }
 
-    result = agents_collection.insert_one(record)
+    result = await agents_collection.insert_one(record)
     inserted_id = str(result.inserted_id)
+    agent_search.upsert(record)
 
     return {
         "id": inserted_id,
@@ -72,23 +89,26 @@ def create_agent(agent_data: AgentCreate):
 
 
 @router.put("/{agent_id}", response_model=AgentOut)
-def update_agent(agent_id: str, agent_data: AgentUpdate):
+async def update_agent(agent_id: str, agent_data: AgentUpdate):
     try:
         object_id = ObjectId(agent_id)
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid agent ID")
 
-    existing = agents_collection.find_one({"_id": object_id})
+    existing = await agents_collection.find_one({"_id": object_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Agent not found")
 
     update_doc = agent_data.dict(exclude_unset=True)
-    agents_collection.update_one(
+    await agents_collection.update_one(
         {"_id": object_id},
         {"$set": update_doc}
     )
+    agent_cache.invalidate(agent_id)
+    response_cache.invalidate(agent_id)
 
-    updated = agents_collection.find_one({"_id": object_id})
+    updated = await agents_collection.find_one({"_id": object_id})
+    agent_search.upsert(updated)
     updated.setdefault("handoffs", [])
     updated.setdefault("flow_ids", [])
     updated.setdefault("tools", [])
@@ -111,47 +131,83 @@ def update_agent(agent_id: str, agent_data: AgentUpdate):
 
 
 @router.delete("/{agent_id}")
-def delete_agent(agent_id: str):
+async def delete_agent(agent_id: str):
     try:
         object_id = ObjectId(agent_id)
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid agent ID")
 
-    result = agents_collection.delete_one({"_id": object_id})
+    result = await agents_collection.delete_one({"_id": object_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Agent not found")
+    agent_cache.invalidate(agent_id)
+    response_cache.invalidate(agent_id)
+    agent_search.remove(agent_id)
 
     return {"message": "Agent deleted successfully"}
 
 
 @router.get("/search", response_model=List[dict])
-def search_agents(q: str = Query(..., description="Search query text")):
-    agents_collection.create_index([("name", "text"), ("instructions", "text")])
-
-    results = agents_collection.find(
-        {"$text": {"$search": q}},
-        {
-            "name": 1,
-            "instructions": 1,
-            "type": 1,
-            "tools": 1,
-            "guardrails": 1,
-            "_id": 0
-        }
-    ).limit(5)
-
-    return list(results)
+async def search_agents(
+    q: str = Query(..., description="Search query text"),
+    limit: int = Query(5, ge=1, le=50),
+    semantic: bool = Query(False, description="Blend embedding similarity into the BM25 ranking"),
+):
+    return await agent_search.search(q, limit=limit, semantic=semantic)
 
 
 @router.post("/{agent_id}/run")
-async def run_agent(agent_id: str, payload: dict = Body(...)):
+async def run_agent(
+    agent_id: str,
+    request: Request,
+    payload: dict = Body(...),
+    run_async: bool = Query(False, alias="async", description="Queue the run and return a job id (202)"),
+):
     """
     Executes an agent with the given ID using the provided user input.
     Expected body: { "input": "your message here" }
+    With `?async=true` the run is handed to the background job queue;
+    poll /api/admin/jobs/{job_id} or follow its /events stream.
     """
     user_input = payload.get("input")
     if not user_input:
         raise HTTPException(status_code=400, detail="Missing input text")
 
-    output = await agent_runner.run_agent(agent_id, user_input)
-    return {"output": output}
+    caller = getattr(request.state, "caller", None)
+    if run_async:
+        if not ObjectId.is_valid(agent_id):
+            raise HTTPException(status_code=400, detail="Invalid agent ID")
+        if not await agents_collection.count_documents({"_id": ObjectId(agent_id)}, limit=1):
+            raise HTTPException(status_code=404, detail="Agent not found")
+        job = await job_queue.enqueue(
+            AGENT_RUN, {"agent_id": agent_id, "input": user_input, "source": "admin_job"},
+            created_by=getattr(caller, "identity", None),
+        )
+        return job_accepted(job)
+
+    result = await agent_runner.execute(agent_id, user_input, source="admin", caller=caller)
+    return {"output": result["output"], "metadata": result["metadata"]}
+
+
+@router.post("/{agent_id}/run/stream")
+async def stream_agent(
+    agent_id: str,
+    request: Request,
+    payload: dict = Body(...),
+    format: str = Query("sse", description="Stream format: sse | ndjson"),
+):
+    """
+    Streams the output of an agent as it is generated.
+    Expected body: { "input": "your message here" }
+    Use `format=sse` (default) or `format=ndjson`.
+    """
+    user_input = payload.get("input")
+    if not user_input:
+        raise HTTPException(status_code=400, detail="Missing input text")
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}")
+
+    chunks = await agent_runner.stream_agent(
+        agent_id, user_input, source="admin_stream", caller=getattr(request.state, "caller", None)
+    )
+    return agent_stream_response(request, chunks, format)
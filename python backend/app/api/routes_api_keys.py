@@ -1,21 +1,24 @@
 # app/api/routes_api_keys.py
 
 from bson import ObjectId, errors as bson_errors
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Request, Response, Depends
 from typing import List
 
-from app.database.mongo import api_keys_collection
+from app.database.async_mongo import api_keys_collection
 from app.schemas.api_key import ApiKeyCreate, ApiKeyOut, ApiKeyBase
+from app.services.agent_cache import agent_cache
+from app.utils.pagination import PageParams, paginate
+from pymongo import DESCENDING
 
 router = APIRouter(prefix="/admin/api-keys", tags=["API Keys"])
 
-def obj_or_404(id: str):
+async def obj_or_404(id: str):
     try:
         obj_id = ObjectId(id)
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid ID format")
 
-    doc = api_keys_collection.find_one({"_id": obj_id})
+    doc = await api_keys_collection.find_one({"_id": obj_id})
     if not doc:
         raise HTTPException(status_code=404, detail="API Key not found")
 
@@ -23,44 +26,42 @@ def obj_or_404(id: str):
     return doc
 
 @router.post("/", response_model=ApiKeyOut, status_code=status.HTTP_201_CREATED)
-def create_api_key(payload: ApiKeyCreate):
-    if api_keys_collection.find_one({"name": payload.name}):
+async def create_api_key(payload: ApiKeyCreate):
+    if await api_keys_collection.find_one({"name": payload.name}):
         raise HTTPException(status_code=400, detail="API Key with this name exists")
     # Validate type field
     if payload.type not in ["openai", "other"]:  # Add other valid types as needed
         raise HTTPException(status_code=400, detail="Invalid API key type")
-    inserted = api_keys_collection.insert_one(payload.dict())
-    return obj_or_404(str(inserted.inserted_id))
+    inserted = await api_keys_collection.insert_one(payload.dict())
+    return await obj_or_404(str(inserted.inserted_id))
 
 @router.get("/", response_model=List[ApiKeyOut])
-def list_api_keys():
-    docs = list(api_keys_collection.find().sort("_id", -1))
-    for d in docs:
-        d["id"] = str(d.pop("_id"))
-    print("API Keys:", docs)  # Debug log
-    return docs
+async def list_api_keys(request: Request, response: Response, page: PageParams = Depends()):
+    return await paginate(api_keys_collection, request, response, page, direction=DESCENDING, model=ApiKeyOut)
 
 @router.get("/{api_key_id}", response_model=ApiKeyOut)
-def get_api_key(api_key_id: str):
-    return obj_or_404(api_key_id)
+async def get_api_key(api_key_id: str):
+    return await obj_or_404(api_key_id)
 
 @router.put("/{api_key_id}", response_model=ApiKeyOut)
-def update_api_key(api_key_id: str, payload: ApiKeyBase):
+async def update_api_key(api_key_id: str, payload: ApiKeyBase):
     update_doc = {k: v for k, v in payload.dict(exclude_none=True).items()}
     if not update_doc:
         raise HTTPException(status_code=400, detail="No fields to update")
     # Validate type field if provided
     if "type" in update_doc and update_doc["type"] not in ["openai", "other"]:
         raise HTTPException(status_code=400, detail="Invalid API key type")
-    api_keys_collection.update_one({"_id": ObjectId(api_key_id)}, {"$set": update_doc})
-    return obj_or_404(api_key_id)
+    await api_keys_collection.update_one({"_id": ObjectId(api_key_id)}, {"$set": update_doc})
+    agent_cache.invalidate_api_key(api_key_id)
+    return await obj_or_404(api_key_id)
 
 @router.patch("/{api_key_id}", response_model=ApiKeyOut)
-def patch_api_key(api_key_id: str, payload: ApiKeyBase):
-    return update_api_key(api_key_id, payload)
+async def patch_api_key(api_key_id: str, payload: ApiKeyBase):
+    return await update_api_key(api_key_id, payload)
 
 @router.delete("/{api_key_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_api_key(api_key_id: str):
-    result = api_keys_collection.delete_one({"_id": ObjectId(api_key_id)})
+async def delete_api_key(api_key_id: str):
+    result = await api_keys_collection.delete_one({"_id": ObjectId(api_key_id)})
     if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="API Key not found")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="API Key not found")
+    agent_cache.invalidate_api_key(api_key_id)
@@ -17,12 +17,12 @@ router = APIRouter(prefix="/admin", tags=["auth"])
 # Admin Login Endpoint
 # ─────────────────────────────────────────────────────────────
 @router.post("/login", response_model=AdminLoginResponse)
-def admin_login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def admin_login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Authenticate admin and return a JWT access token.
     """
     logger.debug(f"Login attempt with username: '{form_data.username}'")
-    admin_user = authenticate_admin(form_data.username, form_data.password)
+    admin_user = await authenticate_admin(form_data.username, form_data.password)
     if not admin_user:
         logger.debug("Authentication failed")
         raise HTTPException(
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Request, Response, Depends, File, Form, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.database.async_mongo import batch_jobs_collection
+from app.schemas.batch import BatchOut
+from app.services.batch_runner import batch_runner, parse_jsonl
+from app.utils.pagination import PageParams, paginate
+from pymongo import DESCENDING
+
+router = APIRouter(tags=["Batches"])
+
+
+def _to_out(doc: dict) -> dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+@router.post("/api/admin/agents/{agent_id}/batches", response_model=BatchOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_batch(
+    agent_id: str,
+    request: Request,
+    file: UploadFile = File(..., description="JSONL: one {\"input\", \"custom_id\"} object or string per line"),
+    max_attempts: Optional[int] = Form(None, ge=1, le=10),
+):
+    """Queue one agent run per input line; results are collected under /api/admin/batches/{id}/results."""
+    inputs = parse_jsonl((await file.read()).splitlines())
+    caller = getattr(request.state, "caller", None)
+    job = await batch_runner.create(
+        agent_id, inputs, max_attempts=max_attempts, created_by=getattr(caller, "identity", None)
+    )
+    return _to_out(job)
+
+
+@router.get("/api/admin/batches", response_model=List[BatchOut])
+async def list_batches(
+    request: Request,
+    response: Response,
+    agent_id: Optional[str] = None,
+    status: Optional[str] = None,
+    page: PageParams = Depends(),
+):
+    query = {}
+    if agent_id:
+        query["agent_id"] = agent_id
+    if status:
+        query["status"] = status
+    return await paginate(batch_jobs_collection, request, response, page, query=query, direction=DESCENDING, model=BatchOut)
+
+
+@router.get("/api/admin/batches/{batch_id}", response_model=BatchOut)
+async def get_batch(batch_id: str):
+    return _to_out(await batch_runner.get_doc(batch_id))
+
+
+@router.get("/api/admin/batches/{batch_id}/results")
+async def get_batch_results(
+    batch_id: str,
+    follow: bool = Query(False, description="Keep the stream open until the batch finishes"),
+):
+    """Finished items as JSONL in completion order (`seq`); each line carries `i` and `custom_id`."""
+    await batch_runner.get_doc(batch_id)  # 400/404 before the stream starts
+    return StreamingResponse(batch_runner.results(batch_id, follow=follow), media_type="application/x-ndjson")
+
+
+@router.post("/api/admin/batches/{batch_id}/cancel", response_model=BatchOut)
+async def cancel_batch(batch_id: str):
+    return _to_out(await batch_runner.cancel(batch_id))
+
+
+@router.post("/api/admin/batches/{batch_id}/resume", response_model=BatchOut)
+async def resume_batch(batch_id: str, retry_failed: bool = False):
+    """Continue a cancelled, failed or interrupted batch; `retry_failed` also reruns failed items."""
+    return _to_out(await batch_runner.resume(batch_id, retry_failed=retry_failed))
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query, Request
 from app.services.agent_runner import AgentRunner
-from app.database.mongo import agents_collection
+from app.utils.streaming import agent_stream_response, STREAM_FORMATS
+from app.database.async_mongo import agents_collection
 from bson import ObjectId
 
 router = APIRouter()
@@ -9,12 +10,12 @@ agent_runner = AgentRunner()
 @router.get("/agents")
 async def list_available_agents():
     """List all active agents available for chat."""
-    agents = list(agents_collection.find({"status": "active"}, {
+    agents = await agents_collection.find({"status": "active"}, {
         "_id": 1,
         "name": 1,
         "description": 1,
         "type": 1,
-    }))
+    }).to_list(length=None)
     
     for agent in agents:
         agent["id"] = str(agent["_id"])
@@ -23,7 +24,7 @@ async def list_available_agents():
     return agents
 
 @router.post("/agents/{agent_id}/run")
-async def run_agent(agent_id: str, payload: dict = Body(...)):
+async def run_agent(agent_id: str, request: Request, payload: dict = Body(...)):
     """
     Run an agent with the given input.
     Expected body: { "input": "your message here" }
@@ -32,5 +33,32 @@ async def run_agent(agent_id: str, payload: dict = Body(...)):
     if not user_input:
         raise HTTPException(status_code=400, detail="Missing input text")
 
-    output = await agent_runner.run_agent(agent_id, user_input)
-    return {"output": output} 
\ No newline at end of file
+    result = await agent_runner.execute(
+        agent_id, user_input, source="chat", caller=getattr(request.state, "caller", None)
+    )
+    return {"output": result["output"], "metadata": result["metadata"]}
+
+
+@router.post("/agents/{agent_id}/run/stream")
+async def stream_agent(
+    agent_id: str,
+    request: Request,
+    payload: dict = Body(...),
+    format: str = Query("sse", description="Stream format: sse | ndjson"),
+):
+    """
+    Stream an agent's reply token by token.
+    Expected body: { "input": "your message here" }
+    Query `format=sse` (default) for Server-Sent Events or `format=ndjson`
+    for newline-delimited JSON.
+    """
+    user_input = payload.get("input")
+    if not user_input:
+        raise HTTPException(status_code=400, detail="Missing input text")
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}")
+
+    chunks = await agent_runner.stream_agent(
+        agent_id, user_input, source="chat_stream", caller=getattr(request.state, "caller", None)
+    )
+    return agent_stream_response(request, chunks, format)
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, HTTPException, Request, Response, Depends, Query, status
+from bson import ObjectId
+from typing import List, Optional
+from app.database.async_mongo import agents_collection, conversations_collection, conversation_turns_collection
+from app.schemas.conversation import ConversationCreate, ConversationOut, ConversationTurnOut, ConversationInput
+from app.services.agent_runner import AgentRunner
+from app.services.conversation_store import conversation_store
+from app.services.rate_limiter import rate_limiter
+from app.utils.pagination import PageParams, paginate
+from pymongo import DESCENDING
+from app.utils.streaming import agent_stream_response, STREAM_FORMATS
+
+router = APIRouter(prefix="/api/conversations", tags=["Conversations"])
+agent_runner = AgentRunner()
+
+
+async def _caller(request: Request):
+    """
+    The rate limiter's CallerPlan, resolved here when the middleware is
+    disabled. Conversations are owned by that identity, so anonymous
+    callers (identified only by client IP, which many clients share behind
+    a proxy or NAT) are turned away.
+    """
+    caller = getattr(request.state, "caller", None)
+    if caller is None:
+        caller = request.state.caller = await rate_limiter.resolve_caller(request)
+    if not conversation_store.is_owner_identity(caller.identity):
+        raise HTTPException(status_code=401, detail="Conversations require a bearer token or an API key")
+    return caller
+
+
+def _to_out(doc: dict) -> dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+@router.post("", response_model=ConversationOut, status_code=status.HTTP_201_CREATED)
+async def create_conversation(payload: ConversationCreate, request: Request):
+    if not ObjectId.is_valid(payload.agent_id):
+        raise HTTPException(status_code=400, detail="Invalid agent ID")
+    if not await agents_collection.count_documents({"_id": ObjectId(payload.agent_id)}, limit=1):
+        raise HTTPException(status_code=404, detail="Agent not found")
+    caller = await _caller(request)
+    doc = await conversation_store.create(payload.agent_id, caller.identity, payload.title)
+    return _to_out(doc)
+
+
+@router.get("", response_model=List[ConversationOut])
+async def list_conversations(
+    request: Request,
+    response: Response,
+    agent_id: Optional[str] = None,
+    page: PageParams = Depends(),
+):
+    """The caller's conversations, most recently created first."""
+    caller = await _caller(request)
+    query = {"owner": caller.identity}
+    if agent_id:
+        query["agent_id"] = agent_id
+    return await paginate(
+        conversations_collection, request, response, page, query=query, direction=DESCENDING,
+        model=ConversationOut,
+    )
+
+
+@router.get("/{conversation_id}", response_model=ConversationOut)
+async def get_conversation(conversation_id: str, request: Request):
+    return _to_out(await conversation_store.get_doc(conversation_id, await _caller(request)))
+
+
+@router.delete("/{conversation_id}")
+async def delete_conversation(conversation_id: str, request: Request):
+    await conversation_store.delete(conversation_id, await _caller(request))
+    return {"message": "Conversation deleted successfully"}
+
+
+@router.get("/{conversation_id}/turns", response_model=List[ConversationTurnOut])
+async def list_turns(conversation_id: str, request: Request, response: Response, page: PageParams = Depends()):
+    """Full stored history, newest turn first; follow X-Next-Cursor for older turns."""
+    doc = await conversation_store.get_doc(conversation_id, await _caller(request))
+    page.fields = None  # stored turns use compact field names, so projection is not offered
+    return await paginate(
+        conversation_turns_collection, request, response, page,
+        query={"c": doc["_id"]}, direction=DESCENDING, transform=conversation_store.turn_out,
+    )
+
+
+@router.post("/{conversation_id}/messages")
+async def send_conversation_message(conversation_id: str, payload: ConversationInput, request: Request):
+    """Run the conversation's agent on the next input, with the conversation so far as context."""
+    if not payload.input:
+        raise HTTPException(status_code=400, detail="Missing input text")
+    caller = await _caller(request)
+    doc = await conversation_store.get_doc(conversation_id, caller)
+    result = await agent_runner.execute(
+        doc["agent_id"], payload.input, source="conversation", caller=caller, conversation_id=conversation_id
+    )
+    return {"output": result["output"], "metadata": result["metadata"]}
+
+
+@router.post("/{conversation_id}/messages/stream")
+async def stream_conversation_message(
+    conversation_id: str,
+    payload: ConversationInput,
+    request: Request,
+    format: str = Query("sse", description="Stream format: sse | ndjson"),
+):
+    if not payload.input:
+        raise HTTPException(status_code=400, detail="Missing input text")
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}")
+    caller = await _caller(request)
+    doc = await conversation_store.get_doc(conversation_id, caller)
+    chunks = await agent_runner.stream_agent(
+        doc["agent_id"], payload.input, source="conversation_stream", caller=caller,
+        conversation_id=conversation_id,
+    )
+    return agent_stream_response(request, chunks, format)
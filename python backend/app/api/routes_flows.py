@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response, Depends
 from typing import List
 from datetime import datetime
-from app.schemas.flow import FlowCreate, FlowUpdate, FlowOut
-from app.database.mongo import flows_collection
+from app.schemas.flow import FlowCreate, FlowUpdate, FlowOut, FlowRunRequest, FlowRunOut
+from app.database.async_mongo import flows_collection
+from app.services.flow_runner import compile_flow, flow_runner
+from app.services.job_handlers import FLOW_RUN
+from app.services.job_queue import job_queue
 from bson import ObjectId, errors as bson_errors
+from app.utils.pagination import PageParams, paginate
+from app.api.routes_jobs import job_accepted
 
 router = APIRouter(tags=["flows"])
 
@@ -19,33 +24,33 @@ def validate_objectid(id: str):
 # List All Flows
 # ─────────────────────────────────────────────
 @router.get("/", response_model=List[FlowOut])
-def list_flows():
-    flows = list(flows_collection.find({}, {
-        "_id": 1,
-        "name": 1,
-        "description": 1,
-        "json_data": 1,
-        "created_at": 1
-    }))
-
-    for flow in flows:
-        flow["id"] = str(flow["_id"])
-        del flow["_id"]
-    return flows
+async def list_flows(request: Request, response: Response, page: PageParams = Depends()):
+    # Dashboards that only need names should pass ?fields=name,description
+    return await paginate(
+        flows_collection, request, response, page,
+        projection={
+            "_id": 1,
+            "name": 1,
+            "description": 1,
+            "json_data": 1,
+            "created_at": 1
+        },
+        model=FlowOut,
+    )
 
 
 # ─────────────────────────────────────────────
 # Create Flow
 # ─────────────────────────────────────────────
 @router.post("/", response_model=FlowOut)
-def create_flow(flow_data: FlowCreate):
+async def create_flow(flow_data: FlowCreate):
     now = datetime.utcnow()
     record = {
         **flow_data.dict(),
         "created_at": now
     }
 
-    result = flows_collection.insert_one(record)
+    result = await flows_collection.insert_one(record)
     inserted_id = str(result.inserted_id)
 
     return {
@@ -59,9 +64,9 @@ def create_flow(flow_data: FlowCreate):
 # Get Flow by ID
 # ─────────────────────────────────────────────
 @router.get("/{flow_id}", response_model=FlowOut)
-def get_flow(flow_id: str):
+async def get_flow(flow_id: str):
     object_id = validate_objectid(flow_id)
-    flow = flows_collection.find_one({"_id": object_id})
+    flow = await flows_collection.find_one({"_id": object_id})
 
     if not flow:
         raise HTTPException(status_code=404, detail="Flow not found")
@@ -79,19 +84,19 @@ def get_flow(flow_id: str):
 # Update Flow
 # ─────────────────────────────────────────────
 @router.put("/{flow_id}", response_model=FlowOut)
-def update_flow(flow_id: str, flow_data: FlowUpdate):
+async def update_flow(flow_id: str, flow_data: FlowUpdate):
     object_id = validate_objectid(flow_id)
 
-    existing = flows_collection.find_one({"_id": object_id})
+    existing = await flows_collection.find_one({"_id": object_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Flow not found")
 
-    flows_collection.update_one(
+    await flows_collection.update_one(
         {"_id": object_id},
         {"$set": flow_data.dict(exclude_unset=True)}
     )
 
-    updated = flows_collection.find_one({"_id": object_id})
+    updated = await flows_collection.find_one({"_id": object_id})
 
     return {
         "id": str(updated["_id"]),
@@ -106,11 +111,45 @@ def update_flow(flow_id: str, flow_data: FlowUpdate):
 # Delete Flow
 # ─────────────────────────────────────────────
 @router.delete("/{flow_id}")
-def delete_flow(flow_id: str):
+async def delete_flow(flow_id: str):
     object_id = validate_objectid(flow_id)
-    result = flows_collection.delete_one({"_id": object_id})
+    result = await flows_collection.delete_one({"_id": object_id})
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Flow not found")
 
     return {"message": "Flow deleted successfully"}
+
+
+# ─────────────────────────────────────────────
+# Run Flow
+# ─────────────────────────────────────────────
+@router.post("/{flow_id}/run", response_model=FlowRunOut)
+async def run_flow(
+    flow_id: str,
+    payload: FlowRunRequest,
+    request: Request,
+    run_async: bool = Query(False, alias="async", description="Queue the run and return a job id (202)"),
+):
+    """
+    Execute a stored flow. Independent branches run concurrently and each
+    node reports its own start offset and duration. With `?async=true` the
+    flow runs on the background job queue and the job id is returned.
+    """
+    object_id = validate_objectid(flow_id)
+    flow = await flows_collection.find_one({"_id": object_id}, {"json_data": 1})
+    if not flow:
+        raise HTTPException(status_code=404, detail="Flow not found")
+
+    if run_async:
+        compile_flow(flow.get("json_data") or {})  # reject invalid graphs now rather than in the worker
+        caller = getattr(request.state, "caller", None)
+        job = await job_queue.enqueue(
+            FLOW_RUN, {"flow_id": flow_id, "input": payload.input, "agent_id": payload.agent_id},
+            created_by=getattr(caller, "identity", None),
+        )
+        return job_accepted(job)
+
+    graph = compile_flow(flow.get("json_data") or {})
+    result = await flow_runner.run(graph, payload.input, default_agent_id=payload.agent_id)
+    return {"flow_id": flow_id, **result}
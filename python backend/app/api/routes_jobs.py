@@ -0,0 +1,95 @@
+from fastapi import APIRouter, HTTPException, Request, Response, Depends, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
+from app.database.async_mongo import jobs_collection
+from app.schemas.job import JobOut, JobAccepted
+from app.services.job_queue import job_queue, FINAL_STATUSES, SUCCEEDED
+from app.utils.pagination import PageParams, paginate
+from pymongo import DESCENDING
+from app.utils.streaming import format_sse, format_ndjson, STREAM_FORMATS, SSE_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+
+router = APIRouter(prefix="/api/admin/jobs", tags=["Jobs"])
+
+
+def _to_out(doc: dict) -> dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def job_accepted(job: dict) -> JSONResponse:
+    """202 response for `?async=true` runs, pointing at the job's status and event stream."""
+    job_id = str(job["_id"])
+    body = JobAccepted(
+        job_id=job_id,
+        status=job["status"],
+        status_url=f"{router.prefix}/{job_id}",
+        events_url=f"{router.prefix}/{job_id}/events",
+    )
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=body.model_dump(),
+                        headers={"Location": body.status_url})
+
+
+@router.get("", response_model=List[JobOut])
+async def list_jobs(
+    request: Request,
+    response: Response,
+    kind: Optional[str] = None,
+    status: Optional[str] = None,
+    page: PageParams = Depends(),
+):
+    query = {}
+    if kind:
+        query["kind"] = kind
+    if status:
+        query["status"] = status
+    return await paginate(jobs_collection, request, response, page, query=query, direction=DESCENDING, model=JobOut)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(job_id: str):
+    return _to_out(await job_queue.get_doc(job_id))
+
+
+async def _job_events(request: Request, job_id: str, fmt: str):
+    encode = format_sse if fmt == "sse" else format_ndjson
+    async for job in job_queue.events(job_id):
+        if await request.is_disconnected():
+            return
+        if job["status"] not in FINAL_STATUSES:
+            yield encode("status", {"status": job["status"], "attempts": job.get("attempts", 0)})
+        elif job["status"] == SUCCEEDED:
+            yield encode("done", {"status": job["status"], "result": job.get("result")})
+        else:
+            yield encode("error", {"status": job["status"], "detail": job.get("error")})
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    format: str = Query("sse", description="Stream format: sse | ndjson"),
+):
+    """
+    `status` events as the job moves through the queue, then a single
+    `done` (with the result) or `error` event once it is finished.
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}")
+    await job_queue.get_doc(job_id)  # 400/404 before the stream starts
+    return StreamingResponse(
+        _job_events(request, job_id, format),
+        media_type=SSE_MEDIA_TYPE if format == "sse" else NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=JobOut)
+async def cancel_job(job_id: str):
+    return _to_out(await job_queue.cancel(job_id))
+
+
+@router.post("/{job_id}/retry", response_model=JobOut)
+async def retry_job(job_id: str):
+    """Requeue a dead-lettered or cancelled job."""
+    return _to_out(await job_queue.retry(job_id))
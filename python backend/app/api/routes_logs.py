@@ -1,30 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database.session import get_db
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
+from bson import ObjectId, errors as bson_errors
+from typing import List, Optional
+from app.database.async_mongo import mongo_db
 from app.schemas.log import RunLogOut
-from app.database.models import RunLog
-from typing import List
+from app.services.run_log import run_log
+from app.utils.pagination import PageParams, paginate
+from pymongo import DESCENDING
 
 router = APIRouter(prefix="/api/admin/logs", tags=["Run Logs"])
+run_logs_collection = mongo_db["run_logs"]
+
+
+def validate_objectid(id: str):
+    try:
+        return ObjectId(id)
+    except bson_errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid log ID format")
+
 
 @router.get("/", response_model=List[RunLogOut])
-def get_all_logs(db: Session = Depends(get_db)):
-    return db.query(RunLog).order_by(RunLog.created_at.desc()).all()
+async def get_all_logs(
+    request: Request,
+    response: Response,
+    agent_id: Optional[str] = None,
+    status: Optional[str] = None,
+    page: PageParams = Depends(),
+):
+    query = {}
+    if agent_id:
+        query["agent_id"] = agent_id
+    if status:
+        query["status"] = status
+    return await paginate(run_logs_collection, request, response, page, query=query, direction=DESCENDING, model=RunLogOut)
+
+
+@router.get("/stats", response_model=dict)
+async def get_log_pipeline_stats():
+    """Queue depth and write/drop counters for this worker's run-log pipeline."""
+    return run_log.stats()
 
 
 @router.get("/{log_id}", response_model=RunLogOut)
-def get_log(log_id: int, db: Session = Depends(get_db)):
-    log = db.query(RunLog).filter(RunLog.id == log_id).first()
+async def get_log(log_id: str):
+    log = await run_logs_collection.find_one({"_id": validate_objectid(log_id)})
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
+    log["id"] = str(log.pop("_id"))
     return log
 
 
 @router.delete("/{log_id}")
-def delete_log(log_id: int, db: Session = Depends(get_db)):
-    log = db.query(RunLog).filter(RunLog.id == log_id).first()
-    if not log:
+async def delete_log(log_id: str):
+    result = await run_logs_collection.delete_one({"_id": validate_objectid(log_id)})
+    if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Log not found")
-    db.delete(log)
-    db.commit()
     return {"message": "Log deleted successfully"}
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from app.database.mongo import messages_collection
-from app.schemas.message import MessageCreate, MessageOut
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
+from app.database.async_mongo import messages_collection
+from app.schemas.message import MessageCreate, MessageOut, MessageUsage
+from app.services.plan_service import get_message_limits
+from app.services.usage_counters import usage_counters, Usage
+from app.utils.constants import FREE_MESSAGE_MAX_WORDS
+from app.utils.pagination import PageParams, paginate
 from datetime import datetime
 from typing import List, Optional
 
@@ -14,29 +18,84 @@ async def send_message(message: MessageCreate):
     
     identifier = message.session_id if message.session_id else message.email
     is_anonymous = bool(message.session_id)
+    plan_name = "free" if is_anonymous else (message.plan or "free")
 
-    # Check message limits for free users (anonymous or logged-in)
-    message_count = messages_collection.count_documents({
-        "$or": [{"email": identifier}, {"session_id": identifier}],
-        "created_at": {"$gte": datetime.utcnow().replace(day=1)}
-    })
-    if is_anonymous or message.plan == "free":
-        if message_count >= 5:
-            raise HTTPException(status_code=403, detail="Monthly message limit reached (5 messages)")
-        if len(message.text.split()) > 500:
-            raise HTTPException(status_code=403, detail="Message exceeds 500-word limit for free plan")
+    if plan_name == "free" and len(message.text.split()) > FREE_MESSAGE_MAX_WORDS:
+        raise HTTPException(status_code=403, detail=f"Message exceeds {FREE_MESSAGE_MAX_WORDS}-word limit for free plan")
+
+    # Check message limits against the pre-aggregated counters. Callers this
+    # worker already knows are over quota are rejected without a DB round trip.
+    monthly_limit, daily_limit = await get_message_limits(plan_name)
+    limited = monthly_limit is not None or daily_limit is not None
+    cached = usage_counters.peek(identifier)
+    if limited and cached is not None and _over_quota(cached, monthly_limit, daily_limit):
+        raise HTTPException(status_code=403, detail=_quota_detail(cached, monthly_limit, daily_limit))
+
+    # Reserve the slot atomically; the returned totals are authoritative
+    usage = await usage_counters.incr(identifier)
+    if limited and _over_quota(usage, monthly_limit, daily_limit, reserved=True):
+        await usage_counters.incr(identifier, amount=-1)
+        raise HTTPException(status_code=403, detail=_quota_detail(usage, monthly_limit, daily_limit))
 
     message_data = message.dict(exclude_unset=True)
     message_data["created_at"] = datetime.utcnow()
     message_data["is_user"] = True
-    result = messages_collection.insert_one(message_data)
-    created_message = messages_collection.find_one({"_id": result.inserted_id})
-    return created_message
+    try:
+        result = await messages_collection.insert_one(message_data)
+    except Exception:
+        await usage_counters.incr(identifier, amount=-1)
+        raise
+    message_data["id"] = str(message_data.pop("_id", result.inserted_id))
+    return message_data
+
+
+def _over_quota(usage: Usage, monthly_limit: Optional[int], daily_limit: Optional[int],
+                reserved: bool = False) -> bool:
+    """True if one more message would exceed a limit (or, once reserved, already has)."""
+    slack = 0 if reserved else 1
+    return (
+        (monthly_limit is not None and usage.month + slack > monthly_limit)
+        or (daily_limit is not None and usage.day + slack > daily_limit)
+    )
+
+
+def _quota_detail(usage: Usage, monthly_limit: Optional[int], daily_limit: Optional[int]) -> str:
+    if monthly_limit is not None and usage.month >= monthly_limit:
+        return f"Monthly message limit reached ({monthly_limit} messages)"
+    return f"Daily message limit reached ({daily_limit} messages)"
+
+
+@router.get("/usage", response_model=MessageUsage)
+async def get_message_usage(email: Optional[str] = None, session_id: Optional[str] = None, plan: Optional[str] = None):
+    if not email and not session_id:
+        raise HTTPException(status_code=400, detail="Email or session_id required")
+    identifier = session_id if session_id else email
+    plan_name = "free" if session_id else (plan or "free")
+    usage = await usage_counters.get(identifier)
+    monthly_limit, daily_limit = await get_message_limits(plan_name)
+    return {
+        "identifier": identifier,
+        "plan": plan_name,
+        "month": usage.month,
+        "day": usage.day,
+        "monthly_limit": monthly_limit,
+        "daily_limit": daily_limit,
+    }
 
 @router.get("", response_model=List[MessageOut])
-async def get_messages(email: Optional[str] = None, session_id: Optional[str] = None):
+async def get_messages(
+    request: Request,
+    response: Response,
+    email: Optional[str] = None,
+    session_id: Optional[str] = None,
+    page: PageParams = Depends(),
+):
     if not email and not session_id:
         raise HTTPException(status_code=400, detail="Email or session_id required")
     identifier = session_id if session_id else email
-    messages = list(messages_collection.find({"$or": [{"email": identifier}, {"session_id": identifier}]}))
-    return messages
\ No newline at end of file
+    # Oldest first, like the chat transcript; pass ?limit= and follow X-Next-Cursor to page
+    return await paginate(
+        messages_collection, request, response, page,
+        query={"$or": [{"email": identifier}, {"session_id": identifier}]},
+        model=MessageOut,
+    )
\ No newline at end of file
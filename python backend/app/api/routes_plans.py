@@ -1,30 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
 from typing import List
 from datetime import datetime
 from bson import ObjectId, errors as bson_errors
 from app.schemas.plan import PlanCreate, PlanUpdate, PlanOut
-from app.database.mongo import plans_collection
+from app.database.async_mongo import plans_collection
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
 @router.get("/plans", response_model=List[PlanOut], tags=["Plans"])
-def get_all_plans():
+async def get_all_plans(request: Request, response: Response, page: PageParams = Depends()):
     """
     Retrieve all pricing plans (public endpoint).
     """
-    plans = list(plans_collection.find({}))
-    for plan in plans:
+    def plan_out(plan: dict) -> dict:
         plan["id"] = str(plan["_id"])
         del plan["_id"]
         plan.setdefault("features", [])
-    return plans
+        return plan
+
+    return await paginate(plans_collection, request, response, page, transform=plan_out, model=PlanOut)
 
 @router.post("/admin/plans", response_model=PlanOut, tags=["Plans"])
-def create_plan(plan_data: PlanCreate):
+async def create_plan(plan_data: PlanCreate):
     """
     Create a new pricing plan (admin-only).
     """
-    if plans_collection.find_one({"name": plan_data.name}):
+    if await plans_collection.find_one({"name": plan_data.name}):
         raise HTTPException(status_code=400, detail="Plan with this name already exists")
 
     now = datetime.utcnow()
@@ -34,7 +36,7 @@ def create_plan(plan_data: PlanCreate):
         "created_at": now,
     }
 
-    result = plans_collection.insert_one(record)
+    result = await plans_collection.insert_one(record)
     inserted_id = str(result.inserted_id)
 
     return {
@@ -51,7 +53,7 @@ def create_plan(plan_data: PlanCreate):
     }
 
 @router.put("/admin/plans/{plan_id}", response_model=PlanOut, tags=["Plans"])
-def update_plan(plan_id: str, plan_data: PlanUpdate):
+async def update_plan(plan_id: str, plan_data: PlanUpdate):
     """
     Update an existing pricing plan (admin-only).
     """
@@ -60,17 +62,17 @@ def update_plan(plan_id: str, plan_data: PlanUpdate):
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid plan ID")
 
-    existing = plans_collection.find_one({"_id": object_id})
+    existing = await plans_collection.find_one({"_id": object_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Plan not found")
 
     update_doc = plan_data.dict(exclude_unset=True)
-    plans_collection.update_one(
+    await plans_collection.update_one(
         {"_id": object_id},
         {"$set": update_doc}
     )
 
-    updated = plans_collection.find_one({"_id": object_id})
+    updated = await plans_collection.find_one({"_id": object_id})
     updated.setdefault("features", [])
 
     return {
@@ -87,7 +89,7 @@ def update_plan(plan_id: str, plan_data: PlanUpdate):
     }
 
 @router.delete("/admin/plans/{plan_id}", tags=["Plans"])
-def delete_plan(plan_id: str):
+async def delete_plan(plan_id: str):
     """
     Delete a pricing plan (admin-only).
     """
@@ -96,14 +98,14 @@ def delete_plan(plan_id: str):
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid plan ID")
 
-    result = plans_collection.delete_one({"_id": object_id})
+    result = await plans_collection.delete_one({"_id": object_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Plan not found")
 
     return {"message": "Plan deleted successfully"}
 
 @router.put("/admin/plans/bulk-update", response_model=List[PlanOut], tags=["Plans"])
-def bulk_update_plans(plans: List[PlanUpdate]):
+async def bulk_update_plans(plans: List[PlanUpdate]):
     """
     Bulk update multiple pricing plans (admin-only).
     """
@@ -117,17 +119,17 @@ def bulk_update_plans(plans: List[PlanUpdate]):
         except bson_errors.InvalidId:
             raise HTTPException(status_code=400, detail=f"Invalid plan ID: {plan_data.id}")
 
-        existing = plans_collection.find_one({"_id": object_id})
+        existing = await plans_collection.find_one({"_id": object_id})
         if not existing:
             raise HTTPException(status_code=404, detail=f"Plan not found: {plan_data.id}")
 
         update_doc = plan_data.dict(exclude_unset=True)
-        plans_collection.update_one(
+        await plans_collection.update_one(
             {"_id": object_id},
             {"$set": update_doc}
         )
 
-        updated = plans_collection.find_one({"_id": object_id})
+        updated = await plans_collection.find_one({"_id": object_id})
         updated.setdefault("features", [])
         updated_plans.append({
             "id": str(updated["_id"]),
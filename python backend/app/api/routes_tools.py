@@ -1,11 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
 from bson import ObjectId, errors as bson_errors
 from datetime import datetime
 import json
 from app.schemas.tool import ToolCreate, ToolUpdate, ToolOut
-from app.database.mongo import mongo_db
+from app.database.async_mongo import mongo_db
 from app.agents.tools import AVAILABLE_FUNCTIONS
+from app.agents.tool_executor import tool_executor
 from app.agents.hosted_tools import HOSTED_TOOLS
+from app.services.agent_cache import agent_cache
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 tools_collection = mongo_db["tools"]
@@ -41,14 +44,18 @@ def validate_hosted_tool_config(tool_name: str, config: dict):
             raise HTTPException(status_code=400, detail=f"Invalid field '{field}' for {tool_name}")
 
 @router.get("/", response_model=list[ToolOut])
-async def get_all_tools():
-    tools = list(tools_collection.find())
-    return [{"id": str(tool["_id"]), **tool} for tool in tools]
+async def get_all_tools(request: Request, response: Response, page: PageParams = Depends()):
+    return await paginate(tools_collection, request, response, page, model=ToolOut)
 
 @router.get("/functions", response_model=list[str])
 async def list_function_tools():
     return list(AVAILABLE_FUNCTIONS.keys())
 
+@router.get("/cache/stats", response_model=dict)
+async def get_tool_cache_stats():
+    """Hit/miss counters for the function tool result cache."""
+    return tool_executor.cache.stats() if tool_executor.cache else {}
+
 @router.get("/hosted", response_model=list[dict])
 async def list_hosted_tools():
     return HOSTED_TOOLS
@@ -63,7 +70,7 @@ async def get_function_description(function_name: str):
 
 @router.post("/", response_model=ToolOut)
 async def create_tool(tool: ToolCreate):
-    if tools_collection.find_one({"name": tool.name}):
+    if await tools_collection.find_one({"name": tool.name}):
         raise HTTPException(status_code=400, detail="Tool with this name already exists")
 
     if tool.config:
@@ -88,7 +95,7 @@ async def create_tool(tool: ToolCreate):
             raise HTTPException(status_code=400, detail="Config must be valid JSON")
 
     tool_data = {**tool.dict(), "created_at": datetime.utcnow()}
-    result = tools_collection.insert_one(tool_data)
+    result = await tools_collection.insert_one(tool_data)
     return {"id": str(result.inserted_id), **tool_data}
 
 @router.put("/{tool_id}", response_model=ToolOut)
@@ -97,7 +104,7 @@ async def update_tool(tool_id: str, tool_update: ToolUpdate):
         if not ObjectId.is_valid(tool_id):
             raise HTTPException(status_code=400, detail="Invalid tool ID")
         
-        existing_tool = tools_collection.find_one({"_id": ObjectId(tool_id)})
+        existing_tool = await tools_collection.find_one({"_id": ObjectId(tool_id)})
         if not existing_tool:
             raise HTTPException(status_code=404, detail="Tool not found")
 
@@ -125,12 +132,14 @@ async def update_tool(tool_id: str, tool_update: ToolUpdate):
                 raise HTTPException(status_code=400, detail="Config must be valid JSON")
 
         if update_data:
-            tools_collection.update_one(
+            await tools_collection.update_one(
                 {"_id": ObjectId(tool_id)},
                 {"$set": {**update_data, "updated_at": datetime.utcnow()}}
             )
+            # Built agents hold hosted tools (e.g. file_search) made from this config
+            agent_cache.clear()
         
-        updated_tool = tools_collection.find_one({"_id": ObjectId(tool_id)})
+        updated_tool = await tools_collection.find_one({"_id": ObjectId(tool_id)})
         return {"id": str(updated_tool["_id"]), **updated_tool}
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid tool ID")
@@ -141,10 +150,11 @@ async def delete_tool(tool_id: str):
         if not ObjectId.is_valid(tool_id):
             raise HTTPException(status_code=400, detail="Invalid tool ID")
         
-        result = tools_collection.delete_one({"_id": ObjectId(tool_id)})
+        result = await tools_collection.delete_one({"_id": ObjectId(tool_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Tool not found")
-        
+        agent_cache.clear()
+
         return {"message": "Tool deleted successfully"}
     except bson_errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid tool ID")
\ No newline at end of file
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime, timedelta
+from typing import Optional
+from app.services.usage_meter import usage_meter, DIMENSIONS, PERIODS, METRICS
+
+router = APIRouter(tags=["usage"])
+
+
+def _window(period: str, start: Optional[datetime], end: Optional[datetime]):
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {list(PERIODS)}")
+    end = end or datetime.utcnow()
+    start = start or end - (timedelta(days=1) if period == "hour" else timedelta(days=30))
+    return start, end
+
+
+def _dimension(dimension: str) -> str:
+    if dimension not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of {list(DIMENSIONS)}")
+    return dimension
+
+
+# ─────────────────────────────────────────────
+# Top consumers per dimension
+# ─────────────────────────────────────────────
+@router.get("/", response_model=dict)
+async def get_usage_summary(
+    dimension: str = Query("agent", description="agent | api_key | user | plan | model"),
+    period: str = Query("day", description="Bucket size: hour | day"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sort_by: str = Query("total_tokens"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    if sort_by not in METRICS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {list(METRICS)}")
+    start, end = _window(period, start, end)
+    # Push this worker's pending counts so the report includes recent runs
+    await usage_meter.flush()
+    rows = await usage_meter.top(_dimension(dimension), period, start, end, limit=limit, sort_by=sort_by)
+    return {"dimension": dimension, "period": period, "start": start, "end": end, "items": rows}
+
+
+# ─────────────────────────────────────────────
+# Time series for one key
+# ─────────────────────────────────────────────
+@router.get("/{dimension}/{key}", response_model=dict)
+async def get_usage_series(
+    dimension: str,
+    key: str,
+    period: str = Query("hour", description="Bucket size: hour | day"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    start, end = _window(period, start, end)
+    await usage_meter.flush()
+    buckets = await usage_meter.series(_dimension(dimension), key, period, start, end)
+    totals = {m: sum(b.get(m, 0) for b in buckets) for m in METRICS}
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return {"dimension": dimension, "key": key, "period": period, "totals": totals, "buckets": buckets}
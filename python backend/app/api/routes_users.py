@@ -1,20 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from app.database.mongo import users_collection
+from app.database.async_mongo import users_collection
 from app.schemas.user import UserCreate, UserOut, UserUpdate
-from app.services.auth_service import create_access_token
+from app.services.auth_service import create_access_token, invalidate_principal
+from app.services.password_service import password_hasher
 from app.config import settings
 
 from typing import List
 from datetime import datetime, timedelta
 from bson import ObjectId
-from passlib.context import CryptContext
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Helper function to convert MongoDB _id to string
 def convert_mongo_id(user):
     user["id"] = str(user.pop("_id"))
@@ -25,7 +23,7 @@ def convert_mongo_id(user):
 # ─────────────────────────────────────────────────────────────
 @router.get("/users", response_model=List[UserOut])
 async def get_users(skip: int = 0, limit: int = 100):
-    users = list(users_collection.find().skip(skip).limit(limit))
+    users = await users_collection.find().skip(skip).limit(limit).to_list(length=None)
     return [convert_mongo_id(user) for user in users]
 
 # ─────────────────────────────────────────────────────────────
@@ -33,17 +31,17 @@ async def get_users(skip: int = 0, limit: int = 100):
 # ─────────────────────────────────────────────────────────────
 @router.post("/users", response_model=UserOut)
 async def create_user(user: UserCreate):
-    if users_collection.find_one({"email": user.email}):
+    if await users_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_data = user.dict()
-    user_data["password"] = pwd_context.hash(user_data["password"])
+    user_data["password"] = await password_hasher.hash(user_data["password"])
     user_data["created_at"] = datetime.utcnow()
     user_data["is_active"] = True
     user_data["is_admin"] = False
 
-    result = users_collection.insert_one(user_data)
-    created_user = users_collection.find_one({"_id": result.inserted_id})
+    result = await users_collection.insert_one(user_data)
+    created_user = await users_collection.find_one({"_id": result.inserted_id})
     return convert_mongo_id(created_user)
 
 # ─────────────────────────────────────────────────────────────
@@ -52,7 +50,7 @@ async def create_user(user: UserCreate):
 @router.get("/users/{user_id}", response_model=UserOut)
 async def get_user(user_id: str):
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = await users_collection.find_one({"_id": ObjectId(user_id)})
     except:
         raise HTTPException(status_code=400, detail="Invalid user ID")
         
@@ -69,17 +67,19 @@ async def update_user(user_id: str, updates: UserUpdate):
     try:
         update_data = {k: v for k, v in updates.dict(exclude_unset=True).items()}
         if "password" in update_data:
-            update_data["password"] = pwd_context.hash(update_data["password"])
+            update_data["password"] = await password_hasher.hash(update_data["password"])
 
-        result = users_collection.update_one(
+        previous = await users_collection.find_one_and_update(
             {"_id": ObjectId(user_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
         )
 
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="User not found")
+        invalidate_principal(previous.get("email"))
 
-        updated_user = users_collection.find_one({"_id": ObjectId(user_id)})
+        updated_user = await users_collection.find_one({"_id": ObjectId(user_id)})
         return convert_mongo_id(updated_user)
     except:
         raise HTTPException(status_code=400, detail="Invalid user ID or data")
@@ -90,9 +90,10 @@ async def update_user(user_id: str, updates: UserUpdate):
 @router.delete("/users/{user_id}")
 async def delete_user(user_id: str):
     try:
-        result = users_collection.delete_one({"_id": ObjectId(user_id)})
-        if result.deleted_count == 0:
+        deleted = await users_collection.find_one_and_delete({"_id": ObjectId(user_id)})
+        if deleted is None:
             raise HTTPException(status_code=404, detail="User not found")
+        invalidate_principal(deleted.get("email"))
         return {"detail": "User deleted"}
     except:
         raise HTTPException(status_code=400, detail="Invalid user ID")
@@ -101,13 +102,13 @@ async def delete_user(user_id: str):
 # User Login Endpoint (JWT Auth)
 # ─────────────────────────────────────────────────────────────
 @router.post("/user-login")
-def user_login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = users_collection.find_one({
+async def user_login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await users_collection.find_one({
         "email": form_data.username,
         "is_active": True
     })
 
-    if not user or not pwd_context.verify(form_data.password, user["password"]):
+    if not user or not await password_hasher.verify(form_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
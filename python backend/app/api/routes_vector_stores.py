@@ -0,0 +1,74 @@
+from fastapi import APIRouter, status
+from typing import List
+from app.schemas.vector_store import (
+    VectorStoreCreate, VectorStoreOut, VectorStoreIngest, VectorStoreIngestOut,
+    VectorStoreSearch, VectorStoreSearchOut,
+)
+from app.database.async_mongo import vector_stores_collection
+from app.services.vector_store_service import vector_store_service
+
+router = APIRouter(tags=["vector-stores"])
+
+
+def _to_out(doc: dict) -> dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+# ─────────────────────────────────────────────
+# List / Create / Get / Delete Stores
+# ─────────────────────────────────────────────
+@router.get("/", response_model=List[VectorStoreOut])
+async def list_vector_stores():
+    docs = await vector_stores_collection.find().sort("_id", -1).to_list(length=None)
+    return [_to_out(doc) for doc in docs]
+
+
+@router.post("/", response_model=VectorStoreOut, status_code=status.HTTP_201_CREATED)
+async def create_vector_store(payload: VectorStoreCreate):
+    doc = await vector_store_service.create(payload.name, payload.openai_api_key_id, payload.embedding_model)
+    return _to_out(doc)
+
+
+@router.get("/{store_id}", response_model=VectorStoreOut)
+async def get_vector_store(store_id: str):
+    return _to_out(await vector_store_service.get_doc(store_id))
+
+
+@router.delete("/{store_id}")
+async def delete_vector_store(store_id: str):
+    await vector_store_service.delete(store_id)
+    return {"message": "Vector store deleted successfully"}
+
+
+# ─────────────────────────────────────────────
+# Ingest / Remove Documents
+# ─────────────────────────────────────────────
+@router.post("/{store_id}/files", response_model=VectorStoreIngestOut, status_code=status.HTTP_201_CREATED)
+async def ingest_documents(store_id: str, payload: VectorStoreIngest):
+    return await vector_store_service.ingest(
+        store_id,
+        [document.dict() for document in payload.documents],
+        payload.chunking_strategy.max_chunk_size_tokens,
+        payload.chunking_strategy.chunk_overlap_tokens,
+    )
+
+
+@router.delete("/{store_id}/files/{file_id}")
+async def delete_document(store_id: str, file_id: str):
+    await vector_store_service.delete_file(store_id, file_id)
+    return {"message": "File removed from vector store"}
+
+
+# ─────────────────────────────────────────────
+# Search
+# ─────────────────────────────────────────────
+@router.post("/{store_id}/search", response_model=VectorStoreSearchOut)
+async def search_vector_store(store_id: str, payload: VectorStoreSearch):
+    return await vector_store_service.search(
+        [store_id], payload.query,
+        max_num_results=payload.max_num_results,
+        ranking_options=payload.ranking_options,
+        filters=payload.filters,
+    )
@@ -6,15 +6,129 @@ class Settings(BaseSettings):
     # ───── Core Databases ─────
     MONGO_URI: str = Field(..., description="MongoDB URI")
 
+    MONGO_MIGRATE_ON_STARTUP: bool = Field(True, description="Apply the index manifest on startup")
+    MONGO_EXPLAIN_ON_STARTUP: bool = Field(False, description="Explain hot queries on startup and log collection scans")
+
     # ───── AI Integrations ─────
     OPENAI_API_KEY: str = Field(..., description="OpenAI API key")
 
+    # ───── OpenAI HTTP Connection Pool ─────
+    OPENAI_POOL_MAX_CONNECTIONS: int = Field(100, description="Max concurrent upstream connections per API key")
+    OPENAI_POOL_MAX_KEEPALIVE: int = Field(20, description="Idle keep-alive connections kept per API key")
+    OPENAI_POOL_KEEPALIVE_EXPIRY: float = Field(30.0, description="Seconds an idle connection is kept open")
+    OPENAI_HTTP2: bool = Field(True, description="Multiplex upstream calls over HTTP/2")
+    OPENAI_TIMEOUT_SECONDS: float = Field(60.0, description="Upstream request timeout in seconds")
+
+    # ───── Agent Tool Calling ─────
+    AGENT_MAX_TOOL_ROUNDS: int = Field(5, description="Max model/tool round trips per agent run")
+    AGENT_MAX_OUTPUT_TOKENS: int = Field(2000, description="Default reply token limit (model_settings.max_tokens overrides per agent)")
+    AGENT_MIN_OUTPUT_TOKENS: int = Field(256, description="Reject a request up front if less than this is left for the reply")
+    TOKENIZER_DEFAULT_MODEL: str = Field("gpt-4o", description="Tokenizer used when no model is given (e.g. conversation turns)")
+    TOKEN_COUNT_CACHE_SIZE: int = Field(8192, description="Texts whose token counts are cached per worker")
+    TOOL_MAX_CONCURRENCY: int = Field(8, description="Max tool calls executed at once per turn")
+    TOOL_TIMEOUT_SECONDS: float = Field(30.0, description="Per-tool-call timeout in seconds")
+    TOOL_CACHE_MAX_SIZE: int = Field(4096, description="Max tool results kept in the in-memory cache")
+    TOOL_CACHE_MONGO: bool = Field(False, description="Also cache tool results in the shared tool_cache collection")
+
+    # ───── Embeddings / Response Cache ─────
+    EMBEDDING_MODEL: str = Field("text-embedding-3-small", description="Model used for embeddings")
+    RESPONSE_CACHE_MAX_SIZE: int = Field(10000, description="Max exact-match cached answers per worker")
+    RESPONSE_CACHE_INDEX_CAPACITY: int = Field(2048, description="Max semantic entries per agent version")
+    RESPONSE_CACHE_TTL_SECONDS: float = Field(3600.0, description="Default TTL for cached answers")
+    RESPONSE_CACHE_THRESHOLD: float = Field(0.95, description="Default cosine similarity for a semantic hit")
+
+    # ───── Vector Stores (FileSearchTool) ─────
+    VECTOR_STORE_DIR: str = Field("data/vector_stores", description="Directory holding on-disk vector stores")
+    VECTOR_STORE_MAX_OPEN: int = Field(32, description="Max vector stores kept memory-mapped per worker")
+    VECTOR_STORE_DEFAULT_RESULTS: int = Field(10, description="Results returned when max_num_results is unset")
+    VECTOR_STORE_EMBED_BATCH: int = Field(256, description="Chunks per embeddings request during ingestion")
+    VECTOR_STORE_IVF_MIN_ROWS: int = Field(50000, description="Build an IVF index once a store has this many chunks")
+    VECTOR_STORE_IVF_NPROBE: int = Field(8, description="IVF lists scanned per query (recall vs latency)")
+
+    # ───── Agent Search ─────
+    AGENT_SEARCH_REFRESH_SECONDS: float = Field(60.0, description="Full reload interval for the in-memory agent search index (0 disables)")
+
+    # ───── Flow Execution ─────
+    FLOW_MAX_CONCURRENCY: int = Field(8, description="Max flow nodes executing at once per run")
+    FLOW_NODE_TIMEOUT_SECONDS: float = Field(120.0, description="Per-node timeout in seconds")
+
+    # ───── Agent Cache ─────
+    AGENT_CACHE_MAX_SIZE: int = Field(256, description="Max built agents kept in memory per worker")
+    AGENT_CACHE_TTL_SECONDS: float = Field(300.0, description="Seconds a built agent stays cached")
+    AGENT_CACHE_CHANGE_STREAMS: bool = Field(False, description="Invalidate via MongoDB change streams (replica set only)")
+
     # ───── JWT & Auth Config ─────
     JWT_SECRET: str = Field("super-secret-key", description="JWT secret key")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(1440, description="Token expiry in minutes")
+    AUTH_PRINCIPAL_CACHE_TTL: float = Field(60.0, description="Seconds a verified admin principal is cached")
+    AUTH_PRINCIPAL_CACHE_SIZE: int = Field(1024, description="Max cached principals per worker")
+    PASSWORD_HASH_WORKERS: int = Field(4, description="Threads dedicated to bcrypt hash/verify")
+    PASSWORD_HASH_MAX_PENDING: int = Field(64, description="Max queued+running bcrypt calls before returning 503")
+    AUTH_STATELESS_TOKENS: bool = Field(False, description="Trust token role claims without a users lookup (deactivation applies at token expiry)")
+
+    # ───── Run Logs ─────
+    RUN_LOG_ENABLED: bool = Field(True, description="Record agent runs in the run_logs collection")
+    RUN_LOG_QUEUE_SIZE: int = Field(10000, description="Max run records buffered in memory per worker")
+    RUN_LOG_BATCH_SIZE: int = Field(200, description="Max records per insert_many")
+    RUN_LOG_FLUSH_INTERVAL: float = Field(1.0, description="Seconds to let a batch accumulate before writing")
+    RUN_LOG_DROP_POLICY: str = Field("drop_oldest", description="When the buffer is full: drop_oldest | drop_newest")
+    RUN_LOG_MAX_TEXT_CHARS: int = Field(4000, description="Input/output text is truncated to this length")
+    RUN_LOG_RETENTION_DAYS: int = Field(30, description="Days run logs are kept (0 keeps them forever)")
+
+    # ───── Usage Counters ─────
+    USAGE_COUNTER_CACHE_TTL: float = Field(30.0, description="Seconds cached usage counts are trusted for fast quota rejections")
+    USAGE_FLUSH_INTERVAL: float = Field(10.0, description="Seconds between token/cost bucket flushes")
+    USAGE_TOTALS_CACHE_TTL: float = Field(30.0, description="Seconds a caller's persisted token spend is cached for limit checks")
+
+    # ───── Metrics ─────
+    METRICS_ENABLED: bool = Field(True, description="Expose Prometheus metrics on /metrics and time hot paths")
+
+    # ───── Conversations ─────
+    CONVERSATION_HOT_SESSIONS: int = Field(1000, description="Active conversations kept in memory per worker")
+    CONVERSATION_SESSION_TTL: float = Field(1800.0, description="Seconds an idle conversation stays in memory")
+    CONVERSATION_HOT_TURNS: int = Field(20, description="Newest turns kept in memory per conversation")
+    CONVERSATION_HISTORY_TOKENS: int = Field(3000, description="Token budget for prior turns sent with each new turn")
+    CONVERSATION_SUMMARY_MODEL: str = Field("gpt-4o-mini", description="Model that folds old turns into the running summary (empty = agent's model)")
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = Field(400, description="Max length of the running summary")
+    CONVERSATION_COMPRESS_MIN_CHARS: int = Field(1024, description="Stored turn texts at least this long are zlib-compressed")
+
+    # ───── Batches ─────
+    BATCH_MAX_CONCURRENCY: int = Field(16, description="Batch items run at once per worker, across all jobs")
+    BATCH_PER_KEY_CONCURRENCY: int = Field(4, description="Batch items run at once per upstream OpenAI API key")
+    BATCH_MAX_ATTEMPTS: int = Field(3, description="Default attempts per batch item before it is marked failed")
+    BATCH_RETRY_BACKOFF_SECONDS: float = Field(2.0, description="Base delay of the exponential retry backoff")
+    BATCH_ITEM_LEASE_SECONDS: float = Field(600.0, description="Seconds a claimed item stays reserved before another worker may take it over")
+    BATCH_POLL_SECONDS: float = Field(2.0, description="Interval for re-checking job status and following results")
+    BATCH_RESUME_ON_STARTUP: bool = Field(True, description="Resume queued/running batches when the server starts")
+
+    # ───── Background jobs ─────
+    JOB_WORKERS_ENABLED: bool = Field(True, description="Run job workers inside the API process (disable when running `python -m app.worker` separately)")
+    JOB_WORKER_CONCURRENCY: int = Field(4, description="Jobs run at once per worker process")
+    JOB_LEASE_SECONDS: float = Field(120.0, description="Seconds a claimed job stays reserved without a heartbeat")
+    JOB_HEARTBEAT_SECONDS: float = Field(30.0, description="Interval at which a running job's lease is renewed")
+    JOB_MAX_ATTEMPTS: int = Field(3, description="Attempts per job before it is dead-lettered")
+    JOB_RETRY_BACKOFF_SECONDS: float = Field(5.0, description="Base delay of the exponential retry backoff")
+    JOB_POLL_SECONDS: float = Field(1.0, description="Idle workers' polling interval and the job event stream's refresh interval")
+
+    # ───── Tracing ─────
+    TRACING_ENABLED: bool = Field(False, description="Record OpenTelemetry spans for requests, Mongo, model and tool calls")
+    TRACING_EXPORTERS: str = Field("file", description="Comma-separated span exporters: console | file | otlp")
+    TRACING_FILE_PATH: str = Field("traces.jsonl", description="File the `file` exporter appends JSON spans to")
+    TRACING_OTLP_ENDPOINT: str = Field("", description="OTLP/HTTP traces endpoint (defaults to OTEL_EXPORTER_OTLP_ENDPOINT)")
+    TRACING_SERVICE_NAME: str = Field("startupcopilot-api", description="service.name resource attribute on exported spans")
+
+    # ───── Event Loop Watchdog ─────
+    LOOP_WATCHDOG_ENABLED: bool = Field(True, description="Detect and report callbacks that block the event loop")
+    LOOP_WATCHDOG_INTERVAL: float = Field(0.1, description="Seconds between loop heartbeats (also the lag sampling rate)")
+    LOOP_WATCHDOG_THRESHOLD: float = Field(0.25, description="A heartbeat this many seconds overdue counts as a blocking call")
+    LOOP_WATCHDOG_LOG_COOLDOWN: float = Field(60.0, description="Min seconds between stack logs for the same call site")
 
     # ───── App Settings ─────
     API_RATE_LIMIT: int = Field(60, description="Requests per minute")
+    RATE_LIMIT_ENABLED: bool = Field(True, description="Enforce per-plan rate limits on /api routes")
+    RATE_LIMIT_BACKEND: str = Field("memory", description="Counter store: memory | mongo | redis")
+    RATE_LIMIT_REDIS_URL: str = Field("redis://localhost:6379/0", description="Redis-protocol URL for the redis backend")
+    RATE_LIMIT_PLAN_CACHE_TTL: float = Field(300.0, description="Seconds a caller's plan limits are cached")
     PROJECT_NAME: str = "StartupCopilot API"
     DEBUG: bool = True
 
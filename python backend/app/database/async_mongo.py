@@ -0,0 +1,33 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.utils.metrics import mongo_command_metrics
+from app.utils.tracing import mongo_command_tracer
+from functools import lru_cache
+
+@lru_cache()
+def get_async_mongo_client():
+    listeners = []
+    if settings.METRICS_ENABLED:
+        listeners.append(mongo_command_metrics)
+    if settings.TRACING_ENABLED:
+        listeners.append(mongo_command_tracer)
+    client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=listeners)
+    return client["startupcopilot"]  # Return the database directly
+
+# Initialize collections (Motor – use these from async code paths)
+mongo_db = get_async_mongo_client()
+agents_collection     = mongo_db["agents"]
+flows_collection      = mongo_db["flows"]
+guardrails_collection = mongo_db["guardrails"]
+users_collection      = mongo_db["users"]
+tools_collection      = mongo_db["tools"]
+api_keys_collection   = mongo_db["api_keys"]
+plans_collection      = mongo_db["plans"]
+settings_collection   = mongo_db["settings"]
+messages_collection   = mongo_db["messages"]
+vector_stores_collection = mongo_db["vector_stores"]
+conversations_collection = mongo_db["conversations"]
+conversation_turns_collection = mongo_db["conversation_turns"]
+batch_jobs_collection = mongo_db["batch_jobs"]
+batch_items_collection = mongo_db["batch_items"]
+jobs_collection = mongo_db["jobs"]
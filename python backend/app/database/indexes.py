@@ -0,0 +1,220 @@
+# app/database/indexes.py
+#
+# Declarative index manifest plus an idempotent runner. Applied on startup
+# (app/main.py) and from the CLI (scripts/migrate_indexes.py).
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, Any], ...]
+    name: str
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+    partial_filter: Optional[Dict[str, Any]] = None
+
+    def options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        if self.partial_filter:
+            options["partialFilterExpression"] = self.partial_filter
+        return options
+
+
+@dataclass(frozen=True)
+class QueryProbe:
+    """A hot query shape checked with explain() to catch collection scans."""
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+    description: str = field(default="", compare=False)
+
+
+# ─── Manifest ───────────────────────────────────────────────
+INDEXES: List[IndexSpec] = [
+    # users: login / token verification / plan lookups
+    IndexSpec("users", (("email", ASCENDING),), "email_unique", unique=True),
+
+    # agents
+    IndexSpec("agents", (("name", ASCENDING),), "name_unique", unique=True),
+    IndexSpec("agents", (("status", ASCENDING), ("name", ASCENDING)), "status_name"),
+    IndexSpec("agents", (("name", TEXT), ("instructions", TEXT)), "name_instructions_text"),
+
+    # catalogue collections looked up by name
+    IndexSpec("tools", (("name", ASCENDING),), "name_unique", unique=True),
+    IndexSpec("guardrails", (("name", ASCENDING),), "name_unique", unique=True),
+    IndexSpec("api_keys", (("name", ASCENDING),), "name_unique", unique=True),
+    IndexSpec("plans", (("name", ASCENDING),), "name_unique", unique=True),
+    IndexSpec("settings", (("type", ASCENDING),), "type_unique", unique=True),
+
+    # messages: per-identity history and monthly quota counts
+    IndexSpec("messages", (("email", ASCENDING), ("created_at", DESCENDING)), "email_created_at"),
+    IndexSpec("messages", (("session_id", ASCENDING), ("created_at", DESCENDING)), "session_created_at"),
+
+    # conversations: per-owner listing and ordered, append-only turns
+    IndexSpec("conversations", (("owner", ASCENDING), ("_id", DESCENDING)), "owner_id"),
+    IndexSpec("conversation_turns", (("c", ASCENDING), ("n", ASCENDING)), "conversation_seq_unique", unique=True),
+
+    # batches: job listing, lease claims in input order, results in completion order
+    IndexSpec("batch_jobs", (("status", ASCENDING), ("_id", DESCENDING)), "status_id"),
+    IndexSpec("batch_items", (("job", ASCENDING), ("i", ASCENDING)), "job_index_unique", unique=True),
+    IndexSpec("batch_items", (("job", ASCENDING), ("status", ASCENDING), ("i", ASCENDING)), "job_status_index"),
+    IndexSpec("batch_items", (("job", ASCENDING), ("seq", ASCENDING)), "job_seq",
+              partial_filter={"seq": {"$exists": True}}),
+
+    # background jobs: claim order (queued by run_at, expired leases) and listing
+    IndexSpec("jobs", (("status", ASCENDING), ("run_at", ASCENDING)), "status_run_at"),
+    IndexSpec("jobs", (("status", ASCENDING), ("lease_until", ASCENDING)), "status_lease_until"),
+    IndexSpec("jobs", (("kind", ASCENDING), ("_id", DESCENDING)), "kind_id"),
+
+    # run history: per-agent browsing, newest first
+    IndexSpec("run_logs", (("agent_id", ASCENDING), ("_id", DESCENDING)), "agent_id_id"),
+    IndexSpec("run_logs", (("status", ASCENDING), ("_id", DESCENDING)), "status_id"),
+
+    # token/cost buckets: summaries per dimension and per-key series / limits
+    IndexSpec("usage_buckets", (("period", ASCENDING), ("dimension", ASCENDING), ("bucket", ASCENDING)), "period_dimension_bucket"),
+    IndexSpec("usage_buckets", (("dimension", ASCENDING), ("key", ASCENDING), ("period", ASCENDING), ("bucket", ASCENDING)), "dimension_key_period_bucket"),
+
+    # TTL collections
+    IndexSpec("rate_limits", (("expires_at", ASCENDING),), "expires_at_ttl", expire_after_seconds=0),
+    IndexSpec("tool_cache", (("expires_at", ASCENDING),), "expires_at_ttl", expire_after_seconds=0),
+    IndexSpec("usage_counters", (("expires_at", ASCENDING),), "expires_at_ttl", expire_after_seconds=0),
+    IndexSpec("usage_buckets", (("expires_at", ASCENDING),), "expires_at_ttl", expire_after_seconds=0),
+]
+
+if settings.RUN_LOG_RETENTION_DAYS > 0:
+    INDEXES.append(IndexSpec(
+        "run_logs", (("created_at", ASCENDING),), "created_at_ttl",
+        expire_after_seconds=settings.RUN_LOG_RETENTION_DAYS * 86400,
+    ))
+
+QUERY_PROBES: List[QueryProbe] = [
+    QueryProbe("users", {"email": "probe@example.com", "is_active": True}, description="user login"),
+    QueryProbe("users", {"email": "probe@example.com", "is_admin": True, "is_active": True}, description="admin login"),
+    QueryProbe("agents", {"status": "active"}, description="public agent list"),
+    QueryProbe("agents", {"name": "probe"}, description="agent name uniqueness"),
+    QueryProbe("tools", {"name": "probe"}, description="tool name uniqueness"),
+    QueryProbe("guardrails", {"name": "probe"}, description="guardrail name uniqueness"),
+    QueryProbe("api_keys", {"name": "probe"}, description="API key name uniqueness"),
+    QueryProbe("plans", {"name": "probe"}, description="plan limits lookup"),
+    QueryProbe("settings", {"type": "general"}, description="settings lookup"),
+    QueryProbe("messages", {"email": "probe@example.com"}, (("created_at", -1),), description="message history"),
+    QueryProbe("messages", {"session_id": "probe"}, (("created_at", -1),), description="anonymous history"),
+    QueryProbe("conversation_turns", {"c": "probe", "n": {"$gt": 0}}, (("n", -1),), description="conversation hot window"),
+    QueryProbe("batch_items", {"job": "probe", "status": "pending"}, (("i", 1),), description="batch item claim"),
+    QueryProbe("batch_items", {"job": "probe", "seq": {"$gt": 0}}, (("seq", 1),), description="batch results"),
+    QueryProbe("jobs", {"status": "queued", "run_at": {"$lte": 0}}, (("run_at", 1),), description="job claim"),
+]
+
+
+# Names used in "<X> with this name already exists" for unique-name collections
+UNIQUE_NAME_LABELS = {
+    "agents": "Agent",
+    "tools": "Tool",
+    "guardrails": "Guardrail",
+    "api_keys": "API key",
+    "plans": "Plan",
+}
+
+
+def duplicate_key_detail(exc: DuplicateKeyError) -> str:
+    """Client-facing message for a unique index violation (e.g. a rename onto a taken name)."""
+    details = exc.details or {}
+    match = re.search(r"collection: \S+?\.(\S+)", details.get("errmsg", "") or str(exc))
+    label = UNIQUE_NAME_LABELS.get(match.group(1)) if match else None
+    fields = ", ".join(details.get("keyValue") or {}) or "name"
+    if label and fields == "name":
+        return f"{label} with this name already exists"
+    return f"A record with this {fields} already exists"
+
+
+def _same_index(existing: Dict[str, Any], spec: IndexSpec) -> bool:
+    if spec.keys and spec.keys[0][1] == TEXT:
+        return existing.get("weights") is not None and set(existing["weights"]) == {k for k, _ in spec.keys}
+    return tuple(existing.get("key", [])) == spec.keys
+
+
+async def apply_indexes(db, specs: List[IndexSpec] = INDEXES) -> List[Dict[str, Any]]:
+    """
+    Create every index in `specs` that is not already present. Safe to run
+    repeatedly. Failures (e.g. duplicate data blocking a unique index) are
+    logged and reported rather than raised so startup is never blocked.
+    """
+    report = []
+    for spec in specs:
+        collection = db[spec.collection]
+        entry = {"collection": spec.collection, "index": spec.name}
+        try:
+            existing = [info for info in (await collection.index_information()).values() if _same_index(info, spec)]
+            if existing:
+                # Same keys but different options cannot be fixed in place
+                same_options = bool(existing[0].get("unique")) == spec.unique
+                entry["status"] = "exists" if same_options else "conflict"
+                if not same_options:
+                    logger.warning(f"Index on {spec.collection} {spec.keys} exists with different options; drop it to apply {spec.name}")
+            else:
+                await collection.create_index(list(spec.keys), **spec.options())
+                entry["status"] = "created"
+                logger.info(f"Created index {spec.collection}.{spec.name}")
+        except OperationFailure as exc:
+            entry.update(status="failed", error=str(exc))
+            logger.error(f"Index {spec.collection}.{spec.name} could not be created: {exc}")
+        report.append(entry)
+    return report
+
+
+def _winning_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = []
+    while plan:
+        stages.append(plan.get("stage"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+async def explain_queries(db, probes: List[QueryProbe] = QUERY_PROBES) -> List[Dict[str, Any]]:
+    """Explain each hot query shape and flag the ones that still scan the collection."""
+    report = []
+    for probe in probes:
+        cursor = db[probe.collection].find(probe.filter)
+        if probe.sort:
+            cursor = cursor.sort(list(probe.sort))
+        try:
+            explained = await cursor.explain()
+        except OperationFailure as exc:
+            report.append({"collection": probe.collection, "query": probe.description, "error": str(exc)})
+            continue
+        planner = explained.get("queryPlanner", {})
+        stages = _winning_stages(planner.get("winningPlan", {}))
+        report.append({
+            "collection": probe.collection,
+            "query": probe.description,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+        })
+    return report
+
+
+async def run_migrations(db, explain: bool = False) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"indexes": await apply_indexes(db)}
+    if explain:
+        result["explain"] = await explain_queries(db)
+        for row in result["explain"]:
+            if row.get("collscan") or row.get("in_memory_sort"):
+                logger.warning(f"Slow query candidate on {row['collection']} ({row['query']}): {row['stages']}")
+    return result
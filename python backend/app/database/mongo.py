@@ -2,6 +2,9 @@ from pymongo import MongoClient
 from app.config import settings
 from functools import lru_cache
 
+# Synchronous client – kept for CLI scripts. Request handlers use
+# app.database.async_mongo so queries never block the event loop.
+
 @lru_cache()
 def get_mongo_client():
     client = MongoClient(settings.MONGO_URI)
@@ -17,4 +20,5 @@ tools_collection      = mongo_db["tools"]
 api_keys_collection = mongo_db["api_keys"]
 plans_collection      = mongo_db["plans"]
 settings_collection = mongo_db["settings"]
+messages_collection   = mongo_db["messages"]
 
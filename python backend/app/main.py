@@ -1,7 +1,8 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-import logging, os
+from pymongo.errors import DuplicateKeyError
+import asyncio, logging, os
 
 # ─── Route modules ──────────────────────────────────────────
 from app.api import (
@@ -15,21 +16,68 @@ from app.api import (
     routes_chat,
     routes_plans,
     routes_settings,  # NEW: Added for settings endpoints
+    routes_vector_stores,
+    routes_messages,
+    routes_logs,
+    routes_usage,
+    routes_conversations,
+    routes_batches,
+    routes_jobs,
 )
 
 # ─── DB client ──────────────────────────────────────────────
-from app.database.mongo import get_mongo_client
+from app.database.async_mongo import get_async_mongo_client
+from app.database.indexes import duplicate_key_detail, run_migrations
+
+# ─── Services ───────────────────────────────────────────────
+from app.agent.client_pool import openai_client_pool
+from app.agents.tool_executor import tool_executor
+from app.services.agent_cache import agent_cache
+from app.services.agent_search import agent_search
+from app.services.batch_runner import batch_runner
+from app.services.conversation_store import conversation_store
+from app.services import job_handlers  # noqa: F401  (registers the job kinds)
+from app.services.job_queue import job_queue
+from app.services import auth_service
+from app.services.rate_limiter import RateLimitMiddleware
+from app.services.password_service import password_hasher
+from app.services.response_cache import response_cache
+from app.services.run_log import run_log
+from app.services.usage_meter import usage_meter
+from app.utils.loop_watchdog import loop_watchdog
+from app.utils.metrics import MetricsMiddleware, cache_stats, render_metrics
+from app.utils.tracing import TraceContextFilter, TracingMiddleware, setup_tracing
+from app.config import settings
 
 # ─── Logging ────────────────────────────────────────────────
-logging.basicConfig(level=logging.DEBUG if os.getenv("DEBUG", "False").lower() == "true" else logging.INFO)
+logging.basicConfig(
+    level=logging.DEBUG if os.getenv("DEBUG", "False").lower() == "true" else logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s [trace=%(trace_id)s span=%(span_id)s] - %(message)s",
+)
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceContextFilter())
 logger = logging.getLogger(__name__)
 
+# ─── Tracing ────────────────────────────────────────────────
+tracer_provider = setup_tracing()
+
 app = FastAPI(
     title="StartupCopilot API",
     version="1.0.0",
     description="AI agent backend to support startups and enterprise workflows",
 )
 
+# ─── Rate limiting (added first so CORS headers wrap 429s) ──
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+# ─── Metrics: cache hit ratios are read from each cache at scrape time ──
+if settings.METRICS_ENABLED:
+    cache_stats.register("agents", agent_cache.stats)
+    cache_stats.register("tool_results", tool_executor.cache.stats)
+    cache_stats.register("responses", lambda: response_cache.stats()["exact"])
+    cache_stats.register("auth_principals", auth_service._principal_cache.stats)
+
 # ─── CORS (tightened for localhost frontend) ────────────────
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +85,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Trace-Id"],
 )
 
 # ─── Custom exception handlers ──────────────────────────────
@@ -49,6 +98,17 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
         headers={"Access-Control-Allow-Origin": "http://localhost:5173"},
     )
 
+@app.exception_handler(DuplicateKeyError)
+async def duplicate_key_exception_handler(request: Request, exc: DuplicateKeyError):
+    # Unique indexes back the name checks in create routes and also catch renames and races
+    detail = duplicate_key_detail(exc)
+    logger.info(f"Duplicate key rejected: {detail}")
+    return JSONResponse(
+        status_code=409,
+        content={"detail": detail},
+        headers={"Access-Control-Allow-Origin": "http://localhost:5173"},
+    )
+
 @app.exception_handler(Exception)
 async def custom_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
@@ -65,6 +125,8 @@ app.include_router(routes_agents.router,    prefix="/api/admin/agents", tags=["A
 app.include_router(routes_flows.router,     prefix="/api/admin/flows",  tags=["Flows"])
 app.include_router(routes_users.router,     prefix="/api/admin/users",  tags=["Users (Admin)"])
 app.include_router(routes_tools.router,     prefix="/api/admin/tools",  tags=["Tools"])
+app.include_router(routes_vector_stores.router, prefix="/api/admin/vector-stores", tags=["Vector Stores"])
+app.include_router(routes_usage.router,     prefix="/api/admin/usage",  tags=["Usage"])
 
 ## General / public
 app.include_router(routes_auth.router,      prefix="/api", tags=["Auth"])
@@ -74,26 +136,82 @@ app.include_router(routes_chat.router,      prefix="/api", tags=["Chat"])
 app.include_router(routes_users.router,     prefix="/api", tags=["Users"])
 app.include_router(routes_plans.router,     prefix="/api", tags=["Plans"])
 app.include_router(routes_settings.router,  prefix="/api", tags=["Settings"])  # NEW: Settings router
+app.include_router(routes_messages.router)  # prefix /api/messages set on the router
+app.include_router(routes_logs.router)      # prefix /api/admin/logs set on the router
+app.include_router(routes_conversations.router)  # prefix /api/conversations set on the router
+app.include_router(routes_batches.router)   # full /api/admin/... paths set on the routes
+app.include_router(routes_jobs.router)      # prefix /api/admin/jobs set on the router
 
 # ─── Lifecycle hooks ───────────────────────────────────────
 @app.on_event("startup")
 async def startup_event():
-    db = get_mongo_client()
-    collections = db.list_collection_names()
+    db = get_async_mongo_client()
+    collections = await db.list_collection_names()
     if "plans" not in collections:
-        db.create_collection("plans")  # Ensure singleton init
+        await db.create_collection("plans")  # Ensure singleton init
     if "settings" not in collections:
-        db.create_collection("settings")  # NEW: Ensure settings collection
+        await db.create_collection("settings")  # NEW: Ensure settings collection
+
+    if settings.MONGO_MIGRATE_ON_STARTUP:
+        await run_migrations(db, explain=settings.MONGO_EXPLAIN_ON_STARTUP)
+
+    run_log.start()
+    usage_meter.start()
+    await agent_search.load()
+    if settings.AGENT_SEARCH_REFRESH_SECONDS > 0:
+        app.state.agent_search_refresher = asyncio.create_task(
+            agent_search.refresh_forever(settings.AGENT_SEARCH_REFRESH_SECONDS)
+        )
+
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+    if settings.AGENT_CACHE_CHANGE_STREAMS:
+        app.state.agent_cache_watcher = asyncio.create_task(agent_cache.watch_changes())
+
+    if settings.BATCH_RESUME_ON_STARTUP:
+        await batch_runner.resume_interrupted()
+
+    if settings.JOB_WORKERS_ENABLED:
+        job_queue.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    get_mongo_client().close()
+    for name in ("agent_cache_watcher", "agent_search_refresher"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    await job_queue.stop()
+    await batch_runner.stop()
+    await conversation_store.aclose()
+    await run_log.stop()
+    await usage_meter.stop()
+    await loop_watchdog.stop()
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+    get_async_mongo_client().client.close()
+    await openai_client_pool.aclose()
+    password_hasher.shutdown()
 
 # ─── Healthcheck ────────────────────────────────────────────
 @app.get("/")
 def read_root():
     return {"message": "🚀 StartupCopilot API is running!"}
 
+# ─── Prometheus ─────────────────────────────────────────────
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Added last so they are outermost and cover CORS and rate limiting too
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="debug")
\ No newline at end of file
@@ -23,6 +23,9 @@ class AgentBase(BaseModel):
     model: Optional[str] = "gpt-4o-mini"      # defaults; override per-agent if desired
     model_settings: Dict[str, Any] = Field(default_factory=dict)
 
+    # Opt-in response cache: {"enabled", "semantic", "threshold", "ttl"}
+    response_cache: Dict[str, Any] = Field(default_factory=dict)
+
     # Relationships
     handoffs: List[str] = []                  # list of Handoff IDs
     flow_ids: List[str] = []                  # list of Flow IDs
@@ -54,6 +57,7 @@ class AgentUpdate(BaseModel):
 
     model: Optional[str] = None
     model_settings: Optional[Dict[str, Any]] = None
+    response_cache: Optional[Dict[str, Any]] = None
 
     handoffs: Optional[List[str]] = None
     flow_ids: Optional[List[str]] = None
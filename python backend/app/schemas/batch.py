@@ -0,0 +1,20 @@
+# app/schemas/batch.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class BatchOut(BaseModel):
+    id: str
+    agent_id: str
+    status: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    max_attempts: int
+    error: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,30 @@
+# app/schemas/conversation.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ConversationCreate(BaseModel):
+    agent_id: str
+    title: Optional[str] = None
+
+class ConversationOut(BaseModel):
+    id: str
+    agent_id: str
+    title: Optional[str] = None
+    turn_count: int = 0
+    summary: Optional[str] = None
+    summary_through: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class ConversationTurnOut(BaseModel):
+    id: str
+    turn: int
+    input: str
+    output: str
+    tokens: int = 0
+    created_at: Optional[datetime] = None
+
+class ConversationInput(BaseModel):
+    input: str
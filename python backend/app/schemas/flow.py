@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Any
 from datetime import datetime
 
 # ─────────────────────────────────────────────
@@ -33,3 +33,26 @@ class FlowOut(FlowBase):
 
     class Config:
         from_attributes = True
+
+# ─────────────────────────────────────────────
+# Run Schemas
+# ─────────────────────────────────────────────
+class FlowRunRequest(BaseModel):
+    input: str
+    agent_id: Optional[str] = None  # default agent for prompt nodes without one
+
+class FlowNodeResult(BaseModel):
+    id: str
+    kind: Optional[str] = None
+    status: str                     # success | error | skipped
+    output: Optional[Any] = None
+    error: Optional[str] = None
+    started_ms: Optional[float] = None
+    duration_ms: Optional[float] = None
+
+class FlowRunOut(BaseModel):
+    flow_id: str
+    status: str
+    output: Optional[Any] = None
+    total_ms: float
+    nodes: List[FlowNodeResult]
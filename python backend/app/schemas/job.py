@@ -0,0 +1,28 @@
+# app/schemas/job.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str                     # queued | running | succeeded | cancelled | dead
+    payload: Dict[str, Any] = {}
+    attempts: int = 0
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    worker: Optional[str] = None
+    created_by: Optional[str] = None
+    run_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
@@ -1,6 +1,6 @@
 # app/schemas/log.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any
 from datetime import datetime
 
 class LogBase(BaseModel):
@@ -17,4 +17,24 @@ class LogOut(LogBase):
     timestamp: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# ─────────────────────────────────────────────
+# Agent run history (Mongo `run_logs`)
+# ─────────────────────────────────────────────
+class RunLogOut(BaseModel):
+    id: str
+    agent_id: str
+    model: Optional[str] = None
+    source: Optional[str] = None
+    caller: Optional[str] = None
+    input: Optional[str] = None
+    output: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    usage: Optional[Dict[str, int]] = None
+    cache: Optional[Dict[str, Any]] = None
+    conversation_id: Optional[str] = None
+    created_at: datetime
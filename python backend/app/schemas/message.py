@@ -0,0 +1,25 @@
+# app/schemas/message.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class MessageCreate(BaseModel):
+    text: str
+    email: Optional[str] = None        # logged-in sender
+    session_id: Optional[str] = None   # anonymous sender
+    plan: Optional[str] = "free"
+    agent_id: Optional[str] = None
+
+class MessageOut(MessageCreate):
+    id: str
+    is_user: bool = True
+    created_at: Optional[datetime] = None
+
+class MessageUsage(BaseModel):
+    identifier: str
+    plan: Optional[str] = None
+    month: int
+    day: int
+    monthly_limit: Optional[int] = None
+    daily_limit: Optional[int] = None
@@ -11,6 +11,10 @@ class PlanBase(BaseModel):
     price: Optional[float] = Field(None, description="Price in USD", ge=0)
     rate_limit: Optional[int] = Field(None, description="Requests per minute", ge=0)
     daily_limit: Optional[int] = Field(None, description="Daily request limit (null for unlimited)", ge=0)
+    monthly_message_limit: Optional[int] = Field(None, description="Chat messages per month (null for unlimited)", ge=0)
+    daily_message_limit: Optional[int] = Field(None, description="Chat messages per day (null for unlimited)", ge=0)
+    daily_token_limit: Optional[int] = Field(None, description="LLM tokens per day (null for unlimited)", ge=0)
+    monthly_token_limit: Optional[int] = Field(None, description="LLM tokens per month (null for unlimited)", ge=0)
     features: List[str] = Field(default_factory=list, description="List of plan features")
     is_popular: bool = Field(False, description="Mark as popular plan")
     cta: Optional[str] = Field(None, description="Call-to-action label, e.g., 'Upgrade now'")
@@ -31,6 +35,10 @@ class PlanUpdate(BaseModel):
     price: Optional[float] = Field(None, description="Price in USD", ge=0)
     rate_limit: Optional[int] = Field(None, description="Requests per minute", ge=0)
     daily_limit: Optional[int] = Field(None, description="Daily request limit (null for unlimited)", ge=0)
+    monthly_message_limit: Optional[int] = Field(None, description="Chat messages per month (null for unlimited)", ge=0)
+    daily_message_limit: Optional[int] = Field(None, description="Chat messages per day (null for unlimited)", ge=0)
+    daily_token_limit: Optional[int] = Field(None, description="LLM tokens per day (null for unlimited)", ge=0)
+    monthly_token_limit: Optional[int] = Field(None, description="LLM tokens per month (null for unlimited)", ge=0)
     features: Optional[List[str]] = Field(None, description="List of plan features")
     is_popular: Optional[bool] = Field(None, description="Mark as popular plan")
     cta: Optional[str] = Field(None, description="Call-to-action label, e.g., 'Upgrade now'")
@@ -0,0 +1,67 @@
+# app/schemas/vector_store.py
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+# ─────────────────────────────────────────────
+# Store Schemas
+# ─────────────────────────────────────────────
+class VectorStoreCreate(BaseModel):
+    name: str
+    openai_api_key_id: Optional[str] = None   # falls back to OPENAI_API_KEY
+    embedding_model: Optional[str] = None     # falls back to EMBEDDING_MODEL
+
+class VectorStoreOut(BaseModel):
+    id: str
+    name: str
+    openai_api_key_id: Optional[str] = None
+    embedding_model: str
+    dim: Optional[int] = None
+    file_counts: Dict[str, int] = Field(default_factory=dict)
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+# ─────────────────────────────────────────────
+# Ingestion Schemas
+# ─────────────────────────────────────────────
+class ChunkingStrategy(BaseModel):
+    max_chunk_size_tokens: int = Field(800, ge=50, le=4096)
+    chunk_overlap_tokens: int = Field(400, ge=0)
+
+class VectorStoreDocument(BaseModel):
+    text: str
+    file_id: Optional[str] = None
+    filename: Optional[str] = None
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+
+class VectorStoreIngest(BaseModel):
+    documents: List[VectorStoreDocument]
+    chunking_strategy: ChunkingStrategy = Field(default_factory=ChunkingStrategy)
+
+class VectorStoreIngestOut(BaseModel):
+    file_ids: List[str]
+    chunks: int
+    file_counts: Dict[str, int]
+
+# ─────────────────────────────────────────────
+# Search Schemas
+# ─────────────────────────────────────────────
+class VectorStoreSearch(BaseModel):
+    query: str
+    max_num_results: Optional[int] = Field(None, ge=1, le=50)
+    ranking_options: Optional[Dict[str, Any]] = None
+    filters: Optional[Dict[str, Any]] = None
+
+class VectorStoreSearchResult(BaseModel):
+    vector_store_id: Optional[str] = None
+    file_id: Optional[str] = None
+    filename: Optional[str] = None
+    score: float
+    text: str
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+
+class VectorStoreSearchOut(BaseModel):
+    query: str
+    results: List[VectorStoreSearchResult]
+    took_ms: float
@@ -0,0 +1,103 @@
+# app/services/agent_cache.py
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+
+from app.agent.base import Agent
+from app.config import settings
+from app.database.async_mongo import agents_collection, api_keys_collection
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Agent fields that change what a run answers; hashed into the response cache key
+BEHAVIOR_FIELDS = ("version", "model", "instructions", "model_settings", "tools", "guardrails", "handoffs")
+
+
+@dataclass
+class CachedAgent:
+    agent: Agent
+    version: Optional[str]
+    api_key_id: Optional[str]
+    instructions_version: str = ""
+    response_cache: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_doc(cls, agent_doc: dict, agent: Agent) -> "CachedAgent":
+        fingerprint = json.dumps({k: agent_doc.get(k) for k in BEHAVIOR_FIELDS}, sort_keys=True, default=str)
+        return cls(
+            agent=agent,
+            version=agent_doc.get("version"),
+            api_key_id=agent_doc.get("openai_api_key_id"),
+            instructions_version=hashlib.sha1(fingerprint.encode()).hexdigest()[:12],
+            response_cache=agent_doc.get("response_cache") or {},
+        )
+
+
+class AgentCache:
+    """
+    Fully built agents keyed by agent id, so hot agents run without touching
+    the `agents` / `api_keys` collections.
+
+    Each entry records the agent version and the API key it was built with.
+    Entries are dropped on TTL/LRU eviction, when the agent document changes,
+    or when its API key is updated or deleted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, agent_id: str) -> Optional[CachedAgent]:
+        return self._cache.get(agent_id)
+
+    def put(self, agent_id: str, entry: CachedAgent):
+        self._cache.set(agent_id, entry)
+
+    def invalidate(self, agent_id: str):
+        if self._cache.pop(str(agent_id)) is not None:
+            logger.debug(f"Invalidated cached agent {agent_id}")
+
+    def invalidate_api_key(self, api_key_id: str):
+        dropped = self._cache.pop_where(lambda _, entry: entry.api_key_id == str(api_key_id))
+        if dropped:
+            logger.debug(f"Invalidated {dropped} cached agent(s) using API key {api_key_id}")
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    # ─── Cross-process invalidation ──────────────────────────
+    async def watch_changes(self):
+        """
+        Follow MongoDB change streams on `agents` and `api_keys` so writes made
+        by other workers invalidate this process's cache too. Change streams
+        need a replica set; on a standalone server this logs and returns.
+        """
+        await asyncio.gather(
+            self._watch(agents_collection, self.invalidate),
+            self._watch(api_keys_collection, self.invalidate_api_key),
+        )
+
+    async def _watch(self, collection, invalidate):
+        try:
+            async with collection.watch() as stream:
+                async for change in stream:
+                    doc_id = change.get("documentKey", {}).get("_id")
+                    if doc_id is not None:
+                        invalidate(str(doc_id))
+        except PyMongoError as exc:
+            logger.warning(f"Change stream on '{collection.name}' unavailable: {exc}")
+
+
+agent_cache = AgentCache(
+    maxsize=settings.AGENT_CACHE_MAX_SIZE,
+    ttl=settings.AGENT_CACHE_TTL_SECONDS,
+)
@@ -1,11 +1,23 @@
-from typing import Optional
+from typing import Optional, AsyncIterator, Dict, Any, List
 from bson import ObjectId
 from fastapi import HTTPException
+from opentelemetry import trace
 from app.agent.base import Agent
 from app.agent.runner import Runner
-from app.database.mongo import agents_collection, api_keys_collection
+from app.agent.client_pool import openai_client_pool
+from app.agents.tools import get_tool_instance
+from app.database.async_mongo import agents_collection, api_keys_collection, tools_collection
+from app.services.agent_cache import agent_cache, CachedAgent
+from app.services.conversation_store import conversation_store, Session
+from app.services.response_cache import response_cache, CacheLookup
+from app.services.run_log import run_log
+from app.services.usage_meter import usage_meter
+from app.utils.tracing import end_span, traced, tracer
+import asyncio
 import inspect
+import json
 import logging
+import time
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,12 +27,13 @@ class AgentRunner:
         self.agents_collection = agents_collection
         self.api_keys_collection = api_keys_collection
 
+    @traced("agent.api_key_lookup")
     async def _get_openai_api_key(self, api_key_id: str | None) -> Optional[str]:
         if not api_key_id:
             logger.warning("No OpenAI API key ID provided")
             return None
         try:
-            doc = self.api_keys_collection.find_one({"_id": ObjectId(api_key_id)})
+            doc = await self.api_keys_collection.find_one({"_id": ObjectId(api_key_id)})
             if not doc:
                 logger.error(f"No API key found for ID: {api_key_id}")
                 return None
@@ -29,6 +42,23 @@ class AgentRunner:
             logger.error(f"Error fetching OpenAI key {api_key_id}: {exc}", exc_info=True)
             return None
 
+    async def _hosted_tools(self, tool_entries: List[str]) -> Dict[str, Any]:
+        """Build the executable hosted tools (file_search) among the agent's tool IDs."""
+        ids = [ObjectId(entry) for entry in tool_entries or [] if ObjectId.is_valid(entry)]
+        if not ids:
+            return {}
+        hosted = {}
+        async for doc in tools_collection.find({"_id": {"$in": ids}, "type": "hosted"}, {"name": 1, "config": 1}):
+            try:
+                cfg = json.loads(doc.get("config") or "{}")
+                if cfg.get("tool_name") == "FileSearchTool":
+                    tool = get_tool_instance("file_search", cfg)
+                    hosted[tool.name] = tool
+            except (ValueError, TypeError) as exc:
+                logger.error(f"Skipping hosted tool {doc.get('name')}: {exc}")
+        return hosted
+
+    @traced("agent.build")
     async def build_agent_from_model(self, agent_doc: dict) -> Agent:
         try:
             openai_api_key = await self._get_openai_api_key(agent_doc.get("openai_api_key_id"))
@@ -39,15 +69,18 @@ class AgentRunner:
             return Agent(
                 model=agent_doc.get("model", "gpt-4"),
                 api_key=openai_api_key,
+                client=openai_client_pool.get(openai_api_key),
                 system_prompt=agent_doc.get("instructions", ""),  # Use instructions as system prompt
                 tools=agent_doc.get("tools", []),
+                hosted_tools=await self._hosted_tools(agent_doc.get("tools", [])),
+                max_output_tokens=(agent_doc.get("model_settings") or {}).get("max_tokens"),
             )
         except Exception as exc:
             logger.error(f"Error building agent from model: {exc}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Failed to build agent: {exc}")
 
-    async def run_agent(self, agent_id: str, user_input: str) -> str:
-        logger.debug(f"Running agent with ID: {agent_id}, Input: {user_input}")
+    @traced("agent.load")
+    async def _load_agent(self, agent_id: str, user_input: str) -> CachedAgent:
         if not ObjectId.is_valid(agent_id):
             logger.error(f"Invalid agent ID: {agent_id}")
             raise HTTPException(status_code=400, detail="Invalid agent ID")
@@ -55,29 +88,205 @@ class AgentRunner:
             logger.error("Input is empty")
             raise HTTPException(status_code=400, detail="Input must be non-empty")
 
-        agent_doc = self.agents_collection.find_one({"_id": ObjectId(agent_id)})
+        entry = agent_cache.get(agent_id)
+        trace.get_current_span().set_attribute("agent.cache_hit", entry is not None)
+        if entry is not None:
+            return entry
+
+        agent_doc = await self.agents_collection.find_one({"_id": ObjectId(agent_id)})
         if not agent_doc:
             logger.error(f"Agent not found for ID: {agent_id}")
             raise HTTPException(status_code=404, detail="Agent not found")
 
         agent = await self.build_agent_from_model(agent_doc)
+        entry = CachedAgent.from_doc(agent_doc, agent)
+        agent_cache.put(agent_id, entry)
+        return entry
+
+    def _log_run(self, agent_id: str, entry: CachedAgent, user_input: str, output: Optional[str],
+                 status: str, started: float, source: str, caller: Any = None, **extra: Any):
+        identity = getattr(caller, "identity", None)
+        run_log.record(
+            agent_id=agent_id,
+            model=entry.agent.model,
+            source=source,
+            caller=identity,
+            input=user_input,
+            output=output,
+            status=status,
+            latency_ms=round((time.perf_counter() - started) * 1000, 2),
+            **extra,
+        )
+        # Cache hits cost nothing upstream, so only real model calls are metered
+        if extra.get("usage"):
+            usage_meter.record(
+                entry.agent.model,
+                extra["usage"],
+                agent=agent_id,
+                api_key=entry.api_key_id,
+                user=identity,
+                plan=getattr(caller, "plan", None) or ("anonymous" if identity else None),
+            )
+
+    async def _load_session(self, conversation_id: Optional[str], agent_id: str, caller: Any) -> Optional[Session]:
+        if not conversation_id:
+            return None
+        session = await conversation_store.session(conversation_id, caller)
+        if session.agent_id != agent_id:
+            raise HTTPException(status_code=400, detail="Conversation belongs to a different agent")
+        return session
+
+    @traced("agent.execute")
+    async def execute(self, agent_id: str, user_input: str, source: str = "run",
+                      caller: Any = None, conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run an agent and return {"output": str, "metadata": {...}}.
+        Metadata reports response-cache hits for agents that opted in.
+        Every run is recorded in the background run log and metered against
+        `caller` (the rate limiter's CallerPlan) when given.
+        With `conversation_id`, the conversation's history is sent along and
+        the turn is appended to it (the response cache is bypassed).
+        """
+        logger.debug(f"Running agent with ID: {agent_id}, Input: {user_input}")
+        trace.get_current_span().set_attributes({"agent.id": agent_id, "agent.source": source})
+        started = time.perf_counter()
+        await usage_meter.check_token_budget(caller)
+        entry = await self._load_agent(agent_id, user_input)
+        session = await self._load_session(conversation_id, agent_id, caller)
+        cache_cfg = entry.response_cache
+        metadata: Dict[str, Any] = {}
+        extra = {"conversation_id": conversation_id} if session else {}
+
+        lookup = None
+        if cache_cfg.get("enabled") and session is None:
+            lookup = await response_cache.lookup(
+                agent_id, entry.instructions_version, user_input, cache_cfg, entry.agent.client
+            )
+            if lookup.hit:
+                metadata["cache"] = {
+                    "hit": True,
+                    "tier": lookup.tier,
+                    "similarity": lookup.similarity,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                }
+                self._log_run(agent_id, entry, user_input, lookup.output, "success", started, source, caller,
+                              cache=metadata["cache"])
+                return {"output": lookup.output, "metadata": metadata}
+            metadata["cache"] = {"hit": False}
 
         try:
-            result = Runner.run(agent, input=user_input)
+            history = conversation_store.history(session) if session else None
+            result = await Runner.run(entry.agent, input=user_input, history=history)
             if inspect.isawaitable(result):
                 result = await result
 
+            usage = None
             if isinstance(result, dict):
                 output = result.get("final_output", "[No output]")
+                status = result.get("status", "success")
+                usage = result.get("usage")
             else:
                 output = getattr(result, "final_output", "[No output]")
+                status = "success"
 
             logger.debug(f"Agent output: {output}")
-            return str(output)
+            if usage:
+                metadata["usage"] = usage
+            if status != "success":
+                metadata["status"] = status
+                metadata["error"] = result.get("error") if isinstance(result, dict) else None
+            self._log_run(agent_id, entry, user_input, str(output), status, started, source, caller,
+                          usage=usage, error=result.get("error") if isinstance(result, dict) else None, **extra)
+            if session is not None and status == "success":
+                turn = await conversation_store.append(
+                    session, user_input, str(output), client=entry.agent.client, model=entry.agent.model
+                )
+                metadata["conversation"] = {"id": conversation_id, "turn": turn.n}
+            if lookup is not None and status == "success" and output:
+                response_cache.store(
+                    agent_id, entry.instructions_version, user_input, str(output), cache_cfg,
+                    embedding=lookup.embedding,
+                )
+            return {"output": str(output), "metadata": metadata}
         except HTTPException:
             raise
         except Exception as exc:
             logger.error(f"Agent execution failed for ID {agent_id}: {exc}", exc_info=True)
-            import traceback
-            traceback.print_exc()
-            raise HTTPException(status_code=500, detail=f"Agent execution failed: {exc}")
\ No newline at end of file
+            self._log_run(agent_id, entry, user_input, None, "error", started, source, caller, error=str(exc), **extra)
+            raise HTTPException(status_code=500, detail=f"Agent execution failed: {exc}")
+
+    async def run_agent(self, agent_id: str, user_input: str, source: str = "run", caller: Any = None) -> str:
+        result = await self.execute(agent_id, user_input, source=source, caller=caller)
+        return result["output"]
+
+    async def stream_agent(self, agent_id: str, user_input: str, source: str = "stream",
+                           caller: Any = None, conversation_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Resolve the agent up front (so lookup errors surface as normal HTTP
+        errors) and return an async iterator over the model's output deltas.
+        With `conversation_id`, the turn is appended once the stream completes.
+        """
+        logger.debug(f"Streaming agent with ID: {agent_id}, Input: {user_input}")
+        trace.get_current_span().set_attributes({"agent.id": agent_id, "agent.source": source})
+        started = time.perf_counter()
+        await usage_meter.check_token_budget(caller)
+        entry = await self._load_agent(agent_id, user_input)
+        session = await self._load_session(conversation_id, agent_id, caller)
+        cache_cfg = entry.response_cache
+
+        lookup = None
+        if cache_cfg.get("enabled") and session is None:
+            lookup = await response_cache.lookup(
+                agent_id, entry.instructions_version, user_input, cache_cfg, entry.agent.client
+            )
+            if lookup.hit:
+                self._log_run(agent_id, entry, user_input, lookup.output, "success", started, source, caller,
+                              cache={"hit": True, "tier": lookup.tier, "similarity": lookup.similarity})
+                return self._replay(lookup.output)
+        return self._stream(agent_id, entry, user_input, lookup, started, source, caller, session)
+
+    @staticmethod
+    async def _replay(output: str) -> AsyncIterator[str]:
+        yield output
+
+    async def _stream(self, agent_id: str, entry: CachedAgent, user_input: str,
+                      lookup: Optional[CacheLookup], started: float, source: str,
+                      caller: Any = None, session: Optional[Session] = None) -> AsyncIterator[str]:
+        parts = []
+        usage: Dict[str, int] = {}
+        status, error, ttft_ms = "success", None, None
+        failure: Optional[BaseException] = None
+        span = tracer.start_span("agent.stream", attributes={"agent.id": agent_id, "agent.source": source})
+        history = conversation_store.history(session) if session else None
+        extra = {"conversation_id": session.id} if session else {}
+        chunks = Runner.run_streamed(entry.agent, input=user_input, usage=usage, history=history)
+        try:
+            async for delta in chunks:
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 2)
+                parts.append(delta)
+                yield delta
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        except Exception as exc:
+            status, error, failure = "error", str(exc), exc
+            raise
+        finally:
+            await chunks.aclose()
+            span.set_attribute("agent.status", status)
+            if ttft_ms is not None:
+                span.set_attribute("agent.ttft_ms", ttft_ms)
+            end_span(span, failure)
+            self._log_run(agent_id, entry, user_input, "".join(parts), status, started, source, caller,
+                          usage=usage or None, error=error, ttft_ms=ttft_ms, **extra)
+        # Only reached when the stream ran to completion
+        if session is not None and parts:
+            await conversation_store.append(
+                session, user_input, "".join(parts), client=entry.agent.client, model=entry.agent.model
+            )
+        if lookup is not None and parts:
+            response_cache.store(
+                agent_id, entry.instructions_version, user_input, "".join(parts), entry.response_cache,
+                embedding=lookup.embedding,
+            )
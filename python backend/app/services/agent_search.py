@@ -0,0 +1,223 @@
+# app/services/agent_search.py
+
+import asyncio
+import hashlib
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.agent.client_pool import openai_client_pool
+from app.agent.embeddings import embed_texts
+from app.config import settings
+from app.database.async_mongo import agents_collection
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Field weights for the BM25F-style term frequency
+FIELD_WEIGHTS = {"name": 3.0, "description": 2.0, "instructions": 1.0}
+
+# Fields kept in memory and returned with each hit
+RESULT_FIELDS = ("name", "description", "instructions", "type", "tools", "guardrails")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+
+class AgentSearchIndex:
+    """
+    In-process BM25 inverted index over agent name/description/instructions.
+
+    Kept in sync by the agent routes (upsert/remove) and by a periodic full
+    reload so writes from other workers show up too. Optionally blends in
+    cosine similarity from agent embeddings for hybrid ranking. Embeddings
+    are refreshed in the background (only changed agents are re-embedded,
+    keyed by content hash) once semantic search has been used, so a query
+    only embeds its own text; until the first refresh lands, ranking is
+    BM25 only.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._terms: Dict[str, Dict[str, float]] = {}
+        self._lengths: Dict[str, float] = {}
+        self._docs: Dict[str, dict] = {}
+        self._total_length = 0.0
+        self._embeddings: Dict[str, tuple] = {}   # agent_id -> (content hash, vector)
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None   # (agent ids, stacked vectors)
+        self._embed_task: Optional[asyncio.Task] = None
+        self._embed_again = False
+        self._semantic_used = False
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ─── Maintenance ─────────────────────────────────────────
+    def upsert(self, agent_doc: dict):
+        agent_id = str(agent_doc.get("_id") or agent_doc.get("id"))
+        self.remove(agent_id)
+
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(agent_doc.get(field)):
+                weighted[term] += weight
+        self._docs[agent_id] = {field: agent_doc.get(field) for field in RESULT_FIELDS}
+        self._terms[agent_id] = dict(weighted)
+        length = sum(weighted.values())
+        self._lengths[agent_id] = length
+        self._total_length += length
+        for term, tf in weighted.items():
+            self._postings[term][agent_id] = tf
+        self._schedule_embeddings()
+
+    def remove(self, agent_id: str):
+        terms = self._terms.pop(agent_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(agent_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(agent_id, 0.0)
+        self._docs.pop(agent_id, None)
+        self._schedule_embeddings()
+
+    async def load(self):
+        """(Re)build the index from MongoDB."""
+        projection = {field: 1 for field in RESULT_FIELDS}
+        docs = await agents_collection.find({}, projection).to_list(length=None)
+        fresh = AgentSearchIndex(self.k1, self.b)
+        for doc in docs:
+            fresh.upsert(doc)
+        # Swap state in one step so concurrent searches never see a half-built index
+        self._postings, self._terms, self._lengths = fresh._postings, fresh._terms, fresh._lengths
+        self._docs, self._total_length = fresh._docs, fresh._total_length
+        self.loaded = True
+        self._schedule_embeddings()
+        logger.debug(f"Agent search index loaded with {len(docs)} agents")
+
+    async def refresh_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception as exc:
+                logger.warning(f"Agent search index refresh failed: {exc}")
+
+    # ─── Querying ────────────────────────────────────────────
+    def _bm25(self, terms: List[str]) -> Dict[str, float]:
+        n_docs = len(self._docs)
+        if not n_docs:
+            return {}
+        avg_len = self._total_length / n_docs or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(terms):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for agent_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[agent_id] / avg_len)
+                scores[agent_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    # ─── Embeddings ──────────────────────────────────────────
+    def _schedule_embeddings(self):
+        """Refresh agent embeddings in the background (one refresh at a time)."""
+        if not self._semantic_used:
+            return
+        if self._embed_task is not None and not self._embed_task.done():
+            self._embed_again = True  # picked up when the running refresh ends
+            return
+        try:
+            self._embed_task = asyncio.get_running_loop().create_task(self._embed_forever())
+        except RuntimeError:
+            pass  # no event loop (e.g. a script); the next load() schedules it
+
+    async def _embed_forever(self):
+        while True:
+            self._embed_again = False
+            try:
+                await self._refresh_embeddings()
+            except Exception as exc:
+                logger.warning(f"Embedding agents for semantic search failed: {exc}")
+                return
+            if not self._embed_again:
+                return
+
+    async def _refresh_embeddings(self):
+        client = openai_client_pool.get(settings.OPENAI_API_KEY)
+        docs = dict(self._docs)
+        stale = []
+        for agent_id, doc in docs.items():
+            text = "\n".join(str(doc.get(field) or "") for field in FIELD_WEIGHTS)
+            digest = hashlib.sha1(text.encode()).hexdigest()
+            cached = self._embeddings.get(agent_id)
+            if cached is None or cached[0] != digest:
+                stale.append((agent_id, digest, text))
+        for start in range(0, len(stale), 256):
+            batch = stale[start:start + 256]
+            vectors = await embed_texts(client, [text for _, _, text in batch])
+            for (agent_id, digest, _), vector in zip(batch, vectors):
+                self._embeddings[agent_id] = (digest, vector)
+        self._embeddings = {a: e for a, e in self._embeddings.items() if a in docs}
+        ids = list(self._embeddings)
+        self._matrix = (ids, np.stack([self._embeddings[a][1] for a in ids])) if ids else None
+
+    async def _semantic(self, query: str) -> Dict[str, float]:
+        if not self._semantic_used:
+            self._semantic_used = True
+            self._schedule_embeddings()
+        matrix = self._matrix
+        if matrix is None:
+            return {}
+        ids, vectors = matrix
+        client = openai_client_pool.get(settings.OPENAI_API_KEY)
+        query_vector = (await embed_texts(client, [query]))[0]
+        return {agent_id: sim for agent_id, sim in zip(ids, (vectors @ query_vector).tolist()) if agent_id in self._docs}
+
+    async def search(self, query: str, limit: int = 5, semantic: bool = False,
+                     alpha: float = 0.5) -> List[dict]:
+        """
+        Rank agents for `query`. With `semantic`, the score is
+        alpha * (BM25 / max BM25) + (1 - alpha) * cosine similarity.
+        """
+        if not self.loaded:
+            await self.load()
+
+        scores = self._bm25(tokenize(query))
+        if semantic:
+            try:
+                cosine = await self._semantic(query)
+            except Exception as exc:
+                logger.warning(f"Semantic agent search unavailable, using BM25 only: {exc}")
+                cosine = {}
+            if cosine:
+                top = max(scores.values(), default=0.0) or 1.0
+                # Agents added since the last embedding refresh keep their BM25 share
+                scores = {
+                    agent_id: alpha * scores.get(agent_id, 0.0) / top + (1 - alpha) * cosine.get(agent_id, 0.0)
+                    for agent_id in cosine.keys() | scores.keys()
+                }
+
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {"id": agent_id, "score": round(score, 4), **self._docs[agent_id]}
+            for agent_id, score in ranked
+            if agent_id in self._docs
+        ]
+
+
+agent_search = AgentSearchIndex()
@@ -2,11 +2,13 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 import logging
 
-from app.database.mongo import get_mongo_client
+from app.database.async_mongo import users_collection
 from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.constants import ROLE_ADMIN
+from app.services.password_service import password_hasher
 
 # ─────────────────────────────────────────────────────────────
 # Logging Configuration
@@ -14,11 +16,6 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-# ─────────────────────────────────────────────────────────────
-# Password Hashing Context (bcrypt)
-# ─────────────────────────────────────────────────────────────
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # ─────────────────────────────────────────────────────────────
 # JWT Configuration
 # ─────────────────────────────────────────────────────────────
@@ -26,6 +23,21 @@ SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# ─────────────────────────────────────────────────────────────
+# Verified Principal Cache
+# ─────────────────────────────────────────────────────────────
+# Active admin documents keyed by email, so a burst of admin API calls
+# costs one users lookup per TTL instead of one per request. Entries are
+# dropped explicitly when a user is updated or deleted.
+_principal_cache = TTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL,
+)
+
+def invalidate_principal(email: str):
+    if email:
+        _principal_cache.pop(email)
+
 # ─────────────────────────────────────────────────────────────
 # OAuth2 Password Bearer Dependency
 # ─────────────────────────────────────────────────────────────
@@ -43,11 +55,10 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 # ─────────────────────────────────────────────────────────────
 # Admin Authenticator
 # ─────────────────────────────────────────────────────────────
-def authenticate_admin(username: str, password: str):
-    db = get_mongo_client()
+async def authenticate_admin(username: str, password: str):
     logger.debug(f"Querying users collection for email: '{username}', is_admin: true, is_active: true")
     
-    admin = db["users"].find_one({
+    admin = await users_collection.find_one({
         "email": username,
         "is_admin": True,
         "is_active": True
@@ -57,7 +68,7 @@ def authenticate_admin(username: str, password: str):
         logger.debug("No active admin user found with given email")
         return None
 
-    if not pwd_context.verify(password, admin["password"]):
+    if not await password_hasher.verify(password, admin["password"]):
         logger.debug(f"Password verification failed for {admin['email']}")
         return None
 
@@ -67,22 +78,30 @@ def authenticate_admin(username: str, password: str):
 # ─────────────────────────────────────────────────────────────
 # JWT Verifier
 # ─────────────────────────────────────────────────────────────
-def verify_token(token: str):
+async def verify_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
-        db = get_mongo_client()
-        user = db["users"].find_one({
-            "email": email,
-            "is_admin": True,
-            "is_active": True
-        })
+        if settings.AUTH_STATELESS_TOKENS:
+            # Trust the signed role claim until the token expires.
+            if payload.get("role") != ROLE_ADMIN:
+                raise HTTPException(status_code=401, detail="Active admin user not found")
+            return {"email": email, "is_admin": True, "is_active": True}
+
+        user = _principal_cache.get(email)
+        if user is None:
+            user = await users_collection.find_one({
+                "email": email,
+                "is_admin": True,
+                "is_active": True
+            }, {"password": 0})
 
-        if not user:
-            raise HTTPException(status_code=401, detail="Active admin user not found")
+            if not user:
+                raise HTTPException(status_code=401, detail="Active admin user not found")
+            _principal_cache.set(email, user)
         return user
 
     except JWTError as e:
@@ -92,5 +111,5 @@ def verify_token(token: str):
 # ─────────────────────────────────────────────────────────────
 # FastAPI Dependency: Get Current Admin User
 # ─────────────────────────────────────────────────────────────
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    return verify_token(token)
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await verify_token(token)
@@ -0,0 +1,394 @@
+# app/services/batch_runner.py
+
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.database.async_mongo import agents_collection, batch_items_collection, batch_jobs_collection
+from app.services.agent_runner import AgentRunner
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, COMPLETED, CANCELLED, FAILED = "queued", "running", "completed", "cancelled", "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Item statuses; a leased item is "running" until its lease expires and
+# "finishing" while its result and seq are being written
+PENDING, LEASED, FINISHING, DONE, ERROR = "pending", "running", "finishing", "done", "error"
+
+# Client errors are not worth retrying; everything else (429, 5xx, timeouts) is
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def parse_jsonl(lines: Iterable[bytes]) -> List[Dict[str, Any]]:
+    """
+    Parse batch input. Each non-blank line is either a JSON object with
+    "input" (and optionally "custom_id") or a bare JSON string.
+    """
+    items = []
+    for number, raw in enumerate(lines, start=1):
+        line = raw.decode("utf-8").strip() if isinstance(raw, bytes) else raw.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise HTTPException(status_code=400, detail=f"Line {number}: invalid JSON ({exc.msg})")
+        if isinstance(value, str):
+            value = {"input": value}
+        if not isinstance(value, dict) or not isinstance(value.get("input"), str) or not value["input"]:
+            raise HTTPException(status_code=400, detail=f"Line {number}: expected a string or an object with a non-empty \"input\"")
+        items.append({"input": value["input"], "custom_id": value.get("custom_id")})
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch contains no inputs")
+    return items
+
+
+class BatchRunner:
+    """
+    Offline agent batches. A job's inputs are stored as `batch_items`
+    (one document per line) and worked through by a bounded pool of
+    workers. Workers lease items one at a time with an atomic
+    find_one_and_update and persist each result right away, so an
+    interrupted job resumes with only its unfinished items, and several
+    processes can work on the same job without running an item twice
+    (an item whose worker died is picked up again when its lease expires).
+
+    Concurrency is capped globally (`max_concurrency`) and per upstream API
+    key (`per_key_concurrency`), so several jobs on the same key share that
+    key's quota instead of tripping its rate limits. Failed items are
+    retried with exponential backoff up to the job's `max_attempts`.
+
+    Each finished item gets the next value of the job's `seq` counter, which
+    lets results be streamed in completion order while the job is running.
+    """
+
+    def __init__(self, jobs, items, max_concurrency: int, per_key_concurrency: int, default_attempts: int,
+                 backoff_base: float, lease_seconds: float, poll_interval: float, insert_chunk: int = 1000):
+        self.jobs = jobs
+        self.items = items
+        self.per_key_concurrency = per_key_concurrency
+        self.default_attempts = default_attempts
+        self.backoff_base = backoff_base
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.insert_chunk = insert_chunk
+        self._runner = AgentRunner()
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_key: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+        self._leased: Set[ObjectId] = set()
+
+    # ─── Jobs ────────────────────────────────────────────────
+    async def create(self, agent_id: str, inputs: List[Dict[str, Any]], max_attempts: Optional[int] = None,
+                     created_by: Optional[str] = None) -> dict:
+        if not ObjectId.is_valid(agent_id):
+            raise HTTPException(status_code=400, detail="Invalid agent ID")
+        agent_doc = await agents_collection.find_one({"_id": ObjectId(agent_id)}, {"openai_api_key_id": 1})
+        if not agent_doc:
+            raise HTTPException(status_code=404, detail="Agent not found")
+
+        now = datetime.utcnow()
+        job = {
+            "agent_id": agent_id,
+            "api_key_id": agent_doc.get("openai_api_key_id"),
+            "status": QUEUED,
+            "total": len(inputs),
+            "completed": 0,
+            "failed": 0,
+            "seq": 0,
+            "max_attempts": max_attempts or self.default_attempts,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = await self.jobs.insert_one(job)
+        job["_id"] = result.inserted_id
+        for start in range(0, len(inputs), self.insert_chunk):
+            await self.items.insert_many([
+                {"job": job["_id"], "i": start + offset, "custom_id": item.get("custom_id"),
+                 "input": item["input"], "status": PENDING, "attempts": 0}
+                for offset, item in enumerate(inputs[start:start + self.insert_chunk])
+            ], ordered=False)
+        self.start(str(job["_id"]))
+        return job
+
+    async def get_doc(self, job_id: str) -> dict:
+        if not ObjectId.is_valid(job_id):
+            raise HTTPException(status_code=400, detail="Invalid batch ID")
+        job = await self.jobs.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        return job
+
+    async def cancel(self, job_id: str) -> dict:
+        job = await self.get_doc(job_id)
+        if job["status"] not in ACTIVE_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Batch is already {job['status']}")
+        self._cancelled.add(job_id)
+        await self._set_status(job["_id"], CANCELLED, finished_at=datetime.utcnow())
+        return await self.get_doc(job_id)
+
+    async def resume(self, job_id: str, retry_failed: bool = False) -> dict:
+        """Restart a cancelled/failed/interrupted job; optionally give failed items another go."""
+        job = await self.get_doc(job_id)
+        if job_id in self._tasks:
+            raise HTTPException(status_code=409, detail="Batch is already running")
+        if retry_failed:
+            result = await self.items.update_many(
+                {"job": job["_id"], "status": ERROR},
+                {"$set": {"status": PENDING, "attempts": 0}, "$unset": {"error": "", "seq": "", "lease_until": "", "outcome": ""}},
+            )
+            await self.jobs.update_one({"_id": job["_id"]}, {"$inc": {"failed": -result.modified_count}})
+        self._cancelled.discard(job_id)
+        await self._set_status(job["_id"], QUEUED)
+        self.start(job_id)
+        return await self.get_doc(job_id)
+
+    async def resume_interrupted(self):
+        """On startup: pick up jobs that were queued or running when the process stopped."""
+        async for job in self.jobs.find({"status": {"$in": list(ACTIVE_STATUSES)}}, {"_id": 1}):
+            logger.info(f"Resuming batch {job['_id']}")
+            self.start(str(job["_id"]))
+
+    def start(self, job_id: str):
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run_job(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def stop(self):
+        """Stop workers on shutdown and hand their in-flight items back for the next run."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._leased:
+            await self.items.update_many(
+                {"_id": {"$in": list(self._leased)}, "status": LEASED},
+                {"$set": {"status": PENDING}, "$unset": {"lease_until": ""}},
+            )
+            self._leased.clear()
+
+    async def _set_status(self, job_oid: ObjectId, status: str, **fields: Any):
+        await self.jobs.update_one(
+            {"_id": job_oid},
+            {"$set": {"status": status, "updated_at": datetime.utcnow(), **fields}},
+        )
+
+    # ─── Workers ─────────────────────────────────────────────
+    def _key_semaphore(self, api_key_id: Optional[str]) -> asyncio.Semaphore:
+        key = api_key_id or "default"
+        if key not in self._per_key:
+            self._per_key[key] = asyncio.Semaphore(self.per_key_concurrency)
+        return self._per_key[key]
+
+    @staticmethod
+    def _claimable(job_oid: ObjectId) -> Dict[str, Any]:
+        return {"job": job_oid, "$or": [
+            {"status": PENDING},
+            {"status": {"$in": [LEASED, FINISHING]}, "lease_until": {"$lt": datetime.utcnow()}},
+        ]}
+
+    async def _claim(self, job_oid: ObjectId) -> Optional[dict]:
+        """Lease the next pending item (or one whose previous worker died)."""
+        item = await self.items.find_one_and_update(
+            self._claimable(job_oid),
+            {"$set": {"status": LEASED, "lease_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+            sort=[("i", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if item is not None:
+            self._leased.add(item["_id"])
+        return item
+
+    async def _run_job(self, job_id: str):
+        job_oid = ObjectId(job_id)
+        try:
+            job = await self.jobs.find_one({"_id": job_oid})
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                return
+            await self._set_status(job_oid, RUNNING, started_at=job.get("started_at") or datetime.utcnow())
+            key_slots = self._key_semaphore(job.get("api_key_id"))
+            state = {"active": True, "checked": time.monotonic()}
+
+            async def still_active() -> bool:
+                # Cancellation may arrive through another process; re-read now and then
+                if state["active"] and time.monotonic() - state["checked"] > self.poll_interval:
+                    current = await self.jobs.find_one({"_id": job_oid}, {"status": 1})
+                    state["active"] = current is not None and current["status"] in ACTIVE_STATUSES
+                    state["checked"] = time.monotonic()
+                return state["active"] and job_id not in self._cancelled
+
+            async def worker():
+                while await still_active():
+                    async with key_slots, self._global:
+                        item = await self._claim(job_oid)
+                        if item is None:
+                            return
+                        await self._run_item(job, item)
+
+            while await still_active():
+                await asyncio.gather(*(worker() for _ in range(self.per_key_concurrency)))
+                unfinished = await self.items.count_documents(
+                    {"job": job_oid, "status": {"$nin": [DONE, ERROR]}}, limit=1,
+                )
+                if not unfinished:
+                    # Recount: a worker that died mid-finish may have bumped a counter twice
+                    completed = await self.items.count_documents({"job": job_oid, "status": DONE})
+                    failed = await self.items.count_documents({"job": job_oid, "status": ERROR})
+                    await self.jobs.update_one(
+                        {"_id": job_oid, "status": {"$in": list(ACTIVE_STATUSES)}},
+                        {"$set": {"status": COMPLETED, "completed": completed, "failed": failed,
+                                  "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+                    )
+                    logger.info(f"Batch {job_id} completed")
+                    return
+                # Remaining items are leased by another process; wait for them or their leases
+                await asyncio.sleep(self.poll_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(f"Batch {job_id} failed: {exc}", exc_info=True)
+            try:
+                await self._set_status(job_oid, FAILED, error=str(exc), finished_at=datetime.utcnow())
+            except PyMongoError:
+                pass
+        finally:
+            self._cancelled.discard(job_id)
+
+    async def _run_item(self, job: dict, item: dict):
+        if item.get("outcome") is not None:
+            # Its worker died while finishing; the result is known, only the bookkeeping is left
+            await asyncio.shield(self._finish(job, item, **item["outcome"]))
+            return
+        attempts = item.get("attempts", 0)
+        if attempts >= job["max_attempts"]:
+            # Claimed again after its worker died on the last attempt
+            await asyncio.shield(self._finish(job, item, error=item.get("error") or "Lease expired on the final attempt"))
+            return
+        error = None
+        while attempts < job["max_attempts"]:
+            attempts += 1
+            # Each attempt renews the lease, so slow retries are not picked up twice
+            await self.items.update_one({"_id": item["_id"]}, {"$set": {
+                "attempts": attempts,
+                "lease_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds),
+            }})
+            started = time.perf_counter()
+            try:
+                result = await self._runner.execute(job["agent_id"], item["input"], source="batch")
+            except HTTPException as exc:
+                error = str(exc.detail)
+                if exc.status_code < 500 and exc.status_code not in RETRYABLE_STATUS:
+                    break
+            except Exception as exc:
+                error = str(exc)
+            else:
+                metadata = result.get("metadata", {})
+                if metadata.get("status", "success") == "success":
+                    # Shielded: a seq taken from the job must end up on the item
+                    await asyncio.shield(self._finish(
+                        job, item, output=result["output"], usage=metadata.get("usage"),
+                        latency_ms=round((time.perf_counter() - started) * 1000, 2),
+                    ))
+                    return
+                error = metadata.get("error") or result["output"]
+            if attempts < job["max_attempts"]:
+                # Exponential backoff with jitter so retries do not arrive in lockstep
+                await asyncio.sleep(self.backoff_base * 2 ** (attempts - 1) * (0.5 + random.random()))
+        await asyncio.shield(self._finish(job, item, error=error))
+
+    async def _finish(self, job: dict, item: dict, output: Optional[str] = None,
+                      error: Optional[str] = None, **fields: Any):
+        # Mark the item first so readers know a seq may be taken but not written yet.
+        # The outcome is kept with it: if this worker dies before the final write,
+        # the item is leased again and finished from here instead of run again.
+        await self.items.update_one({"_id": item["_id"]}, {"$set": {
+            "status": FINISHING,
+            "outcome": {"output": output, "error": error, **fields},
+            "lease_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds),
+        }})
+        counter = "failed" if error is not None else "completed"
+        updated = await self.jobs.find_one_and_update(
+            {"_id": job["_id"]},
+            {"$inc": {counter: 1, "seq": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        update = {
+            "status": ERROR if error is not None else DONE,
+            "seq": updated["seq"],
+            "finished_at": datetime.utcnow(),
+            **fields,
+        }
+        if error is not None:
+            update["error"] = error
+        else:
+            update["output"] = output
+        await self.items.update_one({"_id": item["_id"]}, {"$set": update, "$unset": {"lease_until": "", "outcome": ""}})
+        self._leased.discard(item["_id"])
+
+    # ─── Results ─────────────────────────────────────────────
+    async def _finishing(self, job_oid: ObjectId) -> bool:
+        """Whether some live worker holds a seq it has not written to its item yet."""
+        return bool(await self.items.count_documents(
+            {"job": job_oid, "status": FINISHING, "lease_until": {"$gt": datetime.utcnow()}}, limit=1,
+        ))
+
+    async def results(self, job_id: str, follow: bool = False) -> AsyncIterator[str]:
+        """
+        Finished items as JSONL, in completion order. With `follow`, keeps
+        streaming until the job stops and every result has been sent.
+
+        Seqs are taken from the job before the item is written, so a later
+        seq can become visible first. The stream only moves past a missing
+        seq once no item is mid-finish; gaps that remain (items reset for
+        retry, a worker that died mid-write) are then permanent.
+        """
+        job = await self.get_doc(job_id)
+        last_seq = 0
+        while True:
+            # Decided before reading, so results written meanwhile are still picked up
+            settled = not follow or (job["status"] not in ACTIVE_STATUSES and not await self._finishing(job["_id"]))
+            docs = await self.items.find(
+                {"job": job["_id"], "seq": {"$gt": last_seq}},
+                {"_id": 0, "job": 0, "lease_until": 0, "outcome": 0},
+            ).sort("seq", 1).limit(500).to_list(length=500)
+            stalled = False
+            for doc in docs:
+                if doc["seq"] != last_seq + 1 and await self._finishing(job["_id"]):
+                    stalled = True
+                    break
+                last_seq = doc["seq"]
+                yield json.dumps(doc, default=str) + "\n"
+            if docs and not stalled:
+                continue
+            if settled and not stalled:
+                return
+            await asyncio.sleep(self.poll_interval)
+            if follow:
+                job = await self.get_doc(job_id)
+
+batch_runner = BatchRunner(
+    batch_jobs_collection,
+    batch_items_collection,
+    max_concurrency=settings.BATCH_MAX_CONCURRENCY,
+    per_key_concurrency=settings.BATCH_PER_KEY_CONCURRENCY,
+    default_attempts=settings.BATCH_MAX_ATTEMPTS,
+    backoff_base=settings.BATCH_RETRY_BACKOFF_SECONDS,
+    lease_seconds=settings.BATCH_ITEM_LEASE_SECONDS,
+    poll_interval=settings.BATCH_POLL_SECONDS,
+)
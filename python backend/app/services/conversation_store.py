@@ -0,0 +1,314 @@
+# app/services/conversation_store.py
+
+import asyncio
+import logging
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Union
+
+from bson import Binary, ObjectId
+from fastapi import HTTPException
+from openai import AsyncOpenAI
+from pymongo import ReturnDocument
+
+from app.agent.context import count_tokens
+from app.config import settings
+from app.database.async_mongo import conversation_turns_collection, conversations_collection
+from app.services.usage_meter import usage_meter
+from app.utils.cache import TTLCache
+from app.utils.constants import ROLE_ADMIN
+
+logger = logging.getLogger(__name__)
+
+# Caller identities (see rate_limiter.resolve_caller) that may own conversations
+OWNER_PREFIXES = ("user:", "key:")
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a user and an assistant. "
+    "Merge the previous summary with the new turns into one concise summary that keeps facts, "
+    "names, numbers, decisions, user preferences and open questions. Write it in the third person. "
+    "Reply with the summary only."
+)
+
+
+# ─── Compact turn encoding ──────────────────────────────────
+# Turns are stored as {c: conversation, n: seq, u: user, a: assistant,
+# k: tokens, ts: created}; texts past a size threshold are zlib-compressed.
+def _pack(text: str, min_chars: int) -> Union[str, Binary]:
+    if len(text) < min_chars:
+        return text
+    return Binary(zlib.compress(text.encode("utf-8")))
+
+
+def _unpack(value: Union[str, bytes, None]) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (bytes, bytearray)):
+        return zlib.decompress(bytes(value)).decode("utf-8")
+    return value
+
+
+@dataclass
+class Turn:
+    n: int
+    user: str
+    assistant: str
+    tokens: int
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Turn":
+        return cls(doc["n"], _unpack(doc.get("u")), _unpack(doc.get("a")), doc.get("k", 0))
+
+
+@dataclass
+class Session:
+    """Hot state of one conversation: its summary plus the newest turns."""
+    id: str
+    agent_id: str
+    owner: Optional[str]
+    turn_count: int
+    summary: str
+    summary_through: int
+    turns: Deque[Turn]
+    summarizing: bool = field(default=False, compare=False)
+
+    def unsummarized(self) -> List[Turn]:
+        return [turn for turn in self.turns if turn.n > self.summary_through]
+
+
+class ConversationStore:
+    """
+    Multi-turn sessions. Each turn (user input + reply) is appended as one
+    small document in `conversation_turns`; the `conversations` document
+    holds the turn counter and a rolling summary of everything older than
+    the recent turns.
+
+    Active sessions are kept in memory with a bounded window of their newest
+    turns, so a turn costs one point read of the conversation document (to
+    notice writes from other workers) instead of reloading the history. The
+    prompt gets the summary plus as many recent turns as fit the token
+    budget; once unsummarized turns outgrow the budget (or the window) the
+    oldest are folded into the summary in the background.
+    """
+
+    def __init__(self, conversations, turns, max_sessions: int, session_ttl: float, hot_turns: int,
+                 history_tokens: int, summary_model: str, summary_max_tokens: int, compress_min_chars: int):
+        self.conversations = conversations
+        self.turns = turns
+        self.hot_turns = hot_turns
+        self.history_tokens = history_tokens
+        self.summary_model = summary_model
+        self.summary_max_tokens = summary_max_tokens
+        self.compress_min_chars = compress_min_chars
+        self._sessions = TTLCache(maxsize=max_sessions, ttl=session_ttl)
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ─── Conversations ───────────────────────────────────────
+    async def create(self, agent_id: str, owner: Optional[str], title: Optional[str] = None) -> dict:
+        now = datetime.utcnow()
+        doc = {
+            "agent_id": agent_id,
+            "owner": owner,
+            "title": title,
+            "turn_count": 0,
+            "summary": "",
+            "summary_through": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = await self.conversations.insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def get_doc(self, conversation_id: str, caller: Any = None) -> dict:
+        if not ObjectId.is_valid(conversation_id):
+            raise HTTPException(status_code=400, detail="Invalid conversation ID")
+        doc = await self.conversations.find_one({"_id": ObjectId(conversation_id)})
+        if not doc or not self._can_access(doc, caller):
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return doc
+
+    @staticmethod
+    def is_owner_identity(identity: Optional[str]) -> bool:
+        # Signed-in users and API keys only; a client IP is shared behind proxies and NAT
+        return bool(identity) and identity.startswith(OWNER_PREFIXES)
+
+    @classmethod
+    def _can_access(cls, doc: dict, caller: Any) -> bool:
+        # Private to the user or API key that started it; admins see all
+        if caller is None:
+            return False
+        if caller.plan == ROLE_ADMIN:
+            return True
+        return cls.is_owner_identity(caller.identity) and caller.identity == doc.get("owner")
+
+    async def delete(self, conversation_id: str, caller: Any = None):
+        doc = await self.get_doc(conversation_id, caller)
+        await self.turns.delete_many({"c": doc["_id"]})
+        await self.conversations.delete_one({"_id": doc["_id"]})
+        self._sessions.pop(conversation_id)
+
+    # ─── Hot sessions ────────────────────────────────────────
+    async def session(self, conversation_id: str, caller: Any = None) -> Session:
+        """The conversation's hot state, reloaded only if another worker moved it on."""
+        doc = await self.get_doc(conversation_id, caller)
+        session = self._sessions.get(conversation_id)
+        if (
+            session is not None
+            and session.turn_count == doc.get("turn_count", 0)
+            and session.summary_through == doc.get("summary_through", 0)
+        ):
+            return session
+
+        summary_through = doc.get("summary_through", 0)
+        recent = await self.turns.find(
+            {"c": doc["_id"], "n": {"$gt": summary_through}}
+        ).sort("n", -1).limit(self.hot_turns).to_list(length=self.hot_turns)
+        session = Session(
+            id=conversation_id,
+            agent_id=doc["agent_id"],
+            owner=doc.get("owner"),
+            turn_count=doc.get("turn_count", 0),
+            summary=doc.get("summary", ""),
+            summary_through=summary_through,
+            turns=deque((Turn.from_doc(d) for d in reversed(recent)), maxlen=self.hot_turns),
+        )
+        self._sessions.set(conversation_id, session)
+        return session
+
+    def history(self, session: Session) -> List[Dict[str, str]]:
+        """Chat messages to place between the system prompt and the new input."""
+        budget = self.history_tokens
+        messages: List[Dict[str, str]] = []
+        for turn in reversed(session.unsummarized()):
+            if turn.tokens > budget:
+                break  # older turns are dropped until the summary catches up
+            budget -= turn.tokens
+            messages[:0] = [
+                {"role": "user", "content": turn.user},
+                {"role": "assistant", "content": turn.assistant},
+            ]
+        if session.summary:
+            messages.insert(0, {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{session.summary}",
+            })
+        return messages
+
+    async def append(self, session: Session, user_input: str, output: str,
+                     client: Optional[AsyncOpenAI] = None, model: Optional[str] = None) -> Turn:
+        """Store one finished turn and fold old turns into the summary if needed."""
+        conversation_id = ObjectId(session.id)
+        doc = await self.conversations.find_one_and_update(
+            {"_id": conversation_id},
+            {"$inc": {"turn_count": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"turn_count": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        turn = Turn(doc["turn_count"], user_input, output, count_tokens(user_input, model) + count_tokens(output, model))
+        await self.turns.insert_one({
+            "c": conversation_id,
+            "n": turn.n,
+            "u": _pack(user_input, self.compress_min_chars),
+            "a": _pack(output, self.compress_min_chars),
+            "k": turn.tokens,
+            "ts": datetime.utcnow(),
+        })
+        if turn.n == session.turn_count + 1:
+            session.turns.append(turn)
+            session.turn_count = turn.n
+        else:
+            # Another worker appended in between; reload on the next turn
+            self._sessions.pop(session.id)
+
+        if client is not None and self._needs_summary(session):
+            task = asyncio.create_task(self._summarize(session, client, model))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return turn
+
+    # ─── Summarization ───────────────────────────────────────
+    def _needs_summary(self, session: Session) -> bool:
+        if session.summarizing:
+            return False
+        pending = session.unsummarized()
+        # Fold before turns fall out of the window or the prompt budget
+        return len(pending) >= self.hot_turns - 1 or sum(t.tokens for t in pending) > self.history_tokens
+
+    async def _summarize(self, session: Session, client: AsyncOpenAI, model: Optional[str]):
+        pending = session.unsummarized()
+        # Keep the newest turns verbatim (up to half the budget); fold the rest
+        keep, budget = 0, self.history_tokens // 2
+        for turn in reversed(pending):
+            if turn.tokens > budget:
+                break
+            budget -= turn.tokens
+            keep += 1
+        fold = pending[:len(pending) - keep] or pending[:1]
+        through = fold[-1].n
+
+        session.summarizing = True
+        try:
+            transcript = "\n\n".join(f"User: {t.user}\nAssistant: {t.assistant}" for t in fold)
+            response = await client.chat.completions.create(
+                model=self.summary_model or model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": f"Previous summary:\n{session.summary or '(none)'}\n\nNew turns:\n{transcript}"},
+                ],
+                temperature=0.2,
+                max_tokens=self.summary_max_tokens,
+            )
+            summary = (response.choices[0].message.content or "").strip()
+            if response.usage is not None:
+                usage_meter.record(response.model, response.usage.model_dump(), agent=session.agent_id)
+
+            # Conditional on the old position so a concurrent summary is not overwritten
+            result = await self.conversations.update_one(
+                {"_id": ObjectId(session.id), "summary_through": session.summary_through},
+                {"$set": {"summary": summary, "summary_through": through}},
+            )
+            if result.modified_count:
+                session.summary, session.summary_through = summary, through
+            else:
+                self._sessions.pop(session.id)
+        except Exception as exc:
+            # The turns are still stored; history() keeps truncating meanwhile
+            logger.error(f"Summarizing conversation {session.id} failed: {exc}")
+        finally:
+            session.summarizing = False
+
+    async def aclose(self):
+        """Let in-flight summaries finish (called on shutdown)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ─── Reading ─────────────────────────────────────────────
+    @staticmethod
+    def turn_out(doc: dict) -> dict:
+        return {
+            "id": str(doc.pop("_id")),
+            "turn": doc["n"],
+            "input": _unpack(doc.get("u")),
+            "output": _unpack(doc.get("a")),
+            "tokens": doc.get("k", 0),
+            "created_at": doc.get("ts"),
+        }
+
+
+conversation_store = ConversationStore(
+    conversations_collection,
+    conversation_turns_collection,
+    max_sessions=settings.CONVERSATION_HOT_SESSIONS,
+    session_ttl=settings.CONVERSATION_SESSION_TTL,
+    hot_turns=settings.CONVERSATION_HOT_TURNS,
+    history_tokens=settings.CONVERSATION_HISTORY_TOKENS,
+    summary_model=settings.CONVERSATION_SUMMARY_MODEL,
+    summary_max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+    compress_min_chars=settings.CONVERSATION_COMPRESS_MIN_CHARS,
+)
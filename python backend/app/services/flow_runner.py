@@ -0,0 +1,268 @@
+# app/services/flow_runner.py
+
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.agents.tool_executor import tool_executor
+from app.config import settings
+from app.services.agent_runner import AgentRunner
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"\{([\w\-]+)\}")
+
+
+# ─────────────────────────────────────────────────────────────
+# Compiled graph
+# ─────────────────────────────────────────────────────────────
+@dataclass
+class FlowEdge:
+    source: str
+    target: str
+    condition: str = ""
+
+
+@dataclass
+class FlowNode:
+    id: str
+    type: Optional[str]
+    data: Dict[str, Any]
+    incoming: List[FlowEdge] = field(default_factory=list)
+    outgoing: List[FlowEdge] = field(default_factory=list)
+
+    @property
+    def kind(self) -> str:
+        if self.type == "input":
+            return "start"
+        if self.type == "output":
+            return "end"
+        if self.data.get("agentId") or self.data.get("agent_id"):
+            return "agent"
+        if self.data.get("tool") or self.data.get("function_name"):
+            return "tool"
+        return "prompt"
+
+
+@dataclass
+class FlowGraph:
+    nodes: Dict[str, FlowNode]
+    order: List[str]  # topological order, used to validate acyclicity
+
+
+def compile_flow(json_data: dict) -> FlowGraph:
+    """
+    Turn a stored React Flow document ({"nodes": [...], "edges": [...]})
+    into a validated DAG. Raises 400 on dangling edges or cycles.
+    """
+    nodes: Dict[str, FlowNode] = {}
+    for raw in json_data.get("nodes") or []:
+        node_id = raw.get("id")
+        if not node_id:
+            raise HTTPException(status_code=400, detail="Flow node without an id")
+        nodes[node_id] = FlowNode(id=node_id, type=raw.get("type"), data=raw.get("data") or {})
+
+    if not nodes:
+        raise HTTPException(status_code=400, detail="Flow has no nodes")
+
+    for raw in json_data.get("edges") or []:
+        source, target = raw.get("source"), raw.get("target")
+        if source not in nodes or target not in nodes:
+            raise HTTPException(status_code=400, detail=f"Edge {raw.get('id')} references an unknown node")
+        edge = FlowEdge(source=source, target=target, condition=(raw.get("data") or {}).get("condition") or "")
+        nodes[source].outgoing.append(edge)
+        nodes[target].incoming.append(edge)
+
+    # Kahn's algorithm – anything left over sits on a cycle
+    indegree = {node_id: len(node.incoming) for node_id, node in nodes.items()}
+    ready = [node_id for node_id, degree in indegree.items() if degree == 0]
+    order = []
+    while ready:
+        node_id = ready.pop()
+        order.append(node_id)
+        for edge in nodes[node_id].outgoing:
+            indegree[edge.target] -= 1
+            if indegree[edge.target] == 0:
+                ready.append(edge.target)
+    if len(order) != len(nodes):
+        raise HTTPException(status_code=400, detail="Flow graph contains a cycle")
+
+    return FlowGraph(nodes=nodes, order=order)
+
+
+# ─────────────────────────────────────────────────────────────
+# Helpers
+# ─────────────────────────────────────────────────────────────
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+
+def evaluate_condition(condition: str, value: Any) -> bool:
+    """Same edge conditions as the flow builder UI: equals / contains / greaterThan / lessThan."""
+    if not condition:
+        return True
+    operator, _, expected = condition.partition(":")
+    text = _as_text(value)
+    try:
+        if operator == "equals":
+            return text == expected
+        if operator == "contains":
+            return expected in text
+        if operator == "greaterThan":
+            return float(text) > float(expected)
+        if operator == "lessThan":
+            return float(text) < float(expected)
+    except ValueError:
+        return False
+    return True
+
+
+def render_template(template: str, variables: Dict[str, Any]) -> str:
+    return _PLACEHOLDER.sub(
+        lambda m: _as_text(variables[m.group(1)]) if m.group(1) in variables else m.group(0),
+        template,
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+# Executor
+# ─────────────────────────────────────────────────────────────
+class FlowRunner:
+    """
+    Executes a compiled flow. Every node starts as soon as all of its
+    upstream nodes have finished, so independent branches run concurrently.
+    Nodes with no satisfied incoming edge (conditions false, or upstream
+    failed/skipped) are skipped.
+    """
+
+    def __init__(self, agent_runner: Optional[AgentRunner] = None):
+        self.agent_runner = agent_runner or AgentRunner()
+
+    async def run(self, graph: FlowGraph, flow_input: str, default_agent_id: Optional[str] = None) -> dict:
+        started = time.perf_counter()
+        outputs: Dict[str, Any] = {}
+        results: Dict[str, dict] = {}
+        remaining = {node_id: len(node.incoming) for node_id, node in graph.nodes.items()}
+        active_inputs: Dict[str, List[str]] = {node_id: [] for node_id in graph.nodes}
+        semaphore = asyncio.Semaphore(settings.FLOW_MAX_CONCURRENCY)
+        pending: Dict[asyncio.Task, str] = {}
+
+        def schedule(node_id: str):
+            task = asyncio.create_task(
+                self._run_node(graph.nodes[node_id], active_inputs[node_id], outputs,
+                               flow_input, default_agent_id, semaphore, started)
+            )
+            pending[task] = node_id
+
+        def settle(node_id: str, succeeded: bool):
+            # Resolve outgoing edges; a target becomes ready (or skipped)
+            # once every one of its incoming edges is resolved.
+            for edge in graph.nodes[node_id].outgoing:
+                if succeeded and evaluate_condition(edge.condition, outputs.get(node_id)):
+                    active_inputs[edge.target].append(node_id)
+                remaining[edge.target] -= 1
+                if remaining[edge.target] == 0:
+                    if active_inputs[edge.target]:
+                        schedule(edge.target)
+                    else:
+                        results[edge.target] = {"id": edge.target, "kind": graph.nodes[edge.target].kind, "status": "skipped"}
+                        settle(edge.target, False)
+
+        for node_id, count in remaining.items():
+            if count == 0:
+                schedule(node_id)
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = pending.pop(task)
+                    result = task.result()
+                    results[node_id] = result
+                    if result["status"] == "success":
+                        outputs[node_id] = result["output"]
+                    settle(node_id, result["status"] == "success")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        end_nodes = [n for n in graph.order if graph.nodes[n].kind == "end"] or \
+                    [n for n in graph.order if not graph.nodes[n].outgoing]
+        final = [outputs[n] for n in end_nodes if n in outputs]
+        return {
+            "status": "error" if any(r["status"] == "error" for r in results.values()) else "success",
+            "output": final[0] if len(final) == 1 else final,
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "nodes": [results[n] for n in graph.order if n in results],
+        }
+
+    async def _run_node(self, node: FlowNode, sources: List[str], outputs: Dict[str, Any],
+                        flow_input: str, default_agent_id: Optional[str],
+                        semaphore: asyncio.Semaphore, flow_started: float) -> dict:
+        if not node.incoming:
+            # Root nodes (not just "start") work on the flow's input
+            node_input = flow_input
+        else:
+            # Combine upstream outputs in edge order, not completion order
+            upstream = [outputs[e.source] for e in node.incoming if e.source in sources]
+            node_input = upstream[0] if len(upstream) == 1 else "\n\n".join(_as_text(u) for u in upstream)
+        async with semaphore:
+            started = time.perf_counter()
+            result = {"id": node.id, "kind": node.kind, "started_ms": round((started - flow_started) * 1000, 2)}
+            try:
+                output = await asyncio.wait_for(
+                    self._execute(node, node_input, outputs, flow_input, default_agent_id),
+                    timeout=settings.FLOW_NODE_TIMEOUT_SECONDS,
+                )
+                result.update(status="success", output=output)
+            except asyncio.TimeoutError:
+                result.update(status="error", error=f"Node timed out after {settings.FLOW_NODE_TIMEOUT_SECONDS}s")
+            except HTTPException as exc:
+                result.update(status="error", error=str(exc.detail))
+            except Exception as exc:
+                logger.error(f"Flow node {node.id} failed: {exc}", exc_info=True)
+                result.update(status="error", error=str(exc))
+            result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+
+    async def _execute(self, node: FlowNode, node_input: Any, outputs: Dict[str, Any],
+                       flow_input: str, default_agent_id: Optional[str]) -> Any:
+        kind = node.kind
+        if kind == "start":
+            return flow_input
+        if kind == "end":
+            return node_input
+
+        variables = {**outputs, "input": node_input, "flow_input": flow_input}
+        template = node.data.get("promptTemplate")
+        prompt = render_template(template, variables) if template else _as_text(node_input)
+
+        if kind == "tool":
+            name = node.data.get("tool") or node.data.get("function_name")
+            args = node.data.get("args")
+            if isinstance(args, dict):
+                kwargs = {k: render_template(v, variables) if isinstance(v, str) else v for k, v in args.items()}
+            elif isinstance(node_input, dict):
+                kwargs = node_input
+            else:
+                kwargs = json.loads(prompt)
+            return await tool_executor.invoke(name, kwargs)
+
+        agent_id = node.data.get("agentId") or node.data.get("agent_id") or default_agent_id
+        if not agent_id:
+            # Plain prompt node with no agent attached: pass the rendered text on
+            return prompt
+        return await self.agent_runner.run_agent(agent_id, prompt, source="flow")
+
+
+flow_runner = FlowRunner()
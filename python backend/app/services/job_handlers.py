@@ -0,0 +1,41 @@
+# app/services/job_handlers.py
+#
+# Job kinds run by the background job queue. Importing this module registers
+# them, so both the API process and `python -m app.worker` import it.
+
+from typing import Any, Dict
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.database.async_mongo import flows_collection
+from app.services.agent_runner import AgentRunner
+from app.services.flow_runner import compile_flow, flow_runner
+from app.services.job_queue import job_queue
+
+AGENT_RUN = "agent_run"
+FLOW_RUN = "flow_run"
+
+agent_runner = AgentRunner()
+
+
+async def run_agent_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = await agent_runner.execute(payload["agent_id"], payload["input"], source=payload.get("source", "job"))
+    metadata = result["metadata"]
+    if metadata.get("status", "success") != "success":
+        # Failed model/tool runs come back as a result; raise so the queue retries them
+        raise RuntimeError(metadata.get("error") or result["output"])
+    return {"output": result["output"], "metadata": metadata}
+
+
+async def run_flow_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    flow = await flows_collection.find_one({"_id": ObjectId(payload["flow_id"])}, {"json_data": 1})
+    if not flow:
+        raise HTTPException(status_code=404, detail="Flow not found")
+    graph = compile_flow(flow.get("json_data") or {})
+    result = await flow_runner.run(graph, payload["input"], default_agent_id=payload.get("agent_id"))
+    return {"flow_id": payload["flow_id"], **result}
+
+
+job_queue.register(AGENT_RUN, run_agent_job)
+job_queue.register(FLOW_RUN, run_flow_job)
@@ -0,0 +1,290 @@
+# app/services/job_queue.py
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.database.async_mongo import jobs_collection
+from app.utils.metrics import JOB_SECONDS
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, CANCELLED, DEAD = "queued", "running", "succeeded", "cancelled", "dead"
+FINAL_STATUSES = (SUCCEEDED, CANCELLED, DEAD)
+
+# Client errors will fail the same way again; everything else is retried
+RETRYABLE_STATUS = {408, 409, 429}
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    Durable background jobs in the `jobs` collection.
+
+    A job is enqueued as a `queued` document and claimed by a worker with an
+    atomic find_one_and_update that sets a lease (`lease_until`, `worker`).
+    While the handler runs, a heartbeat renews the lease; a job whose worker
+    died is claimed again once the lease runs out. Failures are retried with
+    exponential backoff (`run_at`) until `max_attempts`, after which the job
+    is dead-lettered (status `dead`) and kept for inspection or a manual
+    retry.
+
+    Handlers are registered per job `kind` and receive the job's payload;
+    their return value is stored as the job's `result`. Workers run inside
+    the API process (JOB_WORKERS_ENABLED) or in a separate `python -m
+    app.worker` process, so they can be scaled apart from the API.
+    """
+
+    def __init__(self, collection, concurrency: int, lease_seconds: float, heartbeat_seconds: float,
+                 max_attempts: int, backoff_base: float, poll_interval: float):
+        self.collection = collection
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, Handler] = {}
+        self._workers: list = []
+        self._running: Dict[ObjectId, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    # ─── Producers ───────────────────────────────────────────
+    async def enqueue(self, kind: str, payload: Dict[str, Any], created_by: Optional[str] = None,
+                      max_attempts: Optional[int] = None) -> dict:
+        if kind not in self._handlers:
+            raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+        now = datetime.utcnow()
+        job = {
+            "kind": kind,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "run_at": now,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = await self.collection.insert_one(job)
+        job["_id"] = result.inserted_id
+        self._wakeup.set()
+        return job
+
+    async def get_doc(self, job_id: str) -> dict:
+        if not ObjectId.is_valid(job_id):
+            raise HTTPException(status_code=400, detail="Invalid job ID")
+        job = await self.collection.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    async def cancel(self, job_id: str) -> dict:
+        """Cancel a queued or running job; the worker holding it stops at its next heartbeat."""
+        job = await self.get_doc(job_id)
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "status": {"$in": [QUEUED, RUNNING]}},
+            {"$set": {"status": CANCELLED, "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+             "$unset": {"lease_until": ""}},
+        )
+        if not result.modified_count:
+            raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+        task = self._running.get(job["_id"])
+        if task is not None:
+            task.cancel()
+        return await self.get_doc(job_id)
+
+    async def retry(self, job_id: str) -> dict:
+        """Requeue a dead-lettered or cancelled job with a fresh attempt budget."""
+        job = await self.get_doc(job_id)
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "status": {"$in": [DEAD, CANCELLED]}},
+            {"$set": {"status": QUEUED, "attempts": 0, "run_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+             "$unset": {"error": "", "finished_at": ""}},
+        )
+        if not result.modified_count:
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}, only dead or cancelled jobs can be retried")
+        self._wakeup.set()
+        return await self.get_doc(job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Status snapshots of a job, one per change, ending with its final state."""
+        last = None
+        while True:
+            job = await self.get_doc(job_id)
+            state = (job["status"], job.get("attempts", 0))
+            if state != last:
+                last = state
+                yield job
+            if job["status"] in FINAL_STATUSES:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    # ─── Workers ─────────────────────────────────────────────
+    def start(self):
+        if self._workers:
+            return
+        self._stopping = False
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"Job workers started ({self.concurrency} on {self.worker_id})")
+
+    async def stop(self):
+        """Stop workers and release their leases so another worker picks the jobs up right away."""
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        try:
+            await self.collection.update_many(
+                {"status": RUNNING, "worker": self.worker_id},
+                {"$set": {"status": QUEUED, "run_at": datetime.utcnow()},
+                 "$unset": {"lease_until": "", "worker": ""}, "$inc": {"attempts": -1}},
+            )
+        except PyMongoError as exc:
+            logger.warning(f"Releasing job leases failed, they expire on their own: {exc}")
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "run_at": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {
+                "status": RUNNING,
+                "worker": self.worker_id,
+                "lease_until": now + timedelta(seconds=self.lease_seconds),
+                "started_at": now,
+                "updated_at": now,
+            }, "$inc": {"attempts": 1}},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self._claim()
+            except PyMongoError as exc:
+                logger.error(f"Claiming a job failed: {exc}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"Job {job['_id']} bookkeeping failed: {exc}", exc_info=True)
+
+    async def _run(self, job: dict):
+        job_id = job["_id"]
+        handler = self._handlers.get(job["kind"])
+        if job["attempts"] > job["max_attempts"]:
+            # Claimed again after its worker died on the last attempt
+            await self._dead_letter(job, job.get("error") or "Lease expired on the final attempt")
+            return
+        if handler is None:
+            await self._dead_letter(job, f"No handler for job kind: {job['kind']}")
+            return
+
+        started = time.perf_counter()
+        task = asyncio.create_task(handler(job["payload"]))
+        self._running[job_id] = task
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise  # shutdown; stop() hands the job back
+            JOB_SECONDS.labels(job["kind"], CANCELLED).observe(time.perf_counter() - started)
+            logger.info(f"Job {job_id} stopped (cancelled or lease lost)")
+            return
+        except Exception as exc:
+            JOB_SECONDS.labels(job["kind"], "error").observe(time.perf_counter() - started)
+            await self._failed(job, exc)
+            return
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job_id, None)
+
+        JOB_SECONDS.labels(job["kind"], SUCCEEDED).observe(time.perf_counter() - started)
+        await self._finish(job, {"status": SUCCEEDED, "result": result, "error": None})
+
+    async def _heartbeat(self, job_id: ObjectId, task: asyncio.Task):
+        """Renew the lease while the handler runs; stop it if the job was cancelled or taken over."""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                renewed = await self.collection.update_one(
+                    {"_id": job_id, "status": RUNNING, "worker": self.worker_id},
+                    {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}},
+                )
+            except PyMongoError as exc:
+                logger.warning(f"Heartbeat for job {job_id} failed: {exc}")
+                continue
+            if not renewed.matched_count:
+                task.cancel()
+                return
+
+    async def _failed(self, job: dict, exc: Exception):
+        error = str(exc.detail) if isinstance(exc, HTTPException) else str(exc)
+        permanent = isinstance(exc, HTTPException) and exc.status_code < 500 and exc.status_code not in RETRYABLE_STATUS
+        if permanent or job["attempts"] >= job["max_attempts"]:
+            logger.warning(f"Job {job['_id']} dead-lettered after {job['attempts']} attempts: {error}")
+            await self._dead_letter(job, error)
+            return
+        # Exponential backoff with jitter so retries do not arrive in lockstep
+        delay = self.backoff_base * 2 ** (job["attempts"] - 1) * (0.5 + random.random())
+        await self._finish(job, {
+            "status": QUEUED,
+            "error": error,
+            "run_at": datetime.utcnow() + timedelta(seconds=delay),
+        }, final=False)
+
+    async def _dead_letter(self, job: dict, error: str):
+        await self._finish(job, {"status": DEAD, "error": error})
+
+    async def _finish(self, job: dict, fields: Dict[str, Any], final: bool = True):
+        now = datetime.utcnow()
+        if final:
+            fields["finished_at"] = now
+        # Only the lease holder may finish the job (it may have been cancelled meanwhile)
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": RUNNING, "worker": self.worker_id},
+            {"$set": {**fields, "updated_at": now}, "$unset": {"lease_until": "", "worker": ""}},
+        )
+
+
+job_queue = JobQueue(
+    jobs_collection,
+    concurrency=settings.JOB_WORKER_CONCURRENCY,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    heartbeat_seconds=settings.JOB_HEARTBEAT_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    backoff_base=settings.JOB_RETRY_BACKOFF_SECONDS,
+    poll_interval=settings.JOB_POLL_SECONDS,
+)
@@ -1,7 +1,12 @@
 # app/services/plan_service.py
 
+from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from app.database.models import Plan, User
+from app.database.async_mongo import plans_collection, users_collection
+from app.config import settings
+from app.utils.constants import PLAN_LIMITS, MESSAGE_LIMITS
+from app.utils.cache import TTLCache
 from fastapi import HTTPException
 
 def get_plan_by_id(db: Session, plan_id: int):
@@ -45,3 +50,65 @@ def get_user_plan_limit(db: Session, user_id: int) -> int:
     if user.plan and user.plan.limit_rpm:
         return user.plan.limit_rpm
     return 60  # default RPM if plan not set
+
+# ─────────────────────────────────────────────────────────────
+# Mongo-backed plan limits (used by the rate limiter)
+# ─────────────────────────────────────────────────────────────
+async def get_user_plan_name(email: str) -> Optional[str]:
+    user = await users_collection.find_one({"email": email}, {"plan": 1})
+    return user.get("plan") if user else None
+
+async def get_plan_limits(plan_name: Optional[str]) -> Tuple[int, Optional[int]]:
+    """
+    Return (requests per minute, requests per day) for a plan.
+    Falls back to PLAN_LIMITS and then Settings.API_RATE_LIMIT; a daily
+    limit of None means unlimited.
+    """
+    rate_limit = PLAN_LIMITS.get(plan_name, settings.API_RATE_LIMIT) if plan_name else settings.API_RATE_LIMIT
+    daily_limit = None
+    if plan_name:
+        plan = await plans_collection.find_one({"name": plan_name}, {"rate_limit": 1, "daily_limit": 1})
+        if plan:
+            if plan.get("rate_limit") is not None:
+                rate_limit = plan["rate_limit"]
+            daily_limit = plan.get("daily_limit")
+    return rate_limit, daily_limit
+
+_message_limits_cache = TTLCache(maxsize=256, ttl=settings.RATE_LIMIT_PLAN_CACHE_TTL)
+
+async def get_message_limits(plan_name: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Return (messages per month, messages per day) for a plan, preferring the
+    plan document's fields over MESSAGE_LIMITS. None means unlimited.
+    """
+    plan_name = plan_name or "free"
+    cached = _message_limits_cache.get(plan_name)
+    if cached is not None:
+        return cached
+
+    monthly, daily = MESSAGE_LIMITS.get(plan_name, (None, None))
+    plan = await plans_collection.find_one(
+        {"name": plan_name}, {"monthly_message_limit": 1, "daily_message_limit": 1}
+    )
+    if plan:
+        monthly = plan.get("monthly_message_limit", monthly)
+        daily = plan.get("daily_message_limit", daily)
+    _message_limits_cache.set(plan_name, (monthly, daily))
+    return monthly, daily
+
+_token_limits_cache = TTLCache(maxsize=256, ttl=settings.RATE_LIMIT_PLAN_CACHE_TTL)
+
+async def get_token_limits(plan_name: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Return (tokens per day, tokens per month) for a plan. None means unlimited."""
+    if not plan_name:
+        return None, None
+    cached = _token_limits_cache.get(plan_name)
+    if cached is not None:
+        return cached
+
+    plan = await plans_collection.find_one(
+        {"name": plan_name}, {"daily_token_limit": 1, "monthly_token_limit": 1}
+    )
+    limits = (plan.get("daily_token_limit"), plan.get("monthly_token_limit")) if plan else (None, None)
+    _token_limits_cache.set(plan_name, limits)
+    return limits
@@ -0,0 +1,266 @@
+# app/services/rate_limiter.py
+
+import hashlib
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from pymongo import ReturnDocument
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+from app.database.async_mongo import api_keys_collection, mongo_db
+from app.services.auth_service import SECRET_KEY, ALGORITHM
+from app.services.plan_service import get_plan_limits, get_token_limits, get_user_plan_name
+from app.utils.cache import TTLCache
+from app.utils.constants import ROLE_ADMIN
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+DAY = 86400
+
+
+# ─────────────────────────────────────────────────────────────
+# Counter backends
+# ─────────────────────────────────────────────────────────────
+class InMemoryRateLimitBackend:
+    """Per-process counters. Limits are per worker, not global."""
+
+    def __init__(self):
+        self._counters: Dict[str, Tuple[int, float]] = {}
+        self._next_prune = 0.0
+
+    async def incr(self, key: str, ttl: int) -> int:
+        now = time.monotonic()
+        self._prune(now)
+        count, expires_at = self._counters.get(key, (0, now + ttl))
+        count += 1
+        self._counters[key] = (count, expires_at)
+        return count
+
+    async def get(self, key: str) -> int:
+        count, expires_at = self._counters.get(key, (0, 0.0))
+        return count if expires_at > time.monotonic() else 0
+
+    def _prune(self, now: float):
+        if now < self._next_prune:
+            return
+        self._counters = {k: v for k, v in self._counters.items() if v[1] > now}
+        self._next_prune = now + MINUTE
+
+
+class MongoRateLimitBackend:
+    """
+    Counters shared by every worker via the `rate_limits` collection
+    (expired by the TTL index in app/database/indexes.py).
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def incr(self, key: str, ttl: int) -> int:
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(seconds=ttl)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["count"]
+
+    async def get(self, key: str) -> int:
+        doc = await self.collection.find_one({"_id": key}, {"count": 1})
+        return doc["count"] if doc else 0
+
+
+class RedisRateLimitBackend:
+    """Counters in any Redis-protocol server (Redis, Valkey, KeyDB, ...)."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self.client = redis.from_url(url)
+
+    async def incr(self, key: str, ttl: int) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, ttl)
+            count, _ = await pipe.execute()
+        return int(count)
+
+    async def get(self, key: str) -> int:
+        value = await self.client.get(key)
+        return int(value) if value else 0
+
+
+def build_backend(name: str):
+    if name == "mongo":
+        return MongoRateLimitBackend(mongo_db["rate_limits"])
+    if name == "redis":
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryRateLimitBackend()
+
+
+# ─────────────────────────────────────────────────────────────
+# Limiter
+# ─────────────────────────────────────────────────────────────
+@dataclass
+class CallerPlan:
+    identity: str
+    plan: Optional[str]
+    rate_limit: Optional[int]      # requests per minute, None = unlimited
+    daily_limit: Optional[int]     # requests per day, None = unlimited
+    daily_token_limit: Optional[int] = None     # LLM tokens per day (enforced by usage_meter)
+    monthly_token_limit: Optional[int] = None   # LLM tokens per month
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    retry_after: int = 0
+    scope: str = "minute"
+
+
+class RateLimiter:
+    """
+    Sliding-window counters per caller, enforcing the caller's plan
+    `rate_limit` (per minute) and `daily_limit` (per day).
+    """
+
+    def __init__(self, backend, plan_cache_ttl: float):
+        self.backend = backend
+        self._plans = TTLCache(maxsize=10_000, ttl=plan_cache_ttl)
+        # Key fingerprint -> whether it belongs to an active stored key
+        self._known_keys = TTLCache(maxsize=10_000, ttl=plan_cache_ttl)
+
+    async def resolve_caller(self, request: Request) -> CallerPlan:
+        claims = _token_claims(request)
+        if claims and claims.get("sub"):
+            identity = f"user:{claims['sub']}"
+            cached = self._plans.get(identity)
+            if cached is not None:
+                return cached
+            if claims.get("role") == ROLE_ADMIN:
+                caller = CallerPlan(identity, ROLE_ADMIN, None, None)
+            else:
+                plan = await get_user_plan_name(claims["sub"])
+                rate_limit, daily_limit = await get_plan_limits(plan)
+                daily_tokens, monthly_tokens = await get_token_limits(plan)
+                caller = CallerPlan(identity, plan, rate_limit, daily_limit, daily_tokens, monthly_tokens)
+            self._plans.set(identity, caller)
+            return caller
+
+        api_key = request.headers.get("X-API-KEY")
+        if api_key and await self._is_known_key(api_key):
+            # Never the raw secret: identities end up in counter keys and stored documents
+            identity = f"key:{_fingerprint(api_key)}"
+        else:
+            # Unknown keys would otherwise buy a fresh bucket per request
+            client_ip = request.client.host if request.client else "unknown"
+            identity = f"ip:{client_ip}"
+        return CallerPlan(identity, None, settings.API_RATE_LIMIT, None)
+
+    async def _is_known_key(self, api_key: str) -> bool:
+        fingerprint = _fingerprint(api_key)
+        known = self._known_keys.get(fingerprint)
+        if known is None:
+            doc = await api_keys_collection.find_one(
+                {"$or": [{"key": api_key}, {"key_secret": api_key}], "is_active": {"$ne": False}},
+                {"_id": 1},
+            )
+            known = doc is not None
+            self._known_keys.set(fingerprint, known)
+        return known
+
+    async def _window_count(self, identity: str, window: int) -> float:
+        now = time.time()
+        current = int(now // window)
+        elapsed = (now % window) / window
+        count = await self.backend.incr(f"rl:{identity}:{window}:{current}", ttl=window * 2)
+        previous = await self.backend.get(f"rl:{identity}:{window}:{current - 1}")
+        # Weight the previous window by how much of it still overlaps.
+        return count + previous * (1.0 - elapsed)
+
+    async def check(self, caller: CallerPlan) -> RateLimitDecision:
+        decision = RateLimitDecision(allowed=True)
+        for limit, window, scope in (
+            (caller.rate_limit, MINUTE, "minute"),
+            (caller.daily_limit, DAY, "day"),
+        ):
+            if limit is None:
+                continue
+            used = await self._window_count(caller.identity, window)
+            remaining = max(0, math.floor(limit - used))
+            if used > limit:
+                retry_after = max(1, int(window - time.time() % window))
+                return RateLimitDecision(False, limit, 0, retry_after, scope)
+            if decision.limit is None or scope == "minute":
+                decision = RateLimitDecision(True, limit, remaining, 0, scope)
+        return decision
+
+
+rate_limiter = RateLimiter(
+    backend=build_backend(settings.RATE_LIMIT_BACKEND),
+    plan_cache_ttl=settings.RATE_LIMIT_PLAN_CACHE_TTL,
+)
+
+
+def _fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _token_claims(request: Request) -> Optional[dict]:
+    auth = request.headers.get("Authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
+# ─────────────────────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────────────────────
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "OPTIONS" or not request.url.path.startswith("/api"):
+            return await call_next(request)
+
+        try:
+            caller = await rate_limiter.resolve_caller(request)
+            decision = await rate_limiter.check(caller)
+        except Exception as exc:
+            # Fail open: a broken counter store must not take the API down.
+            logger.warning(f"Rate limiter unavailable, allowing request: {exc}")
+            return await call_next(request)
+
+        request.state.caller = caller
+        if not decision.allowed:
+            logger.info(f"Rate limit ({decision.scope}) exceeded for {caller.identity}")
+            return JSONResponse(
+                status_code=429,
+                content={"detail": f"Rate limit exceeded ({decision.limit} requests per {decision.scope})"},
+                headers={
+                    "Retry-After": str(decision.retry_after),
+                    "X-RateLimit-Limit": str(decision.limit),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+
+        response = await call_next(request)
+        if decision.limit is not None:
+            response.headers["X-RateLimit-Limit"] = str(decision.limit)
+            response.headers["X-RateLimit-Remaining"] = str(decision.remaining)
+        return response
@@ -0,0 +1,157 @@
+# app/services/response_cache.py
+
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from app.agent.embeddings import embed_texts
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+@dataclass
+class CacheLookup:
+    hit: bool
+    output: Optional[str] = None
+    tier: Optional[str] = None          # exact | semantic
+    similarity: Optional[float] = None
+    embedding: Optional[np.ndarray] = None  # reused by store() on a miss
+
+
+class _VectorIndex:
+    """Fixed-capacity matrix of unit vectors with per-row TTL and LRU slots."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.outputs: List[Optional[str]] = [None] * capacity
+        self.expires = np.zeros(capacity)
+        self.last_used = np.zeros(capacity)
+        self.size = 0
+
+    def search(self, query: np.ndarray, now: float):
+        if self.size == 0:
+            return None, -1.0
+        scores = self.vectors[:self.size] @ query
+        scores[self.expires[:self.size] <= now] = -1.0
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def add(self, vector: np.ndarray, output: str, ttl: float, now: float):
+        if self.size < len(self.outputs):
+            slot = self.size
+            self.size += 1
+        else:
+            # Reuse an expired slot if there is one, otherwise the LRU slot
+            expired = np.flatnonzero(self.expires <= now)
+            slot = int(expired[0]) if expired.size else int(np.argmin(self.last_used))
+        self.vectors[slot] = vector
+        self.outputs[slot] = output
+        self.expires[slot] = now + ttl
+        self.last_used[slot] = now
+
+
+class SemanticResponseCache:
+    """
+    Opt-in per-agent cache of final answers.
+
+    Tier 1 hashes (agent id, agent fingerprint, normalised input) for
+    exact repeats. Tier 2 embeds the input and returns the closest cached
+    answer for the same fingerprint if its cosine similarity clears the
+    agent's threshold. The fingerprint covers instructions, model, model
+    settings, tools, guardrails and handoffs, and `invalidate` drops both
+    tiers when the agent is updated, so stale answers are never served.
+
+    Agent-level config (agent document `response_cache`):
+        {"enabled": true, "semantic": true, "threshold": 0.95, "ttl": 3600}
+    """
+
+    def __init__(self, exact_maxsize: int, index_capacity: int, default_ttl: float):
+        self._exact = TTLCache(maxsize=exact_maxsize, ttl=default_ttl)
+        self._indexes: Dict[str, _VectorIndex] = {}
+        self.index_capacity = index_capacity
+        self.default_ttl = default_ttl
+        self.semantic_hits = 0
+
+    @staticmethod
+    def _scope(agent_id: str, version: str) -> str:
+        return f"{agent_id}:{version}"
+
+    def _exact_key(self, scope: str, text: str) -> tuple:
+        # Scope kept in the clear so invalidate() can find an agent's entries
+        return scope, hashlib.sha256(normalize_input(text).encode()).hexdigest()
+
+    @traced("response_cache.lookup")
+    async def lookup(self, agent_id: str, version: str, text: str, config: dict,
+                     client: AsyncOpenAI) -> CacheLookup:
+        scope = self._scope(agent_id, version)
+        output = self._exact.get(self._exact_key(scope, text))
+        if output is not None:
+            return CacheLookup(hit=True, output=output, tier="exact", similarity=1.0)
+
+        if not config.get("semantic", True):
+            return CacheLookup(hit=False)
+
+        try:
+            embedding = (await embed_texts(client, [normalize_input(text)]))[0]
+        except Exception as exc:
+            logger.warning(f"Semantic cache embedding failed, skipping: {exc}")
+            return CacheLookup(hit=False)
+
+        index = self._indexes.get(scope)
+        if index is not None:
+            now = time.monotonic()
+            slot, score = index.search(embedding, now)
+            threshold = config.get("threshold", settings.RESPONSE_CACHE_THRESHOLD)
+            if slot is not None and score >= threshold:
+                index.last_used[slot] = now
+                self.semantic_hits += 1
+                return CacheLookup(hit=True, output=index.outputs[slot], tier="semantic",
+                                   similarity=round(score, 4))
+        return CacheLookup(hit=False, embedding=embedding)
+
+    def store(self, agent_id: str, version: str, text: str, output: str, config: dict,
+              embedding: Optional[np.ndarray] = None):
+        scope = self._scope(agent_id, version)
+        ttl = config.get("ttl", self.default_ttl)
+        self._exact.set(self._exact_key(scope, text), output, ttl=ttl)
+        if embedding is None:
+            return
+        index = self._indexes.get(scope)
+        if index is None:
+            index = self._indexes[scope] = _VectorIndex(len(embedding), self.index_capacity)
+        index.add(embedding, output, ttl, time.monotonic())
+
+    def invalidate(self, agent_id: str):
+        prefix = f"{agent_id}:"
+        for scope in [s for s in self._indexes if s.startswith(prefix)]:
+            del self._indexes[scope]
+        self._exact.pop_where(lambda key, _: key[0].startswith(prefix))
+
+    def stats(self) -> dict:
+        return {
+            "exact": self._exact.stats(),
+            "semantic_hits": self.semantic_hits,
+            "indexes": {scope: index.size for scope, index in self._indexes.items()},
+        }
+
+
+response_cache = SemanticResponseCache(
+    exact_maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+    index_capacity=settings.RESPONSE_CACHE_INDEX_CAPACITY,
+    default_ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
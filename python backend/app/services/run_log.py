@@ -0,0 +1,140 @@
+# app/services/run_log.py
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.database.async_mongo import mongo_db
+
+logger = logging.getLogger(__name__)
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+
+class RunLogPipeline:
+    """
+    Fire-and-forget run history. `record()` only enqueues (never awaits I/O),
+    and a single background task drains the queue into `run_logs` with
+    batched `insert_many` calls, so logging adds no latency to responses.
+
+    The queue is bounded: when Mongo falls behind, records are dropped
+    according to `drop_policy` (and counted) rather than growing memory or
+    blocking requests.
+    """
+
+    def __init__(self, collection, max_queue: int, batch_size: int, flush_interval: float,
+                 drop_policy: str = DROP_OLDEST, max_text_chars: int = 4000, enabled: bool = True):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.max_text_chars = max_text_chars
+        self.enabled = enabled
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _clip(self, text: Optional[str]) -> Optional[str]:
+        if text is None or len(text) <= self.max_text_chars:
+            return text
+        return text[:self.max_text_chars] + "…"
+
+    def record(self, **fields: Any):
+        """Queue one run record. Safe to call from any coroutine; never blocks."""
+        if not self.enabled:
+            return
+        entry = {**fields, "created_at": datetime.utcnow()}
+        for key in ("input", "output"):
+            if isinstance(entry.get(key), str):
+                entry[key] = self._clip(entry[key])
+
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except asyncio.QueueFull:
+            pass
+        self.dropped += 1
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(entry)
+            except (asyncio.QueueEmpty, asyncio.QueueFull):
+                pass
+
+    # ─── Background writer ───────────────────────────────────
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and flush whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            await self._write(self._drain([]))
+
+    def _drain(self, batch: List[dict]) -> List[dict]:
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _run(self):
+        batch: List[dict] = []
+        try:
+            while True:
+                batch.append(await self._queue.get())
+                # Give a burst a moment to accumulate so inserts are batched
+                if self._queue.qsize() < self.batch_size:
+                    await asyncio.sleep(self.flush_interval)
+                pending, batch = self._drain(batch), []
+                # Shielded so shutdown cannot interrupt an insert half-way
+                await asyncio.shield(self._write(pending))
+        finally:
+            if batch:
+                await self._write(self._drain(batch))
+
+    async def _write(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except PyMongoError as exc:
+            self.failed += len(batch)
+            logger.error(f"Dropped {len(batch)} run logs after insert failure: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+run_log = RunLogPipeline(
+    mongo_db["run_logs"],
+    max_queue=settings.RUN_LOG_QUEUE_SIZE,
+    batch_size=settings.RUN_LOG_BATCH_SIZE,
+    flush_interval=settings.RUN_LOG_FLUSH_INTERVAL,
+    drop_policy=settings.RUN_LOG_DROP_POLICY,
+    max_text_chars=settings.RUN_LOG_MAX_TEXT_CHARS,
+    enabled=settings.RUN_LOG_ENABLED,
+)
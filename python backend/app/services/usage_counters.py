@@ -0,0 +1,95 @@
+# app/services/usage_counters.py
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.database.async_mongo import mongo_db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Usage:
+    month: int = 0
+    day: int = 0
+
+
+class UsageCounters:
+    """
+    Pre-aggregated usage counters, one document per (metric, identifier,
+    month) in `usage_counters`:
+
+        {"_id": "messages:alice@example.com:2026-10", "total": 42,
+         "days": {"18": 3, ...}, "expires_at": ...}
+
+    Increments are a single atomic `$inc` upsert on the month document, so
+    a quota check costs one keyed write no matter how much history the
+    caller has. Counts are written through to an in-process cache so reads
+    (and fast rejections of callers already over quota) skip Mongo.
+    """
+
+    def __init__(self, collection, cache_ttl: float, cache_size: int = 10000):
+        self.collection = collection
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @staticmethod
+    def _key(metric: str, identifier: str, now: datetime) -> str:
+        return f"{metric}:{identifier}:{now:%Y-%m}"
+
+    @staticmethod
+    def _usage(doc: Optional[dict], now: datetime) -> Usage:
+        if not doc:
+            return Usage()
+        return Usage(month=doc.get("total", 0), day=doc.get("days", {}).get(f"{now.day:02d}", 0))
+
+    def peek(self, identifier: str, metric: str = "messages") -> Optional[Usage]:
+        """Cached usage, or None if this worker has not seen the identifier recently."""
+        now = datetime.utcnow()
+        return self._cache.get((self._key(metric, identifier, now), now.day))
+
+    async def get(self, identifier: str, metric: str = "messages") -> Usage:
+        now = datetime.utcnow()
+        cache_key = (self._key(metric, identifier, now), now.day)
+        usage = self._cache.get(cache_key)
+        if usage is None:
+            doc = await self.collection.find_one({"_id": cache_key[0]}, {"total": 1, "days": 1})
+            usage = self._usage(doc, now)
+            self._cache.set(cache_key, usage)
+        return usage
+
+    async def incr(self, identifier: str, metric: str = "messages", amount: int = 1) -> Usage:
+        """Atomically add `amount` to today's and this month's counters and return the new totals."""
+        now = datetime.utcnow()
+        key = self._key(metric, identifier, now)
+        # Keep the document a little past month end so late reads still see it
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            {
+                "$inc": {"total": amount, f"days.{now.day:02d}": amount},
+                "$setOnInsert": {
+                    "metric": metric,
+                    "identifier": identifier,
+                    "month": f"{now:%Y-%m}",
+                    "expires_at": month_start + timedelta(days=62),
+                },
+            },
+            upsert=True,
+            projection={"total": 1, "days": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        usage = self._usage(doc, now)
+        self._cache.set((key, now.day), usage)
+        return usage
+
+
+usage_counters = UsageCounters(
+    mongo_db["usage_counters"],
+    cache_ttl=settings.USAGE_COUNTER_CACHE_TTL,
+)
@@ -0,0 +1,235 @@
+# app/services/usage_meter.py
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.config import settings
+from app.database.async_mongo import mongo_db
+from app.utils.cache import TTLCache
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (input, output). Longest matching model prefix wins.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o4-mini": (1.10, 4.40),
+    "o3-mini": (1.10, 4.40),
+    "o3": (2.00, 8.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+DIMENSIONS = ("agent", "api_key", "user", "plan", "model")
+PERIODS = {"hour": timedelta(days=90), "day": timedelta(days=400)}  # period -> retention
+METRICS = ("requests", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd")
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    model = (model or "").lower()
+    match = max((name for name in MODEL_PRICES if model.startswith(name)), key=len, default=None)
+    if match is None:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[match]
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def _bucket_start(now: datetime, period: str) -> datetime:
+    if period == "hour":
+        return now.replace(minute=0, second=0, microsecond=0)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class UsageMeter:
+    """
+    Token and cost accounting. Each run adds to in-memory counters keyed by
+    (period, bucket, dimension, key) for every dimension it belongs to
+    (agent, API key, user, plan, model); a background task flushes them to
+    `usage_buckets` as `$inc` upserts, one bulk_write per interval.
+
+    The same buckets back token-based plan limits: a caller's spend for the
+    current day/month is read from the day buckets (briefly cached) plus
+    whatever this worker has not flushed yet.
+    """
+
+    def __init__(self, collection, flush_interval: float, totals_cache_ttl: float):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, datetime, str, str], Counter] = {}
+        self._totals = TTLCache(maxsize=10_000, ttl=totals_cache_ttl)
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    # ─── Recording ───────────────────────────────────────────
+    def record(self, model: Optional[str], usage: Optional[Dict[str, int]], **keys: Optional[str]):
+        """
+        Add one run. `keys` maps dimension -> key, e.g.
+        record("gpt-4o", usage, agent="...", api_key="...", user="user:a@b.c", plan="free").
+        """
+        usage = usage or {}
+        prompt = usage.get("prompt_tokens", 0) or 0
+        completion = usage.get("completion_tokens", 0) or 0
+        delta = {
+            "requests": 1,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": usage.get("total_tokens") or prompt + completion,
+            "cost_usd": estimate_cost(model, prompt, completion),
+        }
+        keys = {**keys, "model": model}
+        now = datetime.utcnow()
+        for period in PERIODS:
+            bucket = _bucket_start(now, period)
+            for dimension in DIMENSIONS:
+                key = keys.get(dimension)
+                if key:
+                    self._pending.setdefault((period, bucket, dimension, str(key)), Counter()).update(delta)
+
+    # ─── Flushing ────────────────────────────────────────────
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.shield(self.flush())
+
+    async def flush(self):
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            slots, ops = list(pending), []
+            for (period, bucket, dimension, key), counts in pending.items():
+                ops.append(UpdateOne(
+                    {"_id": f"{period}:{dimension}:{key}:{bucket:%Y-%m-%dT%H}"},
+                    {
+                        "$inc": {metric: counts.get(metric, 0) for metric in METRICS},
+                        "$setOnInsert": {
+                            "period": period,
+                            "dimension": dimension,
+                            "key": key,
+                            "bucket": bucket,
+                            "expires_at": bucket + PERIODS[period],
+                        },
+                    },
+                    upsert=True,
+                ))
+            try:
+                await self.collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as exc:
+                # Unordered: every op not listed in writeErrors was applied, so
+                # re-queuing those too would count them twice
+                failed = [slots[error["index"]] for error in exc.details.get("writeErrors", [])]
+                logger.error(f"Usage flush failed for {len(failed)} of {len(ops)} buckets, will retry them")
+                self._requeue(pending, failed)
+            except PyMongoError as exc:
+                # Put the counts back so the next flush retries them
+                logger.error(f"Usage flush failed, will retry: {exc}")
+                self._requeue(pending, slots)
+                return
+            # Persisted totals moved; re-read them on the next limit check
+            self._totals.clear()
+
+    def _requeue(self, pending: Dict[Tuple[str, datetime, str, str], Counter], slots: List[Tuple[str, datetime, str, str]]):
+        for slot in slots:
+            self._pending.setdefault(slot, Counter()).update(pending[slot])
+
+    def pending_stats(self) -> Dict[str, Any]:
+        return {"pending_buckets": len(self._pending)}
+
+    # ─── Token limits ────────────────────────────────────────
+    def _unflushed(self, dimension: str, key: str, since: datetime) -> int:
+        return sum(
+            counts.get("total_tokens", 0)
+            for (period, bucket, dim, k), counts in self._pending.items()
+            if period == "day" and dim == dimension and k == key and bucket >= since
+        )
+
+    async def tokens_used(self, dimension: str, key: str, since: datetime) -> int:
+        cache_key = (dimension, key, since)
+        persisted = self._totals.get(cache_key)
+        if persisted is None:
+            rows = await self.collection.aggregate([
+                {"$match": {"period": "day", "dimension": dimension, "key": key, "bucket": {"$gte": since}}},
+                {"$group": {"_id": None, "total": {"$sum": "$total_tokens"}}},
+            ]).to_list(length=1)
+            persisted = rows[0]["total"] if rows else 0
+            self._totals.set(cache_key, persisted)
+        return persisted + self._unflushed(dimension, key, since)
+
+    @traced("usage.check_token_budget")
+    async def check_token_budget(self, caller: Any):
+        """Raise 429 if the caller's plan token budget for today or this month is spent."""
+        if caller is None:
+            return
+        daily = getattr(caller, "daily_token_limit", None)
+        monthly = getattr(caller, "monthly_token_limit", None)
+        if daily is None and monthly is None:
+            return
+        today = _bucket_start(datetime.utcnow(), "day")
+        for limit, since, scope in (
+            (daily, today, "day"),
+            (monthly, today.replace(day=1), "month"),
+        ):
+            if limit is not None and await self.tokens_used("user", caller.identity, since) >= limit:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Token limit exceeded ({limit} tokens per {scope})",
+                )
+
+    # ─── Reporting ───────────────────────────────────────────
+    async def top(self, dimension: str, period: str, start: datetime, end: datetime,
+                  limit: int = 50, sort_by: str = "total_tokens") -> List[Dict[str, Any]]:
+        rows = await self.collection.aggregate([
+            {"$match": {"period": period, "dimension": dimension, "bucket": {"$gte": start, "$lt": end}}},
+            {"$group": {"_id": "$key", **{m: {"$sum": f"${m}"} for m in METRICS}}},
+            {"$sort": {sort_by: -1}},
+            {"$limit": limit},
+        ]).to_list(length=limit)
+        for row in rows:
+            row["key"] = row.pop("_id")
+            row["cost_usd"] = round(row["cost_usd"], 6)
+        return rows
+
+    async def series(self, dimension: str, key: str, period: str, start: datetime,
+                     end: datetime) -> List[Dict[str, Any]]:
+        docs = await self.collection.find(
+            {"period": period, "dimension": dimension, "key": key, "bucket": {"$gte": start, "$lt": end}},
+            {"_id": 0, "bucket": 1, **{m: 1 for m in METRICS}},
+        ).sort("bucket", 1).to_list(length=None)
+        for doc in docs:
+            doc["cost_usd"] = round(doc.get("cost_usd", 0.0), 6)
+        return docs
+
+
+usage_meter = UsageMeter(
+    mongo_db["usage_buckets"],
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    totals_cache_ttl=settings.USAGE_TOTALS_CACHE_TTL,
+)
@@ -0,0 +1,224 @@
+# app/services/vector_store_service.py
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from fastapi import HTTPException
+from openai import AsyncOpenAI
+
+from app.agent.client_pool import openai_client_pool
+from app.agent.embeddings import embed_texts
+from app.config import settings
+from app.database.async_mongo import api_keys_collection, vector_stores_collection
+from app.utils.cache import TTLCache
+from app.vector.store import LocalVectorStore, chunk_text
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStoreService:
+    """
+    Metadata for vector stores lives in the `vector_stores` collection; the
+    chunks and embeddings live on local disk under `root/<store_id>/`.
+    Open stores are kept in an LRU so repeated searches hit a warm memmap.
+    """
+
+    def __init__(self, root: str, max_open: int, default_results: int, embed_batch: int,
+                 ivf_min_rows: int, nprobe: int):
+        self.root = root
+        self.default_results = default_results
+        self.embed_batch = embed_batch
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._open = TTLCache(maxsize=max_open, ttl=3600.0)
+        self._docs = TTLCache(maxsize=1024, ttl=60.0)
+        self._ingest_locks: Dict[str, asyncio.Lock] = {}
+
+    # ── lookups ───────────────────────────────────────────────
+    async def get_doc(self, store_id: str) -> dict:
+        doc = self._docs.get(store_id)
+        if doc is not None:
+            return doc
+        if not ObjectId.is_valid(store_id):
+            raise HTTPException(status_code=400, detail="Invalid vector store ID")
+        doc = await vector_stores_collection.find_one({"_id": ObjectId(store_id)})
+        if not doc:
+            raise HTTPException(status_code=404, detail=f"Vector store {store_id} not found")
+        self._docs.set(store_id, doc)
+        return doc
+
+    async def _client(self, doc: dict) -> AsyncOpenAI:
+        api_key = settings.OPENAI_API_KEY
+        key_id = doc.get("openai_api_key_id")
+        if key_id and ObjectId.is_valid(key_id):
+            key_doc = await api_keys_collection.find_one({"_id": ObjectId(key_id)})
+            if key_doc and key_doc.get("key_secret"):
+                api_key = key_doc["key_secret"]
+        return openai_client_pool.get(api_key)
+
+    def _store(self, store_id: str, dim: int) -> LocalVectorStore:
+        store = self._open.get(store_id)
+        if store is None:
+            store = LocalVectorStore(
+                os.path.join(self.root, store_id), dim,
+                ivf_min_rows=self.ivf_min_rows, nprobe=self.nprobe,
+            )
+            self._open.set(store_id, store)
+        return store
+
+    # ── lifecycle ─────────────────────────────────────────────
+    async def create(self, name: str, openai_api_key_id: Optional[str], embedding_model: Optional[str]) -> dict:
+        now = datetime.utcnow()
+        doc = {
+            "name": name,
+            "openai_api_key_id": openai_api_key_id,
+            "embedding_model": embedding_model or settings.EMBEDDING_MODEL,
+            "dim": None,
+            "file_counts": {"files": 0, "chunks": 0},
+            "created_at": now,
+            "updated_at": now,
+        }
+        inserted = await vector_stores_collection.insert_one(doc)
+        doc["_id"] = inserted.inserted_id
+        return doc
+
+    async def delete(self, store_id: str):
+        await self.get_doc(store_id)
+        await vector_stores_collection.delete_one({"_id": ObjectId(store_id)})
+        self._docs.pop(store_id)
+        self._open.pop(store_id)
+        await asyncio.to_thread(shutil.rmtree, os.path.join(self.root, store_id), True)
+
+    # ── ingestion ─────────────────────────────────────────────
+    async def ingest(self, store_id: str, documents: List[dict], max_tokens: int, overlap_tokens: int) -> dict:
+        doc = await self.get_doc(store_id)
+        client = await self._client(doc)
+
+        file_ids, texts, records = [], [], []
+        for item in documents:
+            file_id = item.get("file_id") or f"file-{uuid.uuid4().hex[:24]}"
+            file_ids.append(file_id)
+            for chunk in chunk_text(item["text"], max_tokens, overlap_tokens):
+                texts.append(chunk)
+                records.append({
+                    "file_id": file_id,
+                    "filename": item.get("filename"),
+                    "text": chunk,
+                    "attributes": item.get("attributes") or {},
+                })
+        if not records:
+            raise HTTPException(status_code=400, detail="Documents contain no text")
+        if doc.get("dim"):
+            # Checked before embedding so a rejected request costs nothing
+            self._reject_live(self._store(store_id, doc["dim"]), file_ids)
+
+        batches = [texts[i:i + self.embed_batch] for i in range(0, len(texts), self.embed_batch)]
+        try:
+            embedded = await asyncio.gather(
+                *(embed_texts(client, batch, model=doc["embedding_model"]) for batch in batches)
+            )
+        except Exception as exc:
+            logger.error(f"Embedding failed for vector store {store_id}: {exc}", exc_info=True)
+            raise HTTPException(status_code=502, detail=f"Embedding failed: {exc}")
+        vectors = np.concatenate(embedded)
+
+        lock = self._ingest_locks.setdefault(store_id, asyncio.Lock())
+        async with lock:
+            dim = doc.get("dim") or vectors.shape[1]
+            if vectors.shape[1] != dim:
+                raise HTTPException(status_code=400, detail=f"Embedding dim {vectors.shape[1]} != store dim {dim}")
+            store = self._store(store_id, dim)
+            self._reject_live(store, file_ids)
+            await asyncio.to_thread(store.add, vectors, records)
+            file_counts = store.file_counts()
+            await vector_stores_collection.update_one(
+                {"_id": ObjectId(store_id)},
+                {"$set": {"dim": dim, "file_counts": file_counts, "updated_at": datetime.utcnow()}},
+            )
+            self._docs.pop(store_id)
+
+        logger.info(f"Ingested {len(records)} chunks from {len(documents)} documents into {store_id}")
+        return {"file_ids": file_ids, "chunks": len(records), "file_counts": file_counts}
+
+    @staticmethod
+    def _reject_live(store: LocalVectorStore, file_ids: List[str]):
+        # Chunks would otherwise pile up under one id; delete the file first to replace it
+        live = store.live_file_ids().intersection(file_ids)
+        if live:
+            raise HTTPException(status_code=409, detail=f"File {sorted(live)[0]} already exists in this vector store")
+
+    async def delete_file(self, store_id: str, file_id: str):
+        doc = await self.get_doc(store_id)
+        if not doc.get("dim"):
+            raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+        store = self._store(store_id, doc["dim"])
+        if not await asyncio.to_thread(store.delete_file, file_id):
+            raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+        await vector_stores_collection.update_one(
+            {"_id": ObjectId(store_id)},
+            {"$set": {"file_counts": store.file_counts(), "updated_at": datetime.utcnow()}},
+        )
+        self._docs.pop(store_id)
+
+    # ── search ────────────────────────────────────────────────
+    async def search(self, store_ids: List[str], query: str, max_num_results: Optional[int] = None,
+                     ranking_options: Optional[dict] = None, filters: Optional[dict] = None) -> Dict[str, Any]:
+        """
+        Embed the query once per (API key, model) pair, run top-k in each
+        store and merge by score. `ranking_options.score_threshold` drops
+        weak matches before the cut.
+        """
+        started = time.perf_counter()
+        k = max_num_results or self.default_results
+        score_threshold = float((ranking_options or {}).get("score_threshold", 0.0))
+
+        docs = await asyncio.gather(*(self.get_doc(store_id) for store_id in store_ids))
+        query_vectors: Dict[tuple, np.ndarray] = {}
+        searches = []
+        for store_id, doc in zip(store_ids, docs):
+            if not doc.get("dim"):
+                continue  # nothing ingested yet
+            scope = (doc.get("openai_api_key_id"), doc["embedding_model"])
+            if scope not in query_vectors:
+                client = await self._client(doc)
+                query_vectors[scope] = (await embed_texts(client, [query], model=doc["embedding_model"]))[0]
+            store = self._store(store_id, doc["dim"])
+            searches.append((store_id, asyncio.to_thread(
+                store.search, query_vectors[scope], k, filters, score_threshold,
+            )))
+
+        try:
+            per_store = await asyncio.gather(*(c for _, c in searches))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+        results = []
+        for (store_id, _), hits in zip(searches, per_store):
+            for hit in hits:
+                hit["vector_store_id"] = store_id
+            results.extend(hits)
+        results.sort(key=lambda hit: hit["score"], reverse=True)
+
+        return {
+            "query": query,
+            "results": results[:k],
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+vector_store_service = VectorStoreService(
+    root=settings.VECTOR_STORE_DIR,
+    max_open=settings.VECTOR_STORE_MAX_OPEN,
+    default_results=settings.VECTOR_STORE_DEFAULT_RESULTS,
+    embed_batch=settings.VECTOR_STORE_EMBED_BATCH,
+    ivf_min_rows=settings.VECTOR_STORE_IVF_MIN_ROWS,
+    nprobe=settings.VECTOR_STORE_IVF_NPROBE,
+)
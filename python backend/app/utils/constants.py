@@ -10,3 +10,11 @@ PLAN_LIMITS = {
     "scale_up_pro": 60,
     "enterprise_engine": 120
 }
+
+# Chat message quotas per plan: (per month, per day); None means unlimited
+MESSAGE_LIMITS = {
+    "free": (5, None),
+}
+
+# Max words per message on the free plan
+FREE_MESSAGE_MAX_WORDS = 500
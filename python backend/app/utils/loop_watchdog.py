@@ -0,0 +1,132 @@
+# app/utils/loop_watchdog.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from app.config import settings
+from app.utils.metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_BLOCKED_SECONDS, EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROJECT_DIR = os.path.dirname(_APP_DIR)
+
+
+def _blocking_site(frame) -> str:
+    """Innermost frame that belongs to our code, as `app/module.py:function`."""
+    innermost = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if innermost is None:
+            innermost = frame
+        if os.path.abspath(filename).startswith(_APP_DIR) and not filename.endswith("loop_watchdog.py"):
+            return f"{os.path.relpath(filename, _PROJECT_DIR)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    if innermost is None:
+        return "unknown"
+    return f"{os.path.basename(innermost.f_code.co_filename)}:{innermost.f_code.co_name}"
+
+
+class LoopWatchdog:
+    """
+    Detects callbacks that block the event loop.
+
+    A heartbeat task on the loop stamps the time every `interval` seconds
+    (and records scheduling lag). A daemon thread checks the stamp; once it
+    is `threshold` seconds overdue the loop is stuck inside one callback, so
+    the thread grabs the loop thread's current stack with
+    `sys._current_frames()` — that is the code doing the blocking. Each
+    stall is counted per call site in metrics, and logged with its stack
+    (at most once per site every `log_cooldown` seconds).
+    """
+
+    def __init__(self, interval: float, threshold: float, log_cooldown: float = 60.0, stack_limit: int = 25):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_cooldown = log_cooldown
+        self.stack_limit = stack_limit
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_logged: Dict[str, float] = {}
+
+    # ─── Lifecycle ───────────────────────────────────────────
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    # ─── Loop side ───────────────────────────────────────────
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - due))
+            self._beat = time.monotonic()
+
+    # ─── Watchdog thread ─────────────────────────────────────
+    def _watch(self):
+        check_every = min(self.interval, self.threshold) / 2
+        stalled_beat: Optional[float] = None
+        site = ""
+        while not self._stop.wait(check_every):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if stalled_beat is None:
+                if overdue >= self.threshold:
+                    stalled_beat = beat
+                    site = self._capture(overdue)
+            elif beat != stalled_beat:
+                # Loop is running again: book the full stall against the site
+                blocked = max(0.0, beat - stalled_beat - self.interval)
+                EVENT_LOOP_BLOCKED_SECONDS.labels(site).inc(blocked)
+                logger.debug(f"Event loop unblocked after {blocked:.3f}s ({site})")
+                stalled_beat = None
+
+    def _capture(self, overdue: float) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "unknown"
+        site = _blocking_site(frame)
+        EVENT_LOOP_BLOCKED.labels(site).inc()
+
+        now = time.monotonic()
+        if now - self._last_logged.get(site, float("-inf")) >= self.log_cooldown:
+            self._last_logged[site] = now
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_limit))
+            logger.warning(f"Event loop blocked for >{overdue:.3f}s in {site}\n{stack}")
+        return site
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL,
+    threshold=settings.LOOP_WATCHDOG_THRESHOLD,
+    log_cooldown=settings.LOOP_WATCHDOG_LOG_COOLDOWN,
+)
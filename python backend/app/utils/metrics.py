@@ -0,0 +1,187 @@
+# app/utils/metrics.py
+#
+# Prometheus instrumentation shared by the app. Metric objects are module
+# level so any layer can import and observe them; `/metrics` in app/main.py
+# exposes them.
+
+import logging
+import os
+import time
+from typing import Callable, Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Request/LLM latencies span ~1 ms to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+# ─── HTTP ───────────────────────────────────────────────────
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency (until the last body byte)",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served", ["method"])
+
+# ─── LLM ────────────────────────────────────────────────────
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Upstream model call latency",
+    ["model", "kind", "status"], buckets=LATENCY_BUCKETS,
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed content token",
+    ["model"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens consumed upstream", ["model", "type"])
+
+# ─── Mongo ──────────────────────────────────────────────────
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency",
+    ["collection", "command", "status"], buckets=FAST_BUCKETS,
+)
+
+# ─── Tools ──────────────────────────────────────────────────
+TOOL_SECONDS = Histogram(
+    "tool_execution_duration_seconds", "Function tool execution time",
+    ["tool", "status"], buckets=FAST_BUCKETS + (5, 10, 30),
+)
+
+# ─── Password hashing pool ──────────────────────────────────
+PASSWORD_HASH_PENDING = Gauge("password_hash_pending", "bcrypt calls running or waiting for a worker")
+PASSWORD_HASH_QUEUED = Gauge("password_hash_queued", "bcrypt calls waiting for a free worker")
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected", "bcrypt calls rejected with 503 because the queue was full")
+
+# ─── Background jobs ────────────────────────────────────────
+JOB_SECONDS = Histogram(
+    "job_duration_seconds", "Background job attempt duration",
+    ["kind", "status"], buckets=LATENCY_BUCKETS + (300, 900),
+)
+
+# ─── Event loop ─────────────────────────────────────────────
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Delay between when a loop callback was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked", "Callbacks that blocked the event loop past the watchdog threshold", ["site"],
+)
+EVENT_LOOP_BLOCKED_SECONDS = Counter(
+    "event_loop_blocked_seconds", "Time the event loop spent blocked, by call site", ["site"],
+)
+
+
+def observe_llm_usage(model: str, usage) -> None:
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+# ─── Cache ratios (pulled from each cache's stats() at scrape time) ──
+class CacheStatsCollector:
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], dict]] = {}
+
+    def register(self, name: str, stats: Callable[[], dict]):
+        self._sources[name] = stats
+
+    def collect(self):
+        hits = GaugeMetricFamily("cache_hits", "Cache hits since start", labels=["cache"])
+        misses = GaugeMetricFamily("cache_misses", "Cache misses since start", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Cache hits / lookups since start", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Entries currently cached", labels=["cache"])
+        for name, stats in list(self._sources.items()):
+            try:
+                data = stats() or {}
+            except Exception as exc:
+                logger.debug(f"Cache stats for {name} unavailable: {exc}")
+                continue
+            h, m = data.get("hits", 0), data.get("misses", 0)
+            hits.add_metric([name], h)
+            misses.add_metric([name], m)
+            ratio.add_metric([name], h / (h + m) if h + m else 0.0)
+            if "size" in data:
+                size.add_metric([name], data["size"])
+        yield from (hits, misses, ratio, size)
+
+
+cache_stats = CacheStatsCollector()
+REGISTRY.register(cache_stats)
+
+
+# ─── Mongo command listener ─────────────────────────────────
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records every driver command's latency, labelled by collection."""
+
+    def __init__(self):
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event, status: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_SECONDS.labels(collection, event.command_name, status).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+# ─── HTTP middleware (pure ASGI so streamed bodies are timed to the end) ──
+class MetricsMiddleware:
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.labels(method).dec()
+            # Route templates keep label cardinality bounded (no raw ids)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(method, path, str(status["code"])).observe(time.perf_counter() - started)
+
+
+# ─── Exposition ─────────────────────────────────────────────
+def render_metrics() -> tuple:
+    """Return (body, content type). Aggregates across workers in multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
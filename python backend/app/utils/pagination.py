@@ -0,0 +1,119 @@
+# app/utils/pagination.py
+
+import base64
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+from bson import ObjectId, errors as bson_errors
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pymongo import ASCENDING
+
+MAX_LIMIT = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Query parameters shared by every paginated list endpoint:
+
+        ?limit=50&cursor=<X-Next-Cursor from the previous page>&fields=name,status
+
+    Without `limit` the whole list is returned, as before pagination existed.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Page size (all results when omitted)"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+def encode_cursor(last_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(last_id.binary).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError, bson_errors.InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _default_transform(doc: dict) -> dict:
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def _etag(items: List[dict], next_cursor: Optional[str]) -> str:
+    payload = json.dumps([items, next_cursor], sort_keys=True, default=str)
+    return f'W/"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+
+async def paginate(
+    collection,
+    request: Request,
+    response: Response,
+    page: PageParams,
+    query: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, int]] = None,
+    direction: int = ASCENDING,
+    transform: Callable[[dict], dict] = _default_transform,
+    model: Optional[Type[BaseModel]] = None,
+) -> Union[List[dict], Response]:
+    """
+    Keyset pagination over `_id`: each page fetches `limit + 1` documents
+    past the cursor, so cost stays flat no matter how deep the client pages.
+
+    Returns the page as a list (validated by the route's response_model) with
+    `ETag` and `X-Next-Cursor` set on `response`. When the client's
+    If-None-Match matches, returns a bare 304. When `fields` is requested
+    the projected page is returned directly, since it no longer matches the
+    full response model; only fields of `model` (the route's item model)
+    can be selected, so stored fields the model hides never leak.
+    """
+    filters = dict(query or {})
+    if page.cursor:
+        bound = {"_id": {"$gt" if direction == ASCENDING else "$lt": decode_cursor(page.cursor)}}
+        filters = {"$and": [filters, bound]} if filters else bound
+
+    fields = None
+    if page.fields:
+        if model is None:
+            raise HTTPException(status_code=400, detail="Field selection is not supported on this endpoint")
+        fields = [f for f in page.fields if f in model.model_fields]
+        selected = [f for f in fields if f != "id" and (projection is None or f in projection)]
+        projection = {f: 1 for f in selected}
+        projection["_id"] = 1
+
+    cursor = collection.find(filters, projection).sort("_id", direction)
+    if page.limit is None:
+        docs = await cursor.to_list(length=None)
+        next_cursor = None
+    else:
+        docs = await cursor.limit(page.limit + 1).to_list(length=page.limit + 1)
+        next_cursor = encode_cursor(docs[page.limit - 1]["_id"]) if len(docs) > page.limit else None
+        docs = docs[:page.limit]
+    items = [transform(doc) for doc in docs]
+    if fields is not None:
+        keep = set(fields) | {"id"}
+        items = [{k: v for k, v in item.items() if k in keep} for item in items]
+
+    headers = {"ETag": _etag(items, next_cursor)}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    if fields is not None:
+        return JSONResponse(jsonable_encoder(items), headers=headers)
+    response.headers.update(headers)
+    return items
@@ -0,0 +1,68 @@
+# app/utils/streaming.py
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_FORMATS = ("sse", "ndjson")
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def format_ndjson(event: str, data: Dict[str, Any]) -> str:
+    return json.dumps({"event": event, **data}, default=str) + "\n"
+
+
+async def _agent_events(
+    request: Request,
+    chunks: AsyncIterator[str],
+    fmt: str,
+) -> AsyncIterator[str]:
+    encode = format_sse if fmt == "sse" else format_ndjson
+    parts = []
+    try:
+        async for delta in chunks:
+            if await request.is_disconnected():
+                logger.info("Client disconnected, cancelling agent stream")
+                return
+            parts.append(delta)
+            yield encode("token", {"delta": delta})
+        yield encode("done", {"output": "".join(parts)})
+    except HTTPException as exc:
+        yield encode("error", {"detail": exc.detail})
+    except Exception as exc:
+        logger.error(f"Agent stream failed: {exc}", exc_info=True)
+        yield encode("error", {"detail": f"Agent execution failed: {exc}"})
+    finally:
+        # Runs on normal completion as well as when Starlette cancels the
+        # response because the client went away.
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def agent_stream_response(request: Request, chunks: AsyncIterator[str], fmt: str = "sse") -> StreamingResponse:
+    """
+    Wrap an iterator of output deltas in an SSE or NDJSON streaming response.
+    Emits `token` events per delta, then a single `done` (or `error`) event.
+    """
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {fmt}")
+
+    return StreamingResponse(
+        _agent_events(request, chunks, fmt),
+        media_type=SSE_MEDIA_TYPE if fmt == "sse" else NDJSON_MEDIA_TYPE,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # disable proxy buffering (nginx)
+        },
+    )
@@ -0,0 +1,185 @@
+# app/utils/tracing.py
+#
+# OpenTelemetry tracing. Spans cover the request (TracingMiddleware), every
+# MongoDB command issued under it (MongoCommandTracer), model calls, tool
+# calls and the agent runner's stages. Exporters are chosen with
+# TRACING_EXPORTERS; with tracing disabled the API's no-op tracer is used,
+# so instrumented code needs no guards.
+
+import functools
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("startupcopilot")
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+def setup_tracing() -> Optional[TracerProvider]:
+    """Install the SDK tracer provider with the configured exporters."""
+    if not settings.TRACING_ENABLED:
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}))
+    for name in (n.strip() for n in settings.TRACING_EXPORTERS.split(",") if n.strip()):
+        if name == "console":
+            exporter = ConsoleSpanExporter()
+        elif name == "file":
+            # One JSON span per line, appended
+            out = open(settings.TRACING_FILE_PATH, "a", buffering=1)
+            exporter = ConsoleSpanExporter(out=out, formatter=lambda span: json.dumps(json.loads(span.to_json())) + "\n")
+        elif name == "otlp":
+            # Optional dependency: opentelemetry-exporter-otlp-proto-http
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT or None)
+        else:
+            logger.warning(f"Unknown tracing exporter '{name}' ignored")
+            continue
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled ({settings.TRACING_EXPORTERS})")
+    return provider
+
+
+def current_trace_id() -> Optional[str]:
+    ctx = trace.get_current_span().get_span_context()
+    return format(ctx.trace_id, "032x") if ctx.is_valid else None
+
+
+# ─── Logging ────────────────────────────────────────────────
+class TraceContextFilter(logging.Filter):
+    """Adds `trace_id` / `span_id` to every record so log lines join up with traces."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = trace.get_current_span().get_span_context()
+        record.trace_id = format(ctx.trace_id, "032x") if ctx.is_valid else "-"
+        record.span_id = format(ctx.span_id, "016x") if ctx.is_valid else "-"
+        return True
+
+
+# ─── HTTP ───────────────────────────────────────────────────
+class TracingMiddleware:
+    """
+    Server span per HTTP request. Continues an incoming W3C `traceparent`
+    and returns the trace id in `X-Trace-Id`, so a slow response can be
+    looked up directly.
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            return await self.app(scope, receive, send)
+
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        parent = propagate.extract(carrier)
+        method = scope["method"]
+        with tracer.start_as_current_span(
+            method, context=parent, kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]},
+        ) as span:
+            trace_id = current_trace_id()
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                    if trace_id:
+                        message.setdefault("headers", [])
+                        message["headers"] = [*message["headers"], (TRACE_ID_HEADER.lower().encode(), trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{method} {route}")
+                    span.set_attribute("http.route", route)
+
+
+# ─── Mongo ──────────────────────────────────────────────────
+class MongoCommandTracer(monitoring.CommandListener):
+    """
+    Child span per driver command. Only commands issued inside an active
+    trace get a span (Motor carries the caller's context into its executor
+    threads), so background jobs do not produce orphan root spans.
+    """
+
+    def __init__(self):
+        self._spans: Dict[tuple, Any] = {}
+
+    def started(self, event):
+        if not trace.get_current_span().get_span_context().is_valid:
+            return
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        span = tracer.start_span(
+            f"mongo {event.command_name} {collection}".strip(), kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection,
+            },
+        )
+        self._spans[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end()
+
+    def failed(self, event):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.set_status(Status(StatusCode.ERROR, str(event.failure)))
+            span.end()
+
+
+mongo_command_tracer = MongoCommandTracer()
+
+
+# ─── Helpers ────────────────────────────────────────────────
+def set_usage_attributes(span, usage: Any):
+    if usage is None:
+        return
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+        if value is not None:
+            span.set_attribute(f"llm.usage.{key}", value)
+
+
+def traced(name: str):
+    """Run the decorated coroutine function inside a span called `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def end_span(span, error: Optional[BaseException] = None):
+    """End a span started with `tracer.start_span` (used around async generators,
+    where attaching a context across yields would not unwind cleanly)."""
+    if error is not None:
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error)))
+    span.end()
@@ -1,16 +1,14 @@
-from app.database.mongo import agents_collection
+from app.database.async_mongo import agents_collection
 
-def search_agent_instructions(query: str, limit: int = 5):
+async def search_agent_instructions(query: str, limit: int = 5):
     """
     Search for agent instructions in MongoDB using text search.
+    The text index on 'name' and 'instructions' is created at startup.
     """
-    # Ensure a text index exists on the 'name' and 'instructions' fields
-    agents_collection.create_index([("name", "text"), ("instructions", "text")])
-
     # Perform text search
     results = agents_collection.find(
         {"$text": {"$search": query}},
         {"name": 1, "instructions": 1, "_id": 0}  # Return only name and instructions
     ).limit(limit)
 
-    return list(results)
\ No newline at end of file
+    return await results.to_list(length=None)
\ No newline at end of file
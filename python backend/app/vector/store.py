@@ -0,0 +1,349 @@
+# app/vector/store.py
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_META = "meta.json"
+_VECTORS = "vectors.f32"
+_CHUNKS = "chunks.jsonl"
+_IVF = "ivf.npz"
+
+_COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "ne": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+
+
+def chunk_text(text: str, max_tokens: int = 800, overlap_tokens: int = 400) -> List[str]:
+    """
+    Split text into overlapping windows. Whitespace-separated words stand in
+    for tokens, which keeps ingestion dependency-free and close enough for
+    retrieval granularity.
+    """
+    words = text.split()
+    if not words:
+        return []
+    max_tokens = max(1, max_tokens)
+    step = max(1, max_tokens - max(0, min(overlap_tokens, max_tokens // 2)))
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + max_tokens]))
+        if start + max_tokens >= len(words):
+            break
+    return chunks
+
+
+def matches_filter(attributes: Dict[str, Any], flt: Optional[dict]) -> bool:
+    """
+    Evaluate an OpenAI-style attribute filter: comparison filters
+    ({"type": "eq", "key": ..., "value": ...}) nested under "and"/"or".
+    """
+    if not flt:
+        return True
+    kind = flt.get("type")
+    if kind == "and":
+        return all(matches_filter(attributes, f) for f in flt.get("filters", []))
+    if kind == "or":
+        return any(matches_filter(attributes, f) for f in flt.get("filters", []))
+    compare = _COMPARISONS.get(kind)
+    if compare is None:
+        raise ValueError(f"Unsupported filter type: {kind}")
+    try:
+        return bool(compare(attributes.get(flt.get("key")), flt.get("value")))
+    except TypeError:
+        return False
+
+
+def _ranges(flags: np.ndarray) -> List[List[int]]:
+    """[start, end) runs of True in a boolean array."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], flags.astype(np.int8), [0]))))
+    return edges.reshape(-1, 2).tolist()
+
+
+class IVFIndex:
+    """
+    Inverted-file coarse quantizer: rows are bucketed under their nearest
+    k-means centroid and a query only scores the `nprobe` closest buckets.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray):
+        self.centroids = centroids
+        self.assignments = assignments
+        self._lists: Optional[List[np.ndarray]] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.assignments)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        count = len(vectors)
+        sample_size = min(count, max(nlist * 64, 10000))
+        sample = np.asarray(vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+        index = cls(centroids, np.empty(0, dtype=np.int32))
+        index.extend(vectors)
+        return index
+
+    def extend(self, vectors: np.ndarray, batch: int = 65536):
+        """Assign newly appended rows to their nearest centroid."""
+        labels = [
+            np.argmax(np.asarray(vectors[i:i + batch]) @ self.centroids.T, axis=1).astype(np.int32)
+            for i in range(0, len(vectors), batch)
+        ]
+        if labels:
+            self.assignments = np.concatenate([self.assignments, *labels])
+            self._lists = None
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._lists[c] for c in probe])
+
+    def save(self, path: str):
+        np.savez(path, centroids=self.centroids, assignments=self.assignments)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["assignments"])
+
+
+class LocalVectorStore:
+    """
+    One vector store on local disk. Embeddings live in a float32 matrix that
+    is memory-mapped (so the OS page cache, not the Python heap, holds the
+    bulk of the data) and searched with a single matrix-vector product; chunk
+    text and attributes are kept alongside as JSON lines.
+
+    Writes append rows and then bump `count` in meta.json, so a crash mid
+    ingest leaves the store at its previous consistent size. Deleting a file
+    tombstones its rows (kept as row ranges in meta.json), so a file id can
+    be ingested again after its old chunks were deleted.
+    """
+
+    def __init__(self, path: str, dim: int, ivf_min_rows: int = 50000, nprobe: int = 8):
+        self.path = path
+        self.dim = dim
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._write_lock = threading.Lock()
+        self._mask_cache: Dict[str, np.ndarray] = {}
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, _META)
+        if os.path.exists(meta_path):
+            with open(meta_path) as fh:
+                self.meta = json.load(fh)
+            if self.meta["dim"] != dim:
+                raise ValueError(f"Store {path} has dim {self.meta['dim']}, expected {dim}")
+        else:
+            self.meta = {"dim": dim, "count": 0, "capacity": 0, "chunks_bytes": 0, "deleted_rows": []}
+
+        self.count = self.meta["count"]
+        self.capacity = self.meta["capacity"]
+        self.vectors = self._map(self.capacity) if self.capacity else np.zeros((0, dim), dtype=np.float32)
+        self.records = self._load_records(self.count)
+        self.file_ids = np.asarray([r.get("file_id", "") for r in self.records], dtype=object)
+        self.deleted = np.zeros(self.count, dtype=bool)
+        for start, end in self.meta.get("deleted_rows", []):
+            self.deleted[start:end] = True
+        legacy = self.meta.pop("deleted_files", None)
+        if legacy:
+            # Stores written before row tombstones kept deleted file ids
+            self.deleted |= np.isin(self.file_ids, legacy)
+        self.ivf = self._load_ivf()
+
+    # ── persistence ───────────────────────────────────────────
+    def _map(self, capacity: int) -> np.ndarray:
+        file_path = os.path.join(self.path, _VECTORS)
+        mode = "r+" if os.path.exists(file_path) else "w+"
+        return np.memmap(file_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def _grow(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        if self.capacity:
+            self.vectors.flush()
+        file_path = os.path.join(self.path, _VECTORS)
+        with open(file_path, "ab") as fh:
+            fh.truncate(capacity * self.dim * 4)
+        self.vectors = self._map(capacity)
+        self.capacity = capacity
+
+    def _load_records(self, count: int) -> List[dict]:
+        records = []
+        chunks_path = os.path.join(self.path, _CHUNKS)
+        if not os.path.exists(chunks_path):
+            return records
+        with open(chunks_path) as fh:
+            for line in fh:
+                if len(records) >= count:
+                    break
+                records.append(json.loads(line))
+        return records
+
+    def _load_ivf(self) -> Optional[IVFIndex]:
+        ivf_path = os.path.join(self.path, _IVF)
+        if not os.path.exists(ivf_path):
+            return None
+        try:
+            ivf = IVFIndex.load(ivf_path)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning(f"Discarding unreadable IVF index at {ivf_path}: {exc}")
+            return None
+        if ivf.size > self.count:
+            return None
+        ivf.extend(self.vectors[ivf.size:self.count])
+        return ivf
+
+    def _write_meta(self):
+        self.meta.update(count=self.count, capacity=self.capacity, deleted_rows=_ranges(self.deleted))
+        tmp_path = os.path.join(self.path, _META + ".tmp")
+        with open(tmp_path, "w") as fh:
+            json.dump(self.meta, fh)
+        os.replace(tmp_path, os.path.join(self.path, _META))
+
+    # ── writes ────────────────────────────────────────────────
+    def add(self, vectors: np.ndarray, records: List[dict]):
+        """Append unit-normalised rows with their chunk records."""
+        if len(vectors) != len(records):
+            raise ValueError("vectors and records must have the same length")
+        if not len(records):
+            return
+        with self._write_lock:
+            start = self.count
+            end = start + len(records)
+            self._grow(end)
+            self.vectors[start:end] = vectors
+            self.vectors.flush()
+
+            # Drop any lines a previous crashed ingest left past `count`
+            with open(os.path.join(self.path, _CHUNKS), "ab") as fh:
+                fh.truncate(self.meta.get("chunks_bytes", 0))
+                fh.writelines((json.dumps(r) + "\n").encode() for r in records)
+                self.meta["chunks_bytes"] = fh.tell()
+
+            self.records.extend(records)
+            self.file_ids = np.concatenate([self.file_ids, np.asarray([r.get("file_id", "") for r in records], dtype=object)])
+            self.deleted = np.concatenate([self.deleted, np.zeros(len(records), dtype=bool)])
+            self.count = end
+            self._write_meta()
+            self._mask_cache.clear()
+            self._refresh_ivf(start, end)
+
+    def _refresh_ivf(self, start: int, end: int):
+        if end < self.ivf_min_rows:
+            return
+        # Rebuild when the store has doubled since the last build so the
+        # centroids keep tracking the data; otherwise just assign new rows.
+        if self.ivf is None or end >= 2 * len(self.ivf.centroids) ** 2:
+            nlist = max(16, int(np.sqrt(end)))
+            self.ivf = IVFIndex.build(self.vectors[:end], nlist)
+            self.ivf.save(os.path.join(self.path, _IVF))
+        else:
+            self.ivf.extend(self.vectors[start:end])
+
+    def delete_file(self, file_id: str) -> bool:
+        """Tombstone every live chunk of a file; rows are skipped at query time."""
+        with self._write_lock:
+            rows = (self.file_ids == file_id) & ~self.deleted
+            if not rows.any():
+                return False
+            self.deleted |= rows
+            self._write_meta()
+            self._mask_cache.clear()
+            return True
+
+    # ── reads ─────────────────────────────────────────────────
+    def _mask(self, filters: Optional[dict], count: int) -> Optional[np.ndarray]:
+        if not filters and not self.deleted[:count].any():
+            return None
+        # Attribute filters are evaluated once per (filter, store size)
+        key = json.dumps(filters, sort_keys=True)
+        mask = self._mask_cache.get(key)
+        if mask is not None and len(mask) == count:
+            return mask
+        mask = np.fromiter(
+            (matches_filter(r.get("attributes", {}), filters) for r in self.records[:count]),
+            dtype=bool, count=count,
+        )
+        mask &= ~self.deleted[:count]
+        if len(self._mask_cache) > 64:
+            self._mask_cache.clear()
+        self._mask_cache[key] = mask
+        return mask
+
+    def search(self, query: np.ndarray, k: int, filters: Optional[dict] = None,
+               score_threshold: float = 0.0) -> List[dict]:
+        """Cosine top-k over the store; `query` must be unit-normalised."""
+        count = self.count
+        if count == 0 or k <= 0:
+            return []
+        mask = self._mask(filters, count)
+
+        if self.ivf is not None and self.ivf.size >= count:
+            rows = self.ivf.candidates(query, self.nprobe)
+            rows = rows[rows < count]
+            if mask is not None:
+                rows = rows[mask[rows]]
+            scores = self.vectors[rows] @ query
+        else:
+            scores = np.asarray(self.vectors[:count] @ query)
+            rows = np.arange(count)
+            if mask is not None:
+                rows = rows[mask]
+                scores = scores[mask]
+
+        if score_threshold > 0:
+            keep = scores >= score_threshold
+            rows, scores = rows[keep], scores[keep]
+        if not len(rows):
+            return []
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            record = self.records[int(rows[i])]
+            results.append({
+                "file_id": record.get("file_id"),
+                "filename": record.get("filename"),
+                "score": round(float(scores[i]), 6),
+                "text": record.get("text", ""),
+                "attributes": record.get("attributes", {}),
+            })
+        return results
+
+    def live_file_ids(self) -> Set[str]:
+        return set(self.file_ids[~self.deleted].tolist())
+
+    def file_counts(self) -> Dict[str, int]:
+        return {"files": len(self.live_file_ids()), "chunks": int(self.count - self.deleted.sum())}
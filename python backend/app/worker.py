@@ -0,0 +1,47 @@
+# app/worker.py
+#
+# Standalone background job worker: `python -m app.worker`. Runs the same
+# job queue workers as the API process (see JOB_WORKERS_ENABLED) without
+# serving HTTP, so workers can be scaled separately from API pods.
+
+import asyncio
+import logging
+import os
+import signal
+
+from app.agent.client_pool import openai_client_pool
+from app.database.async_mongo import get_async_mongo_client
+from app.services import job_handlers  # noqa: F401  (registers the job kinds)
+from app.services.job_queue import job_queue
+from app.services.run_log import run_log
+from app.services.usage_meter import usage_meter
+
+logging.basicConfig(
+    level=logging.DEBUG if os.getenv("DEBUG", "False").lower() == "true" else logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    run_log.start()
+    usage_meter.start()
+    job_queue.start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Stopping job worker")
+        await job_queue.stop()
+        await run_log.stop()
+        await usage_meter.stop()
+        get_async_mongo_client().client.close()
+        await openai_client_pool.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
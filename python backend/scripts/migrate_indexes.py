@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add the parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database.async_mongo import get_async_mongo_client
+from app.database.indexes import run_migrations
+
+async def migrate(explain: bool):
+    db = get_async_mongo_client()
+    try:
+        return await run_migrations(db, explain=explain)
+    finally:
+        db.client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the MongoDB index manifest")
+    parser.add_argument("--explain", action="store_true", help="Explain hot queries and flag collection scans")
+    args = parser.parse_args()
+
+    result = asyncio.run(migrate(args.explain))
+    print(json.dumps(result, indent=2, default=str))
+
+    failed = [i for i in result["indexes"] if i["status"] in ("failed", "conflict")]
+    slow = [q for q in result.get("explain", []) if q.get("collscan") or q.get("in_memory_sort")]
+    if failed:
+        print(f"{len(failed)} index(es) could not be applied", file=sys.stderr)
+    if slow:
+        print(f"{len(slow)} query shape(s) still scan or sort in memory", file=sys.stderr)
+    sys.exit(1 if failed else 0)